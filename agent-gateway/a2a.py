@@ -21,6 +21,7 @@ Public API
 ----------
     submit(from_persona, to_persona, task, context)  → dict   (task record)
     get_task(task_id)                                → Optional[dict]
+    wait_for(task_id, timeout)                       → Optional[dict]
     list_tasks(limit)                                → list[dict]
     cancel(task_id)                                  → bool
 """
@@ -37,6 +38,11 @@ from collections import deque
 from pathlib import Path
 from typing import Any, Deque, Dict, List, Optional
 
+# Gateway modules are imported lazily by the worker; make them importable once
+_GATEWAY_DIR = os.path.dirname(os.path.abspath(__file__))
+if _GATEWAY_DIR not in sys.path:
+    sys.path.insert(0, _GATEWAY_DIR)
+
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
@@ -53,6 +59,7 @@ _lock = threading.Lock()
 _tasks: Dict[str, Dict[str, Any]] = {}
 _order: Deque[str] = deque(maxlen=_MAX_IN_MEMORY)   # newest last
 _cancel_flags: Dict[str, threading.Event] = {}
+_done_events: Dict[str, threading.Event] = {}    # set once a task reaches a final state
 
 
 def _persist(record: Dict[str, Any]) -> None:
@@ -87,10 +94,6 @@ def _run_task(task_id: str) -> None:
 
     try:
         # Import gateway modules
-        gw = os.path.dirname(__file__)
-        if gw not in sys.path:
-            sys.path.insert(0, gw)
-
         from workspace_manager import load_agents_md
         from providers.adapters import get_adapter, available_providers
         from tools.tool_runner import run_tool_loop, build_tool_system_block
@@ -149,6 +152,9 @@ def _run_task(task_id: str) -> None:
     finally:
         with _lock:
             _cancel_flags.pop(task_id, None)
+            done = _done_events.get(task_id)
+        if done is not None:
+            done.set()
 
 
 def _extract_persona_prompt(agents_md: str, persona_name: str) -> str:
@@ -227,9 +233,11 @@ def submit(
         if len(_order) >= _MAX_IN_MEMORY:
             oldest = _order[0]
             _tasks.pop(oldest, None)
+            _done_events.pop(oldest, None)
         _tasks[task_id] = record
         _order.append(task_id)
         _cancel_flags[task_id] = cancel_ev
+        _done_events[task_id] = threading.Event()
 
     worker = threading.Thread(target=_run_task, args=(task_id,), daemon=True, name=f'a2a-{task_id[:8]}')
     worker.start()
@@ -244,6 +252,19 @@ def get_task(task_id: str) -> Optional[Dict[str, Any]]:
         return dict(rec) if rec else None
 
 
+def wait_for(task_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Block until *task_id* finishes or *timeout* seconds pass.
+
+    Returns the task record as :func:`get_task` would (check its ``status``
+    to tell completion from a timeout), or None for an unknown task.
+    """
+    with _lock:
+        done = _done_events.get(task_id)
+    if done is not None:
+        done.wait(timeout)
+    return get_task(task_id)
+
+
 def list_tasks(limit: int = 20) -> List[Dict[str, Any]]:
     """Return recent tasks, newest first."""
     limit = max(1, min(limit, _MAX_IN_MEMORY))
@@ -2499,10 +2499,12 @@ class WorkspaceWriteBody(BaseModel):
 
 
 @app.get('/workspace/files')
-def workspace_list_files(request: Request):
+def workspace_list_files(request: Request,
+                         depth: int | None = Query(None, ge=1,
+                                                      description='Directory levels to list (1 = top level only); omit for the whole tree')):
     """List all files in the agent workspace.  Admin auth required."""
     _require_admin_token(request)
-    return {'files': _workspace.list_files()}
+    return {'files': _workspace.list_files(depth)}
 
 
 @app.get('/workspace/file')
@@ -3277,9 +3279,7 @@ async def voice_transcribe(
     except Exception:
         pass
 
-    text = await asyncio.to_thread(
-        _voice.transcribe, audio_bytes, file.filename or 'audio.webm', provider_key
-    )
+    text = await _voice.transcribe_long(audio_bytes, file.filename or 'audio.webm', provider_key)
     if text.startswith('[ERROR]'):
         raise HTTPException(status_code=422, detail=text)
     return {'text': text}
@@ -3301,11 +3301,10 @@ async def voice_speak(payload: dict, request: Request = None):
     if not text:
         raise HTTPException(status_code=400, detail='text is required')
 
-    async def _gen():
-        async for chunk in _voice.speak_stream(text, voice=voice, rate=rate, pitch=pitch):
-            yield chunk
-
-    return StreamingResponse(_gen(), media_type='audio/mpeg')
+    return StreamingResponse(
+        _voice.speak_stream(text, voice=voice, rate=rate, pitch=pitch),
+        media_type='audio/mpeg',
+    )
 
 
 @app.get('/voice/voices')
@@ -3389,10 +3388,12 @@ async def mcp_list_tools(request: Request = None):
     """List all tools exposed by running MCP servers."""
     _require_bearer(request)
     from tools import tool_runner as _tr
+    # MCP tools are registered as "<server>__<tool>"; match on the prefix
+    prefixes = tuple(s['name'] + '__' for s in _mcp.list_servers())
     mcp_tools = [
-        {'name': k, 'description': v.get('description', '')}
-        for k, v in _tr._REGISTRY.items()
-        if '__' in k and any(k.startswith(s['name'] + '__') for s in _mcp.list_servers())
+        {'name': t['name'], 'description': t['description']}
+        for t in _tr.list_tools()
+        if prefixes and t['name'].startswith(prefixes)
     ]
     return {'tools': mcp_tools, 'count': len(mcp_tools)}
 
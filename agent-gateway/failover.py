@@ -22,6 +22,9 @@ Usage
     )
     # result has extra keys: failover_used (bool), actual_provider (str),
     # actual_model (str)
+
+stream_with_failover() takes the same arguments, yields text chunks and
+returns the same result; FailoverAdapter exposes both.
 """
 
 from __future__ import annotations
@@ -29,7 +32,7 @@ from __future__ import annotations
 import logging
 import time
 import threading
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Generator, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -145,21 +148,11 @@ def _is_rate_limit(exc: Exception) -> bool:
 # Core failover call
 # ---------------------------------------------------------------------------
 
-def chat_with_failover(
-    primary_provider: str,
-    primary_model:    Optional[str],
-    messages:         list,
-    temperature:      float  = 0.7,
-    max_tokens:       Optional[int] = None,
-    **kwargs,
-) -> Dict[str, Any]:
-    """Call chat_complete with automatic failover on rate-limit / server errors.
+def _attempts(primary_provider: str, primary_model: Optional[str], kwargs: dict):
+    """Yield ``(idx, provider, adapter, call_kwargs, model)`` for each provider to try.
 
-    Returns the normal adapter result dict, extended with:
-        failover_used     (bool)  – True if the primary failed
-        actual_provider   (str)   – which provider actually responded
-        actual_model      (str)   – which model was used
-        failover_reason   (str)   – error that triggered failover (if used)
+    Primary first, then the chain; providers on cooldown, unknown or
+    unavailable are skipped.
     """
     from providers.adapters import get_adapter  # local import to avoid circular
 
@@ -170,10 +163,6 @@ def chat_with_failover(
             if p != primary_provider:
                 attempts.append((p, m))
 
-    last_exc: Optional[Exception] = None
-    failover_triggered = False
-    failover_reason    = ''
-
     for idx, (provider, model) in enumerate(attempts):
         if _is_on_cooldown(provider):
             logger.info('failover: skipping %s (on cooldown)', provider)
@@ -193,7 +182,64 @@ def chat_with_failover(
             resolved_model = primary_model
         if resolved_model:
             call_kwargs['model'] = resolved_model
+        yield idx, provider, adapter, call_kwargs, resolved_model
+
+
+def _succeeded(result: Dict[str, Any], provider: str, resolved_model: str,
+               failover_triggered: bool, failover_reason: str) -> Dict[str, Any]:
+    """Clear *provider*'s cooldown and add the failover keys to *result*."""
+    _clear_cooldown(provider)
+    result.setdefault('provider', provider)
+    result['failover_used']   = failover_triggered
+    result['actual_provider'] = provider
+    result['actual_model']    = result.get('model', resolved_model)
+    if failover_triggered:
+        result['failover_reason'] = failover_reason
+        logger.info('failover: recovered via %s/%s', provider, resolved_model)
+    return result
+
+
+def _failed(exc: Exception, idx: int, provider: str) -> Optional[str]:
+    """Record a failed attempt; return the failover reason if the primary failed.
+
+    Re-raises a non-retriable error from the primary.
+    """
+    if _is_retriable(exc):
+        _record_failure(provider)
+        if idx == 0:
+            lbl = 'rate-limited' if _is_rate_limit(exc) else 'errored'
+            logger.warning('failover: primary %s %s — trying next in chain', provider, lbl)
+            return str(exc)[:200]
+    else:
+        # Non-retriable error on primary → don't try failover, just raise
+        if idx == 0:
+            raise exc
+        logger.info('failover: non-retriable error on %s: %s', provider, exc)
+    return None
+
+
+def chat_with_failover(
+    primary_provider: str,
+    primary_model:    Optional[str],
+    messages:         list,
+    temperature:      float  = 0.7,
+    max_tokens:       Optional[int] = None,
+    **kwargs,
+) -> Dict[str, Any]:
+    """Call chat_complete with automatic failover on rate-limit / server errors.
+
+    Returns the normal adapter result dict, extended with:
+        failover_used     (bool)  – True if the primary failed
+        actual_provider   (str)   – which provider actually responded
+        actual_model      (str)   – which model was used
+        failover_reason   (str)   – error that triggered failover (if used)
+    """
+    last_exc: Optional[Exception] = None
+    failover_triggered = False
+    failover_reason    = ''
 
+    for idx, provider, adapter, call_kwargs, resolved_model in _attempts(
+            primary_provider, primary_model, kwargs):
         try:
             result = adapter.chat_complete(
                 messages=messages,
@@ -201,31 +247,14 @@ def chat_with_failover(
                 max_tokens=max_tokens,
                 **call_kwargs,
             )
-            # Success — clear any previous cooldown for this provider
-            _clear_cooldown(provider)
-            result.setdefault('provider', provider)
-            result['failover_used']   = failover_triggered
-            result['actual_provider'] = provider
-            result['actual_model']    = result.get('model', resolved_model)
-            if failover_triggered:
-                result['failover_reason'] = failover_reason
-                logger.info('failover: recovered via %s/%s', provider, resolved_model)
-            return result
-
         except Exception as exc:
             last_exc = exc
-            if _is_retriable(exc):
-                _record_failure(provider)
-                if idx == 0:
-                    failover_triggered = True
-                    failover_reason    = str(exc)[:200]
-                    lbl = 'rate-limited' if _is_rate_limit(exc) else 'errored'
-                    logger.warning('failover: primary %s %s — trying next in chain', provider, lbl)
-            else:
-                # Non-retriable error on primary → don't try failover, just raise
-                if idx == 0:
-                    raise
-                logger.info('failover: non-retriable error on %s: %s', provider, exc)
+            reason = _failed(exc, idx, provider)
+            if reason is not None:
+                failover_triggered, failover_reason = True, reason
+            continue
+        # Success — clear any previous cooldown for this provider
+        return _succeeded(result, provider, resolved_model, failover_triggered, failover_reason)
 
     # All providers exhausted
     raise RuntimeError(
@@ -233,6 +262,70 @@ def chat_with_failover(
     )
 
 
+def stream_with_failover(
+    primary_provider: str,
+    primary_model:    Optional[str],
+    messages:         list,
+    temperature:      float  = 0.7,
+    max_tokens:       Optional[int] = None,
+    **kwargs,
+) -> Generator[str, None, Dict[str, Any]]:
+    """Streaming counterpart of :func:`chat_with_failover`.
+
+    Yields text chunks and returns the same result dict.  Streaming adapters
+    are consumed chunk by chunk; others contribute their reply as a single
+    chunk.  A provider is only abandoned for the next one before it has
+    produced any text — an error mid-reply is raised, since the chunks
+    already yielded cannot be taken back.
+    """
+    last_exc: Optional[Exception] = None
+    failover_triggered = False
+    failover_reason    = ''
+
+    for idx, provider, adapter, call_kwargs, resolved_model in _attempts(
+            primary_provider, primary_model, kwargs):
+        parts: List[str] = []
+        try:
+            if getattr(adapter, 'supports_streaming', False) is True:
+                stream = adapter.stream_chat_complete(
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **call_kwargs,
+                )
+                while True:
+                    try:
+                        chunk = next(stream)
+                    except StopIteration as stop:
+                        result = stop.value or {'content': ''.join(parts)}
+                        break
+                    parts.append(chunk)
+                    yield chunk
+            else:
+                result = adapter.chat_complete(
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **call_kwargs,
+                )
+                if result.get('content'):
+                    parts.append(result['content'])
+                    yield result['content']
+        except Exception as exc:
+            if parts:
+                raise
+            last_exc = exc
+            reason = _failed(exc, idx, provider)
+            if reason is not None:
+                failover_triggered, failover_reason = True, reason
+            continue
+        return _succeeded(result, provider, resolved_model, failover_triggered, failover_reason)
+
+    raise RuntimeError(
+        f'All providers in failover chain exhausted. Last error: {last_exc}'
+    )
+
+
 # ---------------------------------------------------------------------------
 # FailoverAdapter — drop-in replacement for regular adapters
 # ---------------------------------------------------------------------------
@@ -279,6 +372,33 @@ class FailoverAdapter:
             max_tokens=max_tokens,
             **kwargs,
         )
+        self._stash_meta(result, model)
+        return result
+
+    # run_tool_loop streams through the failover chain too, so TOOL_CALLs are
+    # parsed (and independent ones started) while the reply is generated.
+    supports_streaming = True
+
+    def stream_chat_complete(
+        self,
+        messages: list,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> Generator[str, None, Dict[str, Any]]:
+        model = kwargs.pop('model', self._primary_model)
+        result = yield from stream_with_failover(
+            primary_provider=self._primary_provider,
+            primary_model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
+        )
+        self._stash_meta(result, model)
+        return result
+
+    def _stash_meta(self, result: Dict[str, Any], model: Optional[str]) -> None:
         # Stash metadata so the calling endpoint can read it
         self.last_result_meta = {
             'failover_used':   result.get('failover_used', False),
@@ -286,4 +406,3 @@ class FailoverAdapter:
             'actual_model':    result.get('actual_model', model or ''),
             'failover_reason': result.get('failover_reason', ''),
         }
-        return result
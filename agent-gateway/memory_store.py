@@ -29,6 +29,7 @@ import re
 import threading
 import time
 import uuid
+from collections import Counter, OrderedDict
 from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
@@ -48,9 +49,95 @@ _INJECT_K        = 3      # memories injected into system prompt
 _DECAY_FACTOR    = 0.3    # age penalty weight (0 = no decay, 1 = strong decay)
 _DECAY_HORIZON   = 90     # days after which decay reaches max
 _MMR_LAMBDA      = 0.6    # trade-off: 1=pure relevance, 0=pure diversity
+_EMBED_CACHE_SIZE = 1024  # query embeddings kept in the LRU
 
 SOURCES = ('page', 'chat', 'manual')
 
+_WORD_RE = re.compile(r'\w+')
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
+
+# ---------------------------------------------------------------------------
+# Query-embedding cache
+# ---------------------------------------------------------------------------
+
+class _EmbeddingCache:
+    """Thread-safe LRU of query text -> embedding vector.
+
+    Keys are SHA-256 digests of ``model + NUL + text`` so switching the
+    embedding model can never serve a vector computed by another one.
+    """
+
+    def __init__(self, maxsize: int = _EMBED_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._entries: 'OrderedDict[bytes, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(model: str, text: str) -> bytes:
+        return hashlib.sha256(f'{model}\0{text}'.encode()).digest()
+
+    def get_many(self, texts: List[str], model: str, embed) -> List[Any]:
+        """Return embeddings for *texts*, calling ``embed(misses)`` once for all misses."""
+        keys = [self._key(model, t) for t in texts]
+        out: List[Any] = [None] * len(texts)
+        missing: Dict[bytes, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vec = self._entries.get(key)
+                if vec is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    out[i] = vec
+            self.hits += len(texts) - sum(len(v) for v in missing.values())
+            self.misses += len(missing)
+        if missing:
+            vecs = embed([texts[idx[0]] for idx in missing.values()])
+            with self._lock:
+                for (key, idx), vec in zip(missing.items(), vecs):
+                    for i in idx:
+                        out[i] = vec
+                    self._entries[key] = vec
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size':     len(self._entries),
+                'maxsize':  self._maxsize,
+                'hits':     self.hits,
+                'misses':   self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_embed_fn_lock = threading.Lock()
+_embed_fn: Any = None
+
+
+def _shared_embedding_function() -> Any:
+    """Process-wide ChromaDB default embedding function.
+
+    The ONNX session behind it loads the model weights on first use; sharing
+    one instance means every MemoryStore (and every sub-agent using one)
+    reuses those weights instead of loading its own copy.
+    """
+    global _embed_fn
+    if _embed_fn is None:
+        with _embed_fn_lock:
+            if _embed_fn is None:
+                from chromadb.utils.embedding_functions import DefaultEmbeddingFunction  # type: ignore
+                _embed_fn = DefaultEmbeddingFunction()
+    return _embed_fn
+
 
 # ---------------------------------------------------------------------------
 # ChromaDB backend
@@ -61,9 +148,14 @@ class _ChromaBackend:
         import chromadb  # type: ignore
         os.makedirs(data_dir, exist_ok=True)
         self._client = chromadb.PersistentClient(path=data_dir)
-        # Use the default embedding function (ONNX MiniLM, no GPU required)
+        # Use the default embedding function (ONNX MiniLM, no GPU required).
+        # We keep our own handle on it so query vectors can be cached.
+        self._embed = _shared_embedding_function()
+        self._embed_model = self._embed.name() if hasattr(self._embed, 'name') else type(self._embed).__name__
+        self.query_cache = _EmbeddingCache()
         self._col = self._client.get_or_create_collection(
             name=_COLLECTION_NAME,
+            embedding_function=self._embed,
             metadata={'hnsw:space': 'cosine'},
         )
         logger.info('memory_store: ChromaDB backend at %s (%d entries)',
@@ -88,26 +180,37 @@ class _ChromaBackend:
     # --- read ops ---
 
     def search(self, query: str, n: int) -> List[Dict[str, Any]]:
-        if self._col.count() == 0:
-            return []
+        return self.search_batch([query], n)[0]
+
+    def search_batch(self, queries: List[str], n: int) -> List[List[Dict[str, Any]]]:
+        """One collection query for all *queries* — embedded in a single batch."""
+        total = self._col.count()
+        if total == 0:
+            return [[] for _ in queries]
         results = self._col.query(
-            query_texts=[query],
-            n_results=min(n, self._col.count()),
+            query_embeddings=self.embed_queries(list(queries)),
+            n_results=min(n, total),
             include=['documents', 'metadatas', 'distances'],
         )
-        out = []
-        for doc, meta, dist in zip(
-            results['documents'][0],
-            results['metadatas'][0],
-            results['distances'][0],
+        batches = []
+        for docs, metas, dists in zip(
+            results['documents'],
+            results['metadatas'],
+            results['distances'],
         ):
-            out.append({
-                'id':       meta.get('doc_id', ''),
-                'text':     doc,
-                'metadata': meta,
-                'score':    round(1.0 - dist, 4),   # cosine similarity
-            })
-        return out
+            out = []
+            for doc, meta, dist in zip(docs, metas, dists):
+                out.append({
+                    'id':       meta.get('doc_id', ''),
+                    'text':     doc,
+                    'metadata': meta,
+                    'score':    round(1.0 - dist, 4),   # cosine similarity
+                })
+            batches.append(out)
+        return batches
+
+    def embed_queries(self, texts: List[str]) -> List[Any]:
+        return self.query_cache.get_many(texts, self._embed_model, self._embed)
 
     def list_recent(self, n: int) -> List[Dict[str, Any]]:
         total = self._col.count()
@@ -139,26 +242,54 @@ class _ChromaBackend:
 # ---------------------------------------------------------------------------
 
 class _KeywordBackend:
-    """Dead-simple in-memory keyword store used when ChromaDB is unavailable."""
+    """Dead-simple in-memory keyword store used when ChromaDB is unavailable.
+
+    Documents are tokenised once on add into term counts plus an inverted
+    index (word -> doc ids), so a search only scores documents sharing at
+    least one word with the query instead of re-tokenising the whole store.
+    """
 
     def __init__(self):
         self._store: Dict[str, Dict[str, Any]] = {}   # id -> {text, metadata}
+        self._terms: Dict[str, tuple] = {}            # id -> (Counter, n_words)
+        self._index: Dict[str, set] = {}              # word -> {id, ...}
         logger.warning('memory_store: ChromaDB unavailable — using keyword fallback')
 
     def add(self, doc_id: str, text: str, metadata: dict) -> None:
+        self._unindex(doc_id)
+        words = _WORD_RE.findall(text.lower())
+        counts = Counter(words)
         self._store[doc_id] = {'text': text, 'metadata': metadata}
+        self._terms[doc_id] = (counts, len(words))
+        for w in counts:
+            self._index.setdefault(w, set()).add(doc_id)
 
     def delete(self, doc_id: str) -> bool:
+        self._unindex(doc_id)
         return bool(self._store.pop(doc_id, None))
 
+    def _unindex(self, doc_id: str) -> None:
+        terms = self._terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for w in terms[0]:
+            ids = self._index.get(w)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self._index[w]
+
     def search(self, query: str, n: int) -> List[Dict[str, Any]]:
-        query_words = set(re.findall(r'\w+', query.lower()))
+        query_words = set(_WORD_RE.findall(query.lower()))
+        candidates: set = set()
+        for w in query_words:
+            candidates |= self._index.get(w, set())
         scored = []
-        for doc_id, entry in self._store.items():
-            words = re.findall(r'\w+', entry['text'].lower())
-            word_set = set(words)
-            tf = sum(words.count(w) for w in query_words) / max(len(words), 1)
-            overlap = len(query_words & word_set) / max(len(query_words), 1)
+        for doc_id in candidates:
+            entry = self._store[doc_id]
+            counts, n_words = self._terms[doc_id]
+            tf = sum(counts[w] for w in query_words) / max(n_words, 1)
+            overlap = sum(1 for w in query_words if w in counts) / max(len(query_words), 1)
             score = 0.5 * tf + 0.5 * overlap
             if score > 0:
                 scored.append({'id': doc_id, 'text': entry['text'],
@@ -166,6 +297,9 @@ class _KeywordBackend:
         scored.sort(key=lambda x: x['score'], reverse=True)
         return scored[:n]
 
+    def search_batch(self, queries: List[str], n: int) -> List[List[Dict[str, Any]]]:
+        return [self.search(q, n) for q in queries]
+
     def list_recent(self, n: int) -> List[Dict[str, Any]]:
         entries = [{'id': k, 'text': v['text'], 'metadata': v['metadata']}
                    for k, v in self._store.items()]
@@ -189,9 +323,12 @@ class _KeywordBackend:
 class MemoryStore:
     """Thread-safe wrapper around ChromaDB (or keyword fallback).
 
-    All public methods are safe to call from any thread.
+    All public methods are safe to call from any thread.  ``version`` counts
+    adds and deletes so callers can tell whether cached results are stale.
     """
 
+    version = 0
+
     def __init__(self, data_dir: str = _DATA_DIR):
         self._lock = threading.Lock()
         try:
@@ -237,6 +374,7 @@ class MemoryStore:
         }
         with self._lock:
             self._backend.add(doc_id, text, metadata)
+            self.version += 1
         logger.debug('memory_store: added %s (%s)', doc_id, source)
         return doc_id
 
@@ -244,6 +382,7 @@ class MemoryStore:
 
     def delete(self, doc_id: str) -> bool:
         with self._lock:
+            self.version += 1
             return self._backend.delete(doc_id)
 
     # ---------------------------------------------------------------- search
@@ -259,7 +398,35 @@ class MemoryStore:
         """Semantic search with optional temporal decay and MMR deduplication."""
         with self._lock:
             raw = self._backend.search(query, n=n * 3)  # over-fetch for MMR
+        return self._rerank(raw, n, source_filter, apply_decay, apply_mmr)
 
+    def search_batch(
+        self,
+        queries:     List[str],
+        n:           int  = _TOP_K,
+        source_filter: Optional[str] = None,
+        apply_decay: bool = True,
+        apply_mmr:   bool = True,
+    ) -> List[List[Dict[str, Any]]]:
+        """Like :meth:`search` for several queries at once.
+
+        The backend is queried once, so ChromaDB embeds every query in a
+        single encoder pass.  Returns one result list per query, in order.
+        """
+        if not queries:
+            return []
+        with self._lock:
+            raws = self._backend.search_batch(list(queries), n=n * 3)
+        return [self._rerank(raw, n, source_filter, apply_decay, apply_mmr) for raw in raws]
+
+    def _rerank(
+        self,
+        raw:         List[Dict[str, Any]],
+        n:           int,
+        source_filter: Optional[str],
+        apply_decay: bool,
+        apply_mmr:   bool,
+    ) -> List[Dict[str, Any]]:
         if source_filter:
             raw = [r for r in raw if r['metadata'].get('source') == source_filter]
 
@@ -291,6 +458,17 @@ class MemoryStore:
         with self._lock:
             return self._backend.count()
 
+    # ----------------------------------------------------------------- stats
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend name, entry count and query-embedding cache counters."""
+        cache = getattr(self._backend, 'query_cache', None)
+        return {
+            'backend':         self.backend_name,
+            'count':           self.count(),
+            'embedding_cache': cache.stats() if cache else None,
+        }
+
     # ----------------------------------------------------------------- utils
 
     @staticmethod
@@ -311,7 +489,7 @@ class MemoryStore:
     def _mmr(results: List[Dict[str, Any]], n: int) -> List[Dict[str, Any]]:
         """Maximal Marginal Relevance: balance relevance vs. diversity."""
         def bow(text: str) -> Dict[str, int]:
-            words = re.findall(r'\w+', text.lower())
+            words = _WORD_RE.findall(text.lower())
             freq: Dict[str, int] = {}
             for w in words:
                 freq[w] = freq.get(w, 0) + 1
@@ -376,8 +554,8 @@ def extract_text_from_html(html: str, max_chars: int = _MAX_CONTENT_LEN) -> str:
             tag.decompose()
         text = soup.get_text(separator=' ', strip=True)
     except Exception:
-        text = re.sub(r'<[^>]+>', ' ', html)
-    text = re.sub(r'\s+', ' ', text).strip()
+        text = _TAG_RE.sub(' ', html)
+    text = _WS_RE.sub(' ', text).strip()
     return text[:max_chars]
 
 
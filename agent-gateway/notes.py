@@ -16,6 +16,7 @@ Public API
 
 from __future__ import annotations
 
+import itertools
 import os
 import re
 import time
@@ -30,6 +31,10 @@ from typing import Dict, List, Optional
 _NOTES_DIR = Path(os.environ.get('INTELLI_NOTES_DIR', Path.home() / '.intelli' / 'notes'))
 _MAX_SEARCH_RESULTS = int(os.environ.get('INTELLI_NOTES_SEARCH_MAX', '50'))
 
+# Bumped after every save() so cached search results can tell they are stale.
+_version_counter = itertools.count(1)
+version = 0
+
 
 def _dir() -> Path:
     _NOTES_DIR.mkdir(parents=True, exist_ok=True)
@@ -61,6 +66,7 @@ def save(
 
     Returns a dict with ``path``, ``date``, ``title``, ``byte_offset``.
     """
+    global version
     tags = tags or []
     today = date.today().isoformat()  # YYYY-MM-DD
     filename = _dir() / f'{today}.md'
@@ -87,6 +93,7 @@ def save(
     byte_offset = filename.stat().st_size
     with filename.open('a', encoding='utf-8') as fh:
         fh.write(entry)
+    version = next(_version_counter)
 
     return {
         'ok': True,
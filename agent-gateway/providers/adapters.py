@@ -40,7 +40,7 @@ from __future__ import annotations
 import os
 import json as _json
 import urllib.parse as _urlparse
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Generator, List, Optional
 
 _requests: Any = None
 try:
@@ -166,6 +166,9 @@ class ProviderSettingsStore:
 class BaseAdapter:
     provider = 'base'
     requires_key: bool = True  # set to False for local providers (e.g. Ollama)
+    # True when the adapter implements stream_chat_complete(): a generator
+    # yielding reply text chunks and returning the chat_complete()-style dict.
+    supports_streaming: bool = False
 
     def is_available(self) -> bool:
         raise NotImplementedError
@@ -192,6 +195,37 @@ class BaseAdapter:
         if not _HAS_REQUESTS:
             raise RuntimeError('requests package is required for provider adapters')
 
+    def _stream_sse_deltas(self, resp: Any, model: str) -> Generator[str, None, Dict[str, Any]]:
+        """Yield content deltas from an OpenAI-style SSE response body.
+
+        Returns the standard reply dict for the concatenated text, with the
+        token usage from the final chunk when the provider sends one
+        (``stream_options.include_usage``).
+        """
+        parts: List[str] = []
+        usage: dict | None = None
+        try:
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                payload = line[5:].strip()
+                if payload == '[DONE]':
+                    break
+                try:
+                    data = _json.loads(payload)
+                except ValueError:
+                    continue
+                model = data.get('model') or model
+                usage = data.get('usage') or usage
+                for choice in data.get('choices') or ():
+                    delta = (choice.get('delta') or {}).get('content')
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+        finally:
+            resp.close()
+        return self._standard_reply(''.join(parts), model, usage)
+
 
 # ---------------------------------------------------------------------------
 # OpenAI adapter
@@ -213,16 +247,9 @@ class OpenAIAdapter(BaseAdapter):
     def _get_default_model(self) -> str:
         return ProviderSettingsStore.get('openai').get('model_id') or self.DEFAULT_MODEL
 
-    def chat_complete(
-        self,
-        messages: List[Dict[str, str]],
-        model: str = '',
-        temperature: float = 0.7,
-        max_tokens: int = 1024,
-        **kwargs: Any,
-    ) -> Dict[str, Any]:
-        if not model:
-            model = self._get_default_model()
+    supports_streaming = True
+
+    def _post(self, messages, model, temperature, max_tokens, stream, kwargs) -> Any:
         self._check_requests()
         key = _resolve_key('openai', ['OPENAI_API_KEY'])
         if not key:
@@ -230,6 +257,11 @@ class OpenAIAdapter(BaseAdapter):
         _check_outbound_url(self.BASE_URL)
         # Strip Anthropic-only 'system' key — it's already in messages as role:system
         oai_kwargs = {k: v for k, v in kwargs.items() if k != 'system'}
+        if stream:
+            oai_kwargs['stream'] = True
+            # Ask for a final chunk carrying token usage, as the
+            # non-streaming reply includes it.
+            oai_kwargs.setdefault('stream_options', {'include_usage': True})
         resp = _requests.post(
             f'{self.BASE_URL}/chat/completions',
             headers={'Authorization': f'Bearer {key}', 'Content-Type': 'application/json'},
@@ -241,13 +273,39 @@ class OpenAIAdapter(BaseAdapter):
                 **oai_kwargs,
             },
             timeout=30,
+            stream=stream,
         )
         if not resp.ok:
             raise RuntimeError(f'OpenAI API error {resp.status_code}: {resp.text[:500]}')
-        data = resp.json()
+        return resp
+
+    def chat_complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = '',
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        if not model:
+            model = self._get_default_model()
+        data = self._post(messages, model, temperature, max_tokens, False, kwargs).json()
         choice = data['choices'][0]['message']['content']
         return self._standard_reply(choice, data.get('model', model), data.get('usage'))
 
+    def stream_chat_complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = '',
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs: Any,
+    ) -> Generator[str, None, Dict[str, Any]]:
+        if not model:
+            model = self._get_default_model()
+        resp = self._post(messages, model, temperature, max_tokens, True, kwargs)
+        return (yield from self._stream_sse_deltas(resp, model))
+
 
 # ---------------------------------------------------------------------------
 # Anthropic adapter
@@ -334,22 +392,20 @@ class OpenRouterAdapter(BaseAdapter):
     def _get_default_model(self) -> str:
         return ProviderSettingsStore.get('openrouter').get('model_id') or self.DEFAULT_MODEL
 
-    def chat_complete(
-        self,
-        messages: List[Dict[str, str]],
-        model: str = '',
-        temperature: float = 0.7,
-        max_tokens: int = 1024,
-        **kwargs: Any,
-    ) -> Dict[str, Any]:
-        if not model:
-            model = self._get_default_model()
+    supports_streaming = True
+
+    def _post(self, messages, model, temperature, max_tokens, stream, kwargs) -> Any:
         self._check_requests()
         key = _resolve_key('openrouter', [])
         if not key:
             raise RuntimeError('OpenRouter API key not configured')
         # Strip Anthropic-only 'system' key — it's already in messages as role:system
         oai_kwargs = {k: v for k, v in kwargs.items() if k != 'system'}
+        if stream:
+            oai_kwargs['stream'] = True
+            # Ask for a final chunk carrying token usage, as the
+            # non-streaming reply includes it.
+            oai_kwargs.setdefault('stream_options', {'include_usage': True})
         _check_outbound_url(self.BASE_URL)
         resp = _requests.post(
             f'{self.BASE_URL}/chat/completions',
@@ -367,13 +423,39 @@ class OpenRouterAdapter(BaseAdapter):
                 **oai_kwargs,
             },
             timeout=30,
+            stream=stream,
         )
         if not resp.ok:
             raise RuntimeError(f'OpenRouter API error {resp.status_code}: {resp.text[:500]}')
-        data = resp.json()
+        return resp
+
+    def chat_complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = '',
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        if not model:
+            model = self._get_default_model()
+        data = self._post(messages, model, temperature, max_tokens, False, kwargs).json()
         choice = data['choices'][0]['message']['content']
         return self._standard_reply(choice, data.get('model', model), data.get('usage'))
 
+    def stream_chat_complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = '',
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs: Any,
+    ) -> Generator[str, None, Dict[str, Any]]:
+        if not model:
+            model = self._get_default_model()
+        resp = self._post(messages, model, temperature, max_tokens, True, kwargs)
+        return (yield from self._stream_sse_deltas(resp, model))
+
 
 # ---------------------------------------------------------------------------
 # Ollama adapter (local)
@@ -10,6 +10,7 @@ wakes up every second and fires any tasks whose ``next_run_at`` has passed.
 Public API
 ----------
 add_task(name, tool, args, interval_seconds, enabled=True)  -> dict
+add_tasks_bulk(specs)                                        -> list[dict]
 list_tasks()                                                 -> list[dict]
 get_task(task_id)                                            -> dict | None
 delete_task(task_id)                                         -> bool
@@ -96,35 +97,55 @@ def add_task(
 
     Raises ``ValueError`` if *interval_seconds* is < 1 or *name* is empty.
     """
-    if not name or not name.strip():
-        raise ValueError('name must not be empty')
-    if interval_seconds < 1:
-        raise ValueError('interval_seconds must be >= 1')
-    if not tool or not tool.strip():
-        raise ValueError('tool must not be empty')
+    return add_tasks_bulk([{
+        'name': name, 'tool': tool, 'args': args,
+        'interval_seconds': interval_seconds, 'enabled': enabled,
+    }])[0]
+
+
+def add_tasks_bulk(specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Create several tasks with a single write of the schedule file.
+
+    Each spec holds :func:`add_task`'s keyword arguments (``enabled``
+    optional).  Every spec is validated before anything is stored, so a
+    ``ValueError`` leaves the schedule untouched.
+    """
+    for spec in specs:
+        name, tool = spec.get('name'), spec.get('tool')
+        if not name or not name.strip():
+            raise ValueError('name must not be empty')
+        if spec.get('interval_seconds', 0) < 1:
+            raise ValueError('interval_seconds must be >= 1')
+        if not tool or not tool.strip():
+            raise ValueError('tool must not be empty')
 
     with _lock:
         _load()
-        task_id = secrets.token_hex(8)
         now = time.time()
-        task: Dict[str, Any] = {
-            'id': task_id,
-            'name': name,
-            'tool': tool,
-            'args': args if args is not None else {},
-            'interval_seconds': interval_seconds,
-            'enabled': bool(enabled),
-            'created_at': _now_iso(),
-            'last_run_at': None,
-            'next_run_at': now + interval_seconds,  # unix timestamp
-            'run_count': 0,
-            'last_result': None,
-            'last_error': None,
-        }
-        _tasks[task_id] = task
-        _save()
+        created = []
+        for spec in specs:
+            task_id = secrets.token_hex(8)
+            interval_seconds = spec['interval_seconds']
+            task: Dict[str, Any] = {
+                'id': task_id,
+                'name': spec['name'],
+                'tool': spec['tool'],
+                'args': spec.get('args') if spec.get('args') is not None else {},
+                'interval_seconds': interval_seconds,
+                'enabled': bool(spec.get('enabled', True)),
+                'created_at': _now_iso(),
+                'last_run_at': None,
+                'next_run_at': now + interval_seconds,  # unix timestamp
+                'run_count': 0,
+                'last_result': None,
+                'last_error': None,
+            }
+            _tasks[task_id] = task
+            created.append(_task_view(task))
+        if created:
+            _save()
         _metrics.gauge('scheduler_tasks_total', len(_tasks))
-        return _task_view(task)
+        return created
 
 
 def list_tasks() -> List[Dict[str, Any]]:
@@ -0,0 +1,54 @@
+"""Tests for a2a.py — task dispatch and completion signalling.
+
+Covers:
+  - submit() runs the target persona's tool loop on a worker thread
+  - wait_for(): returns as soon as the task finishes, times out otherwise
+"""
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+import a2a
+
+
+@pytest.fixture()
+def loop_gate(tmp_path, monkeypatch):
+    """Stub the provider + tool loop; the loop blocks until the gate is set."""
+    import providers.adapters as adapters
+    import workspace_manager
+    from tools import tool_runner
+
+    gate = threading.Event()
+
+    def fake_loop(adapter, messages, **kwargs):
+        gate.wait(5)
+        return {'content': f'handled: {messages[-1]["content"]}'}
+
+    monkeypatch.setattr(a2a, '_TASKS_FILE', tmp_path / 'a2a_tasks.jsonl')
+    monkeypatch.setattr(adapters, 'available_providers', lambda: ['fake'])
+    monkeypatch.setattr(adapters, 'get_adapter', lambda name: object())
+    # a2a expects workspace_manager.load_agents_md, which the module lacks
+    monkeypatch.setattr(workspace_manager, 'load_agents_md', lambda: '', raising=False)
+    monkeypatch.setattr(tool_runner, 'run_tool_loop', fake_loop)
+    yield gate
+    gate.set()
+
+
+class TestWaitFor:
+    def test_returns_finished_record(self, loop_gate):
+        rec = a2a.submit('me', 'researcher', 'find it')
+        loop_gate.set()
+        done = a2a.wait_for(rec['id'], timeout=5)
+        assert done['status'] == 'done'
+        assert done['result'] == 'handled: find it'
+
+    def test_times_out_while_running(self, loop_gate):
+        rec = a2a.submit('me', 'researcher', 'slow task')
+        assert a2a.wait_for(rec['id'], timeout=0.05)['status'] in ('pending', 'running')
+        loop_gate.set()
+        assert a2a.wait_for(rec['id'], timeout=5)['status'] == 'done'
+
+    def test_unknown_task(self):
+        assert a2a.wait_for('no-such-task', timeout=0) is None
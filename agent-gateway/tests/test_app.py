@@ -32,3 +32,20 @@ def test_tool_call_stub():
     body = r.json()
     assert body.get("status") == "stubbed"
     assert body.get("tool") == "summarize"
+
+
+def test_mcp_tools_lists_prefixed_registry_entries(monkeypatch):
+    import asyncio
+    import app as app_module
+    from tools import tool_runner
+
+    monkeypatch.setattr(app_module, '_require_bearer', lambda request: None)
+    monkeypatch.setattr(app_module._mcp, 'list_servers', lambda: [{'name': 'fs'}])
+    tool_runner.register_tool('fs__read_file', lambda path: '', 'Read a file.', {})
+    tool_runner.register_tool('other__tool', lambda: '', 'Not from a server.', {})
+    try:
+        body = asyncio.run(app_module.mcp_list_tools())
+    finally:
+        tool_runner._REGISTRY.pop('fs__read_file', None)
+        tool_runner._REGISTRY.pop('other__tool', None)
+    assert body == {'tools': [{'name': 'fs__read_file', 'description': 'Read a file.'}], 'count': 1}
@@ -0,0 +1,117 @@
+"""Tests for failover.py — provider failover for streamed replies.
+
+Covers:
+  - stream_with_failover: chunks streamed from the primary, failover to the
+    next provider before any text, errors after the first chunk raised,
+    non-streaming chain members yield one chunk
+  - FailoverAdapter: advertises streaming, stashes failover metadata
+"""
+from __future__ import annotations
+
+import pytest
+
+import failover
+
+
+class _Adapter:
+    supports_streaming = True
+
+    def __init__(self, chunks=(), error=None, error_after=None):
+        self.chunks = list(chunks)
+        self.error = error
+        self.error_after = error_after
+
+    def is_available(self):
+        return True
+
+    def stream_chat_complete(self, messages, **kwargs):
+        if self.error and self.error_after is None:
+            raise RuntimeError(self.error)
+        for i, chunk in enumerate(self.chunks):
+            if self.error and i == self.error_after:
+                raise RuntimeError(self.error)
+            yield chunk
+        return {'content': ''.join(self.chunks), 'model': kwargs.get('model', '')}
+
+    def chat_complete(self, messages, **kwargs):
+        return {'content': ''.join(self.chunks), 'model': kwargs.get('model', '')}
+
+
+class _PlainAdapter(_Adapter):
+    supports_streaming = False
+
+
+@pytest.fixture()
+def providers(monkeypatch):
+    """Register fake adapters by name; the chain is primary → 'backup'."""
+    import providers.adapters as adapters
+    registry: dict = {}
+    monkeypatch.setattr(adapters, 'get_adapter', lambda name: registry[name])
+    monkeypatch.setattr(failover, '_chain', [('backup', 'backup-model')])
+    monkeypatch.setattr(failover, '_cooldowns', {})
+    return registry
+
+
+def _drain(gen):
+    chunks = []
+    while True:
+        try:
+            chunks.append(next(gen))
+        except StopIteration as stop:
+            return chunks, stop.value
+
+
+class TestStreamWithFailover:
+    def test_primary_streams(self, providers):
+        providers['main'] = _Adapter(['Hel', 'lo'])
+        chunks, result = _drain(failover.stream_with_failover('main', 'm1', []))
+        assert chunks == ['Hel', 'lo']
+        assert result['content'] == 'Hello'
+        assert (result['failover_used'], result['actual_provider']) == (False, 'main')
+
+    def test_fails_over_before_first_chunk(self, providers):
+        providers['main'] = _Adapter(error='HTTP 429 rate limit')
+        providers['backup'] = _Adapter(['from backup'])
+        chunks, result = _drain(failover.stream_with_failover('main', 'm1', []))
+        assert chunks == ['from backup']
+        assert result['failover_used'] and result['actual_provider'] == 'backup'
+        assert result['actual_model'] == 'backup-model'
+        assert failover._is_on_cooldown('main')
+
+    def test_error_mid_reply_raised(self, providers):
+        providers['main'] = _Adapter(['partial', 'more'], error='503 service unavailable', error_after=1)
+        providers['backup'] = _Adapter(['unused'])
+        gen = failover.stream_with_failover('main', 'm1', [])
+        assert next(gen) == 'partial'
+        with pytest.raises(RuntimeError, match='503'):
+            next(gen)
+
+    def test_non_streaming_member_yields_whole_reply(self, providers):
+        providers['main'] = _Adapter(error='timeout')
+        providers['backup'] = _PlainAdapter(['all at once'])
+        chunks, result = _drain(failover.stream_with_failover('main', None, []))
+        assert chunks == ['all at once'] and result['actual_provider'] == 'backup'
+
+    def test_non_retriable_primary_error_raised(self, providers):
+        providers['main'] = _Adapter(error='invalid api key')
+        providers['backup'] = _Adapter(['unused'])
+        with pytest.raises(RuntimeError, match='invalid api key'):
+            _drain(failover.stream_with_failover('main', None, []))
+
+
+class TestFailoverAdapter:
+    def test_streams_and_stashes_meta(self, providers):
+        providers['main'] = _Adapter(error='500 internal server error')
+        providers['backup'] = _Adapter(['ok'])
+        adapter = failover.FailoverAdapter('main', 'm1')
+        assert adapter.supports_streaming is True
+        chunks, result = _drain(adapter.stream_chat_complete([], temperature=0.1))
+        assert chunks == ['ok']
+        assert adapter.last_result_meta['failover_used'] is True
+        assert adapter.last_result_meta['actual_provider'] == 'backup'
+
+    def test_drives_the_tool_loop_streaming(self, providers):
+        from tools import tool_runner
+        providers['main'] = _Adapter(['plain answer'])
+        result = tool_runner.run_tool_loop(failover.FailoverAdapter('main'), [])
+        assert result['content'] == 'plain answer'
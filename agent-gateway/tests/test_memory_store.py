@@ -0,0 +1,106 @@
+"""Tests for memory_store.py using the keyword fallback backend.
+
+Covers:
+  - _KeywordBackend: indexed search, overwrite and delete keep the index in sync
+  - MemoryStore.search_batch: one result list per query, in order
+  - _EmbeddingCache: LRU hits, model-scoped keys, eviction
+  - one embedding function shared by every store in the process
+"""
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+import memory_store
+
+
+@pytest.fixture()
+def store():
+    """MemoryStore wired to the keyword backend (no ChromaDB on disk)."""
+    s = memory_store.MemoryStore.__new__(memory_store.MemoryStore)
+    s._lock = threading.Lock()
+    s._backend = memory_store._KeywordBackend()
+    s.backend_name = 'keyword'
+    return s
+
+
+class TestKeywordBackend:
+    def test_search_ranks_matching_docs(self):
+        kb = memory_store._KeywordBackend()
+        kb.add('a', 'rust is fast and rust is safe', {})
+        kb.add('b', 'python is friendly', {})
+        kb.add('c', 'rust appears once here among many other words', {})
+        hits = kb.search('rust', n=5)
+        assert [h['id'] for h in hits] == ['a', 'c']
+
+    def test_no_overlap_returns_nothing(self):
+        kb = memory_store._KeywordBackend()
+        kb.add('a', 'hello world', {})
+        assert kb.search('zebra', n=5) == []
+
+    def test_overwrite_reindexes(self):
+        kb = memory_store._KeywordBackend()
+        kb.add('a', 'old words', {})
+        kb.add('a', 'new words', {})
+        assert kb.search('old', n=5) == []
+        assert [h['id'] for h in kb.search('new', n=5)] == ['a']
+
+    def test_delete_removes_from_index(self):
+        kb = memory_store._KeywordBackend()
+        kb.add('a', 'hello world', {})
+        assert kb.delete('a') is True
+        assert kb.search('hello', n=5) == []
+        assert kb.delete('a') is False
+
+
+class TestSearchBatch:
+    def test_one_result_list_per_query(self, store):
+        store.add('rust is fast', pinned=True)
+        store.add('python is slow', pinned=True)
+        batches = store.search_batch(['rust', 'python', 'zebra'], n=2)
+        assert [[r['text'] for r in b] for b in batches] == [
+            ['rust is fast'], ['python is slow'], [],
+        ]
+
+    def test_empty_queries(self, store):
+        assert store.search_batch([]) == []
+
+
+class TestEmbeddingCache:
+    def test_hits_skip_the_encoder(self):
+        cache = memory_store._EmbeddingCache(maxsize=8)
+        seen = []
+
+        def embed(texts):
+            seen.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        assert cache.get_many(['ab', 'abc', 'ab'], 'm', embed) == [[2.0], [3.0], [2.0]]
+        assert cache.get_many(['abc'], 'm', embed) == [[3.0]]
+        assert seen == [['ab', 'abc']]
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+    def test_model_is_part_of_the_key(self):
+        cache = memory_store._EmbeddingCache()
+        cache.get_many(['q'], 'm1', lambda t: [[1.0]])
+        assert cache.get_many(['q'], 'm2', lambda t: [[2.0]]) == [[2.0]]
+
+    def test_lru_eviction(self):
+        cache = memory_store._EmbeddingCache(maxsize=2)
+        embed = lambda texts: [[0.0] for _ in texts]
+        cache.get_many(['a', 'b'], 'm', embed)
+        cache.get_many(['a'], 'm', embed)       # refresh a
+        cache.get_many(['c'], 'm', embed)       # evicts b
+        assert cache.stats()['size'] == 2
+        misses = cache.stats()['misses']
+        cache.get_many(['a'], 'm', embed)
+        assert cache.stats()['misses'] == misses
+
+    def test_keyword_store_has_no_embedding_cache(self, store):
+        assert store.stats()['embedding_cache'] is None
+
+
+def test_embedding_function_is_shared():
+    pytest.importorskip('chromadb')
+    assert memory_store._shared_embedding_function() is memory_store._shared_embedding_function()
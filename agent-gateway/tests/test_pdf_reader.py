@@ -0,0 +1,65 @@
+"""Tests for tools/pdf_reader.py — download limits.
+
+Covers:
+  - _fetch_bytes: streamed body, early rejection from Content-Length,
+    abort once the byte cap is exceeded mid-stream
+  - pdf_read wrapper: max_pages clamped before the reader is called
+"""
+from __future__ import annotations
+
+import contextlib
+
+import httpx
+import pytest
+
+from tools import pdf_reader, tool_runner
+
+
+def _fake_stream(monkeypatch, chunks, headers=None):
+    """Serve *chunks* from httpx.stream and record how many were consumed."""
+    consumed = []
+
+    class _Response:
+        def __init__(self):
+            self.headers = headers or {}
+
+        def raise_for_status(self):
+            pass
+
+        def iter_bytes(self):
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+    @contextlib.contextmanager
+    def stream(method, url, **kwargs):
+        yield _Response()
+
+    monkeypatch.setattr(httpx, 'stream', stream)
+    return consumed
+
+
+class TestFetchBytes:
+    def test_returns_whole_body(self, monkeypatch):
+        _fake_stream(monkeypatch, [b'%PDF', b'-1.7'])
+        assert pdf_reader._fetch_bytes('https://x/a.pdf') == b'%PDF-1.7'
+
+    def test_declared_length_rejected_before_download(self, monkeypatch):
+        consumed = _fake_stream(monkeypatch, [b'x' * 10], headers={'Content-Length': '11'})
+        with pytest.raises(ValueError, match='too large'):
+            pdf_reader._fetch_bytes('https://x/a.pdf', max_bytes=10)
+        assert consumed == []
+
+    def test_stream_aborts_past_the_cap(self, monkeypatch):
+        consumed = _fake_stream(monkeypatch, [b'x' * 6] * 100)
+        with pytest.raises(ValueError, match='too large'):
+            pdf_reader._fetch_bytes('https://x/a.pdf', max_bytes=10)
+        assert len(consumed) == 2
+
+
+def test_max_pages_clamped_in_wrapper(monkeypatch):
+    seen = []
+    monkeypatch.setattr(pdf_reader, 'pdf_read', lambda **kw: seen.append(kw['max_pages']) or 'ok')
+    for requested in (100000, 0, 'lots'):
+        tool_runner._pdf_read_fn(url='https://x/a.pdf', max_pages=requested)
+    assert seen == [50, 1, 20]
@@ -3,6 +3,7 @@
 Covers:
   Module API (unit tests):
     add_task()       — validation, shape, persistence
+    add_tasks_bulk() — all-or-nothing validation, one write
     list_tasks()     — empty and populated
     get_task()       — found / missing
     delete_task()    — found / missing
@@ -126,6 +127,29 @@ class TestAddTask:
         assert (tmp_path / 'schedule.json').exists()
 
 
+class TestAddTasksBulk:
+    def test_adds_all_in_order(self, sched, tmp_path):
+        created = sched.add_tasks_bulk([
+            {'name': 'a', 'tool': 'echo', 'args': {'x': 1}, 'interval_seconds': 10},
+            {'name': 'b', 'tool': 'echo', 'interval_seconds': 20, 'enabled': False},
+        ])
+        assert [(t['name'], t['enabled']) for t in created] == [('a', True), ('b', False)]
+        assert created[1]['args'] == {}
+        assert len(sched.list_tasks()) == 2
+        assert (tmp_path / 'schedule.json').exists()
+
+    def test_invalid_spec_adds_nothing(self, sched):
+        with pytest.raises(ValueError, match='interval_seconds'):
+            sched.add_tasks_bulk([
+                {'name': 'a', 'tool': 'echo', 'interval_seconds': 10},
+                {'name': 'b', 'tool': 'echo', 'interval_seconds': 0},
+            ])
+        assert sched.list_tasks() == []
+
+    def test_empty(self, sched):
+        assert sched.add_tasks_bulk([]) == []
+
+
 # ===========================================================================
 # list_tasks() — unit tests
 # ===========================================================================
@@ -0,0 +1,969 @@
+"""Tests for tools/tool_runner.py — TOOL_CALL parsing, dispatch and the tool loop.
+
+Covers:
+  - _extract_tool_calls: nested args, trailing prose, multiple calls,
+    braces inside strings, truncated-stream repair, anchor case handling
+  - _strip_tool_call_lines: same output as the MULTILINE regex, linear time
+  - registration: catalog entry and arg-binding plan built once per spec
+  - build_tool_system_block / list_tools: caches invalidated on registry mutation
+    and AGENT_TOOLS.md edits
+  - run_tool_loop: per-round dedup of identical calls, batched memory_search,
+    bulk-persisted schedule_task calls,
+    concurrent dispatch of independent calls on the shared pool,
+    concurrency limit from INTELLI_TOOL_CONCURRENCY / TOOL_CONCURRENCY_LIMIT
+  - get_session: one pooled HTTP session for every tool, cookies never kept
+  - _lazy: gateway modules imported once
+  - _run_tool errors: one line unless verbose tracebacks are enabled,
+    full trace logged at ERROR
+  - _ToolResultCache: reuse for tools registered pure, generation-based
+    invalidation by registered side-effecting tools and by skill/notes store
+    writes (agent tools and API endpoints alike), TTL/LRU,
+    call keys serialized once per round, concurrent identical calls coalesced
+  - fuzzy memory_search reuse: rewording, TTL and store-version invalidation
+  - list results: numbered title / URL / snippet layout
+  - memory_search results: one-line snippets capped at 300 chars
+  - skill_created SSE event: dropped rather than blocking on a full queue
+  - _json_dumps_pretty: orjson output matches the stdlib encoder
+  - _ToolCallStream / streaming adapters: calls parsed while the reply streams,
+    independent pure calls started before the stream ends and cancelled if
+    it fails, token usage kept
+"""
+from __future__ import annotations
+
+import re
+import sys
+import threading
+import time
+
+import pytest
+
+from tools import tool_runner
+
+
+class _FakeAdapter:
+    """Adapter returning canned responses and recording the messages it saw."""
+
+    def __init__(self, *responses: str):
+        self._responses = list(responses)
+        self.calls: list[list[dict]] = []
+
+    def chat_complete(self, messages, **kwargs):
+        self.calls.append(list(messages))
+        return {'content': self._responses.pop(0)}
+
+
+class _FakeStreamingAdapter(_FakeAdapter):
+    """Streams each canned response in small chunks."""
+
+    supports_streaming = True
+
+    def __init__(self, *responses: str, chunk: int = 5):
+        super().__init__(*responses)
+        self._chunk = chunk
+
+    def chat_complete(self, messages, **kwargs):  # pragma: no cover - must not be used
+        raise AssertionError('streaming adapter should be streamed')
+
+    def stream_chat_complete(self, messages, **kwargs):
+        self.calls.append(list(messages))
+        text = self._responses.pop(0)
+        for i in range(0, len(text), self._chunk):
+            yield text[i:i + self._chunk]
+        return {'content': text, 'model': 'fake'}
+
+
+@pytest.fixture()
+def temp_tool():
+    """Register a throwaway tool and remove it again after the test."""
+    name = '_test_tool'
+    tool_runner.register_tool(
+        name, lambda text='': f'echo:{text}', 'Test-only echo tool.',
+        {'text': {'type': 'string', 'required': False, 'description': 'Text to echo'}},
+    )
+    yield name
+    tool_runner._REGISTRY.pop(name, None)
+
+
+# ===========================================================================
+# _extract_tool_calls
+# ===========================================================================
+
+class TestExtractToolCalls:
+    def test_single_call(self):
+        text = 'Let me check.\nTOOL_CALL: {"name": "web_search", "args": {"query": "rust"}}'
+        assert tool_runner._extract_tool_calls(text) == [
+            {'name': 'web_search', 'args': {'query': 'rust'}},
+        ]
+
+    def test_nested_args_and_trailing_prose(self):
+        text = 'TOOL_CALL: {"name": "x", "args": {"a": {"b": 1}}} and then some words }'
+        assert tool_runner._extract_tool_calls(text) == [
+            {'name': 'x', 'args': {'a': {'b': 1}}},
+        ]
+
+    def test_braces_inside_strings(self):
+        text = 'TOOL_CALL: {"name": "browser_eval", "args": {"code_js": "if(a){b()} \\"}\\""}}'
+        calls = tool_runner._extract_tool_calls(text)
+        assert calls[0]['args']['code_js'] == 'if(a){b()} "}"'
+
+    def test_multiple_calls(self):
+        text = (
+            'TOOL_CALL: {"name": "a", "args": {}}\n'
+            'tool_call: {"tool": "b", "args": {"n": 2}}'
+        )
+        calls = tool_runner._extract_tool_calls(text)
+        assert [c.get('name') or c.get('tool') for c in calls] == ['a', 'b']
+
+    def test_anchor_needs_tool_prefix(self):
+        text = (
+            'MY_CALL: {"name": "no"} _call: {"name": "no"}\n'
+            'Tool_Call : {"name": "yes"} tool_CALL:{"name": "also"}'
+        )
+        assert tool_runner._extract_tool_calls(text) == [{'name': 'yes'}, {'name': 'also'}]
+
+    def test_malformed_json_is_skipped(self):
+        text = 'TOOL_CALL: {"name": "a", "args": {oops}}\nTOOL_CALL: {"name": "b"}'
+        assert tool_runner._extract_tool_calls(text) == [{'name': 'b'}]
+
+    def test_non_call_objects_ignored(self):
+        assert tool_runner._extract_tool_calls('TOOL_CALL: {"foo": 1}') == []
+
+    def test_truncated_call_is_repaired(self):
+        text = 'TOOL_CALL: {"name": "memory_search", "args": {"query": "rust"'
+        assert tool_runner._extract_tool_calls(text) == [
+            {'name': 'memory_search', 'args': {'query': 'rust'}},
+        ]
+
+    def test_truncated_with_escapes_and_braces_in_strings(self):
+        text = 'TOOL_CALL: {"name": "x", "args": {"s": "a\\\\", "t": "{\\"}\\"}"'
+        assert tool_runner._extract_tool_calls(text) == [
+            {'name': 'x', 'args': {'s': 'a\\', 't': '{"}"}'}},
+        ]
+
+    def test_repair_ignores_balanced_garbage(self):
+        assert tool_runner._repair_truncated('{"a": {oops}}') is None
+
+    def test_truncated_inside_string_is_dropped(self):
+        text = 'TOOL_CALL: {"name": "file_write", "args": {"content": "half'
+        assert tool_runner._extract_tool_calls(text) == []
+
+
+class TestStripToolCallLines:
+    # The single-pass stripper must match this (quadratic) substitution
+    _REGEX = re.compile(r'^\s*TOOL_CALL\s*:.*$', re.MULTILINE | re.IGNORECASE)
+
+    @pytest.mark.parametrize('text', [
+        'Answer.\nTOOL_CALL: {"name": "a"}\nMore.',
+        'Answer.\n\n  \n  tool_call : {"name": "a"}\n\nTOOL_CALL: x',
+        'TOOL_CALL: a\nTOOL_CALL: b',
+        'inline TOOL_CALL: {"name": "a"} stays',
+        'TOOL_CALLS are mentioned\n\t\nend',
+        'no markers at all\n\n',
+    ])
+    def test_matches_multiline_regex(self, text):
+        assert tool_runner._strip_tool_call_lines(text) == self._REGEX.sub('', text)
+
+    def test_blank_padding_is_linear(self):
+        text = '\n' * 200_000 + 'Done.\nTOOL_CALL: {}'
+        start = time.perf_counter()
+        assert tool_runner._strip_tool_call_lines(text).strip() == 'Done.'
+        assert time.perf_counter() - start < 1.0
+
+
+# ===========================================================================
+# build_tool_system_block
+# ===========================================================================
+
+class TestToolSystemBlock:
+    def test_registry_mutations_bump_version(self):
+        v0 = tool_runner._REGISTRY.version
+        tool_runner._REGISTRY['_tmp'] = {'fn': None, 'description': '', 'args': {}}
+        del tool_runner._REGISTRY['_tmp']
+        assert tool_runner._REGISTRY.version == v0 + 2
+
+    def test_names_are_interned(self, monkeypatch):
+        name = ''.join(['_test', '_dynamic'])   # built at runtime: not interned
+        monkeypatch.setitem(tool_runner._REGISTRY, name, {'fn': lambda: 'ok', 'description': '', 'args': {}})
+        assert next(k for k in tool_runner._REGISTRY if k == name) is sys.intern(name)
+        assert tool_runner._run_tool(''.join(['_test', '_dynamic']), {}) == 'ok'
+
+    def test_parsed_call_names_are_interned(self):
+        name = ''.join(['file', '_write'])
+        assert tool_runner._call_name({'name': name}) is sys.intern('file_write')
+        assert tool_runner._call_name({'tool': 'x', 'name': 'y'}) == 'x'
+        assert tool_runner._call_name({'name': 3}) == 3
+
+    def test_unknown_or_malformed_name(self):
+        assert tool_runner._run_tool('nope', {}).startswith("[ERROR] Unknown tool: 'nope'")
+        assert tool_runner._run_tool(['x'], {}).startswith("[ERROR] Unknown tool: ['x']")
+
+    def test_unknown_tool_lists_current_names(self, temp_tool):
+        first = tool_runner._run_tool('nope', {})
+        assert first.endswith(f'Available: {list(tool_runner._REGISTRY)!r}')
+        assert tool_runner._registry_names_str() is tool_runner._registry_names_str()
+        tool_runner._REGISTRY.pop(temp_tool)
+        assert repr(temp_tool) not in tool_runner._run_tool('nope', {})
+
+    def test_entry_rendered_on_registration(self, temp_tool):
+        block = tool_runner._REGISTRY[temp_tool]['_block']
+        assert block == (
+            f'• {temp_tool}\n  Description: Test-only echo tool.\n  Args:\n'
+            "    'text': string (optional) — Text to echo"
+        )
+        tool_runner.register_tool(temp_tool, lambda: '', 'Changed.', {})
+        assert tool_runner._REGISTRY[temp_tool]['_block'].endswith('Changed.\n  Args:\n    (none)')
+
+    def test_arg_plan_built_on_registration(self, temp_tool, monkeypatch):
+        assert tool_runner._REGISTRY[temp_tool]['_arg_plan'] == (('text', False, False),)
+        tool_runner.register_tool(temp_tool, lambda n, label='': f'{n!r} {label}', 'Counts.', {
+            'n':     {'type': 'integer', 'description': 'A number'},
+            'label': {'type': 'string', 'required': False, 'description': 'A label'},
+        })
+        monkeypatch.setattr(tool_runner, '_arg_plan', lambda spec: pytest.fail('plan rebuilt'))
+        assert tool_runner._run_tool(temp_tool, {'n': '3', 'label': 'x', 'extra': 1}) == '3 x'
+        assert tool_runner._run_tool(temp_tool, {}) == (
+            f"[ERROR] Missing required arg 'n' for tool {temp_tool!r}"
+        )
+
+    def test_missing_entry_rendered_once(self, temp_tool):
+        del tool_runner._REGISTRY[temp_tool]['_block']
+        tool_runner._REGISTRY.version += 1
+        assert f'• {temp_tool}\n' in tool_runner._render_tools_block(frozenset())
+        assert tool_runner._REGISTRY[temp_tool]['_block'].startswith(f'• {temp_tool}\n')
+
+    def test_block_is_cached_between_calls(self):
+        first = tool_runner._render_tools_block(frozenset())
+        assert tool_runner._render_tools_block(frozenset()) is first
+
+    def test_agent_tools_md_change_invalidates_block(self, tmp_path, monkeypatch):
+        md = tmp_path / 'AGENT_TOOLS.md'
+        monkeypatch.setattr(tool_runner, '_AGENT_TOOLS_MD', str(md))
+        monkeypatch.setattr(tool_runner, '_SYS_BLOCK_CACHE', {})
+        without = tool_runner.build_tool_system_block()
+        assert without.startswith('## Available Tools')
+        assert tool_runner.build_tool_system_block() is without
+        md.write_text('# House rules\n', encoding='utf-8')
+        assert tool_runner.build_tool_system_block().startswith('# House rules\n\n## Available Tools')
+
+    def test_each_exclusion_set_rendered_once(self, monkeypatch):
+        renders = []
+        real_render = tool_runner._render_system_block
+        monkeypatch.setattr(tool_runner, '_SYS_BLOCK_CACHE', {})
+        monkeypatch.setattr(tool_runner, '_render_system_block',
+                            lambda exclude: renders.append(exclude) or real_render(exclude))
+        for _ in range(3):  # parent turn + two nested sub-agents, repeatedly
+            tool_runner.build_tool_system_block()
+            tool_runner.build_tool_system_block(exclude=tool_runner._SUBAGENT_EXCLUDE)
+            tool_runner.build_tool_system_block(exclude=frozenset({'spawn_agent'}))
+        assert renders == [frozenset(), tool_runner._SUBAGENT_EXCLUDE]
+
+    def test_agent_tools_md_read_only_when_changed(self, tmp_path, monkeypatch):
+        md = tmp_path / 'AGENT_TOOLS.md'
+        md.write_text('v1', encoding='utf-8')
+        monkeypatch.setattr(tool_runner, '_AGENT_TOOLS_MD', str(md))
+        monkeypatch.setattr(tool_runner, '_MD_CACHE', None)
+        assert tool_runner.agent_tools_md() == 'v1'
+        first = tool_runner.agent_tools_md()
+        assert tool_runner.agent_tools_md() is first
+        md.write_text('v22', encoding='utf-8')       # size changes even if mtime doesn't
+        assert tool_runner.agent_tools_md() == 'v22'
+        md.unlink()
+        assert tool_runner.agent_tools_md() == ''
+
+    def test_register_tool_invalidates_block(self, temp_tool):
+        assert f'• {temp_tool}\n' in tool_runner.build_tool_system_block()
+        tool_runner._REGISTRY.pop(temp_tool)
+        assert f'• {temp_tool}\n' not in tool_runner.build_tool_system_block()
+
+    def test_list_tools_snapshot(self, temp_tool):
+        first = tool_runner.list_tools()
+        assert tool_runner.list_tools() is first
+        assert {'name': temp_tool, 'description': 'Test-only echo tool.',
+                'args': tool_runner._REGISTRY[temp_tool]['args']} in first
+        tool_runner._REGISTRY.pop(temp_tool)
+        assert temp_tool not in [t['name'] for t in tool_runner.list_tools()]
+
+    def test_subagent_block_excludes_spawn_agent(self):
+        sub = tool_runner.build_tool_system_block(exclude=tool_runner._SUBAGENT_EXCLUDE)
+        assert '• spawn_agent\n' not in sub
+        assert tool_runner.build_tool_system_block(exclude={'spawn_agent'}) is sub
+        assert '• spawn_agent\n' in tool_runner.build_tool_system_block()
+        assert 'spawn_agent' in tool_runner._REGISTRY
+
+
+# ===========================================================================
+# run_tool_loop
+# ===========================================================================
+
+class TestRunToolLoop:
+    def test_returns_plain_answer(self):
+        adapter = _FakeAdapter('Just an answer.')
+        assert tool_runner.run_tool_loop(adapter, [])['content'] == 'Just an answer.'
+
+    def test_tool_result_fed_back(self, temp_tool):
+        adapter = _FakeAdapter(
+            f'TOOL_CALL: {{"name": "{temp_tool}", "args": {{"text": "hi"}}}}',
+            'Done.',
+        )
+        result = tool_runner.run_tool_loop(adapter, [{'role': 'user', 'content': 'go'}])
+        assert result['content'] == 'Done.'
+        assert adapter.calls[1][-1]['content'] == f'TOOL_RESULT [{temp_tool}]:\necho:hi'
+
+    def test_identical_calls_run_once(self, temp_tool, monkeypatch):
+        runs = []
+        monkeypatch.setitem(tool_runner._REGISTRY[temp_tool], 'fn',
+                            lambda text='': runs.append(text) or f'echo:{text}')
+        call = f'TOOL_CALL: {{"name": "{temp_tool}", "args": {{"text": "hi"}}}}'
+        seen = []
+        adapter = _FakeAdapter(f'{call}\n{call}', 'Done.')
+        tool_runner.run_tool_loop(adapter, [], on_tool_result=lambda n, r: seen.append(r))
+        assert runs == ['hi']
+        assert seen == ['echo:hi', 'echo:hi']
+        assert adapter.calls[1][-1]['content'].count('echo:hi') == 2
+
+    def test_memory_searches_are_batched(self, monkeypatch):
+        batches = []
+
+        def fake_batch(queries, n=4):
+            batches.append((list(queries), n))
+            return [f'hits for {q}' for q in queries]
+
+        monkeypatch.setattr(tool_runner, '_memory_search_batch', fake_batch)
+        adapter = _FakeAdapter(
+            'TOOL_CALL: {"name": "memory_search", "args": {"query": "a"}}\n'
+            'TOOL_CALL: {"name": "memory_search", "args": {"query": "b"}}\n'
+            'TOOL_CALL: {"name": "memory_search", "args": {"query": "a"}}',
+            'Done.',
+        )
+        tool_runner.run_tool_loop(adapter, [])
+        assert batches == [(['a', 'b'], 4)]
+        fed_back = adapter.calls[1][-1]['content']
+        assert fed_back.count('hits for a') == 2 and 'hits for b' in fed_back
+
+    def test_schedule_tasks_saved_in_one_write(self, tmp_path, monkeypatch):
+        import scheduler
+        monkeypatch.setattr(scheduler, 'SCHEDULE_PATH', tmp_path / 'schedule.json')
+        monkeypatch.setattr(scheduler, '_tasks', {})
+        monkeypatch.setattr(scheduler, '_loaded', True)
+        saves = []
+        real_save = scheduler._save
+        monkeypatch.setattr(scheduler, '_save', lambda: (saves.append(1), real_save()))
+        adapter = _FakeAdapter(
+            'TOOL_CALL: {"name": "schedule_task", "args": {"name": "a", "tool": "web_search", "interval_seconds": "60"}}\n'
+            'TOOL_CALL: {"name": "schedule_task", "args": {"name": "b", "tool": "web_search"}}',
+            'Done.',
+        )
+        tool_runner.run_tool_loop(adapter, [])
+        assert len(saves) == 1
+        assert sorted(t['name'] for t in scheduler.list_tasks()) == ['a', 'b']
+        fed_back = adapter.calls[1][-1]['content']
+        assert "Scheduled task 'a' created" in fed_back and 'interval=60s' in fed_back
+        assert "Scheduled task 'b' created" in fed_back and 'interval=3600s' in fed_back
+
+    def test_invalid_schedule_task_falls_back_to_single_calls(self, tmp_path, monkeypatch):
+        import scheduler
+        monkeypatch.setattr(scheduler, 'SCHEDULE_PATH', tmp_path / 'schedule.json')
+        monkeypatch.setattr(scheduler, '_tasks', {})
+        monkeypatch.setattr(scheduler, '_loaded', True)
+        adapter = _FakeAdapter(
+            'TOOL_CALL: {"name": "schedule_task", "args": {"name": "ok", "tool": "web_search"}}\n'
+            'TOOL_CALL: {"name": "schedule_task", "args": {"name": "  ", "tool": "web_search"}}',
+            'Done.',
+        )
+        tool_runner.run_tool_loop(adapter, [])
+        assert [t['name'] for t in scheduler.list_tasks()] == ['ok']
+        assert '[ERROR] schedule_task: name must not be empty' in adapter.calls[1][-1]['content']
+
+    def test_independent_calls_run_concurrently(self, temp_tool, monkeypatch):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet(text=''):
+            barrier.wait()   # deadlocks (BrokenBarrierError) if run serially
+            return f'met:{text}'
+
+        monkeypatch.setitem(tool_runner._REGISTRY[temp_tool], 'fn', meet)
+        adapter = _FakeAdapter(
+            f'TOOL_CALL: {{"name": "{temp_tool}", "args": {{"text": "a"}}}}\n'
+            f'TOOL_CALL: {{"name": "{temp_tool}", "args": {{"text": "b"}}}}',
+            'Done.',
+        )
+        tool_runner.run_tool_loop(adapter, [])
+        fed_back = adapter.calls[1][-1]['content']
+        assert fed_back.index('met:a') < fed_back.index('met:b')
+
+    def test_concurrency_limit_one_runs_inline(self, temp_tool, monkeypatch):
+        threads = set()
+
+        def record(text=''):
+            threads.add(threading.current_thread())
+            return text
+
+        monkeypatch.setitem(tool_runner._REGISTRY[temp_tool], 'fn', record)
+        monkeypatch.setattr(tool_runner, '_MAX_PARALLEL_TOOLS', 1)
+        adapter = _FakeAdapter(
+            f'TOOL_CALL: {{"name": "{temp_tool}", "args": {{"text": "a"}}}}\n'
+            f'TOOL_CALL: {{"name": "{temp_tool}", "args": {{"text": "b"}}}}',
+            'Done.',
+        )
+        tool_runner.run_tool_loop(adapter, [])
+        assert threads == {threading.current_thread()}
+
+    @pytest.mark.parametrize('env, expected', [
+        ({'TOOL_CONCURRENCY_LIMIT': '1'}, '1 True'),
+        ({'TOOL_CONCURRENCY_LIMIT': '1', 'INTELLI_TOOL_CONCURRENCY': '3'}, '3 False'),
+    ])
+    def test_concurrency_limit_from_env(self, env, expected):
+        import os
+        import subprocess
+        script = (
+            'import threading\n'
+            'from tools import tool_runner\n'
+            'threads = set()\n'
+            'tool_runner.register_tool("_t", lambda text="": threads.add(threading.current_thread()) or text,\n'
+            '                          "Test-only tool.", {"text": {"type": "string", "required": False}})\n'
+            'tool_runner._execute_round([("_t", {"text": "a"}), ("_t", {"text": "b"})])\n'
+            'print(tool_runner._MAX_PARALLEL_TOOLS, threads == {threading.current_thread()})\n'
+        )
+        clean = {k: v for k, v in os.environ.items()
+                 if k not in ('TOOL_CONCURRENCY_LIMIT', 'INTELLI_TOOL_CONCURRENCY')}
+        out = subprocess.run(
+            [sys.executable, '-c', script], env={**clean, **env}, capture_output=True,
+            text=True, timeout=60, cwd=os.path.dirname(os.path.dirname(tool_runner.__file__)),
+        )
+        assert out.stdout.strip().splitlines()[-1] == expected, out.stderr
+
+    def test_worker_threads_inherit_context(self, temp_tool, monkeypatch):
+        monkeypatch.setitem(tool_runner._REGISTRY[temp_tool], 'fn',
+                            lambda text='': f'{text}:{tool_runner._CTX.session_id}')
+        adapter = _FakeAdapter(
+            f'TOOL_CALL: {{"name": "{temp_tool}", "args": {{"text": "a"}}}}\n'
+            f'TOOL_CALL: {{"name": "{temp_tool}", "args": {{"text": "b"}}}}',
+            'Done.',
+        )
+        tool_runner.run_tool_loop(adapter, [], session_id='sess-1')
+        fed_back = adapter.calls[1][-1]['content']
+        assert 'a:sess-1' in fed_back and 'b:sess-1' in fed_back
+
+    def test_rounds_share_one_pool(self, temp_tool, monkeypatch):
+        threads = set()
+
+        def record(text=''):
+            threads.add(threading.current_thread().name)
+            return text
+
+        monkeypatch.setitem(tool_runner._REGISTRY[temp_tool], 'fn', record)
+        n = tool_runner._MAX_PARALLEL_TOOLS + 3
+        reply = '\n'.join(
+            f'TOOL_CALL: {{"name": "{temp_tool}", "args": {{"text": "r{i}"}}}}' for i in range(n)
+        )
+        adapter = _FakeAdapter(reply, reply.replace('"r', '"s'), 'Done.')
+        tool_runner.run_tool_loop(adapter, [])
+        assert all(t.startswith('tool') for t in threads)
+        fed_back = adapter.calls[2][-1]['content']
+        assert [fed_back.index(f'\ns{i}') for i in range(n)] == sorted(
+            fed_back.index(f'\ns{i}') for i in range(n))
+
+    def test_tool_error_is_one_line(self, temp_tool, monkeypatch, caplog):
+        def boom(text=''):
+            raise ValueError('bad input')
+
+        monkeypatch.setitem(tool_runner._REGISTRY[temp_tool], 'fn', boom)
+        with caplog.at_level('ERROR', logger=tool_runner.log.name):
+            assert tool_runner._run_tool(temp_tool, {}) == (
+                f"[ERROR] Tool {temp_tool!r} raised an exception: ValueError: bad input"
+            )
+        assert caplog.records[-1].exc_info[0] is ValueError
+        monkeypatch.setattr(tool_runner, '_VERBOSE_ERRORS', True)
+        assert 'Traceback' in tool_runner._run_tool(temp_tool, {})
+
+
+def test_lazy_import_is_memoized():
+    import memory_store
+    assert tool_runner._lazy('memory_store') is memory_store
+    with pytest.raises(ImportError):
+        tool_runner._lazy('_no_such_gateway_module')
+    assert tool_runner._lazy.cache_info().currsize >= 1
+
+
+def test_http_session_is_shared():
+    pytest.importorskip('requests')
+    from tools.web_tools import get_session
+    assert get_session() is get_session()
+
+
+def test_http_session_keeps_no_cookies(monkeypatch):
+    pytest.importorskip('requests')
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from tools import web_tools
+
+    seen = []
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen.append(self.headers.get('Cookie'))
+            self.send_response(200)
+            self.send_header('Set-Cookie', 'sid=user-a; Path=/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv('NO_PROXY', '*')
+    monkeypatch.setattr(web_tools, '_session', None)
+    try:
+        url = f'http://127.0.0.1:{server.server_port}/'
+        web_tools._get(url)
+        web_tools._get(url)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert seen == [None, None]
+
+
+# ===========================================================================
+# Tool-result cache
+# ===========================================================================
+
+class TestToolResultCache:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        monkeypatch.setattr(tool_runner, '_RESULT_CACHE', tool_runner._ToolResultCache())
+
+    def _count_calls(self, monkeypatch, tool, result):
+        calls = []
+
+        def fn(**kwargs):
+            calls.append(kwargs)
+            return result(len(calls)) if callable(result) else result
+
+        monkeypatch.setitem(tool_runner._REGISTRY[tool], 'fn', fn)
+        return calls
+
+    def test_identical_calls_reuse_result(self, monkeypatch):
+        calls = self._count_calls(monkeypatch, 'web_search', lambda k: f'result {k}')
+        assert tool_runner._run_tool('web_search', {'query': 'rust'}) == 'result 1'
+        assert tool_runner._run_tool('web_search', {'query': 'rust', 'max_results': '5'}) == 'result 2'
+        assert tool_runner._run_tool('web_search', {'query': 'rust'}) == 'result 1'
+        assert len(calls) == 2
+
+    def test_round_serializes_args_once_per_call(self, monkeypatch):
+        self._count_calls(monkeypatch, 'web_search', 'hits')
+        keyed = []
+        real_key = tool_runner._call_key
+        monkeypatch.setattr(tool_runner, '_call_key', lambda n, a: keyed.append(n) or real_key(n, a))
+        calls = [('web_search', {'query': 'rust'}), ('web_search', {'query': 'go'})]
+        assert tool_runner._execute_round(calls) == ['hits', 'hits']
+        assert keyed == ['web_search', 'web_search']
+        assert tool_runner._RESULT_CACHE.get((*real_key('web_search', {'query': 'go'}), ())) == 'hits'
+
+    def test_non_cacheable_tool_always_runs(self, temp_tool, monkeypatch):
+        calls = self._count_calls(monkeypatch, temp_tool, 'x')
+        tool_runner._run_tool(temp_tool, {})
+        tool_runner._run_tool(temp_tool, {})
+        assert len(calls) == 2
+
+    def test_errors_are_not_cached(self, monkeypatch):
+        calls = self._count_calls(monkeypatch, 'web_search', [{'error': 'rate limited', 'title': ''}])
+        tool_runner._run_tool('web_search', {'query': 'rust'})
+        tool_runner._run_tool('web_search', {'query': 'rust'})
+        assert len(calls) == 2
+
+    @pytest.fixture()
+    def stores(self, tmp_path, monkeypatch):
+        """Real workspace and notes stores rooted in *tmp_path*."""
+        import notes
+        import workspace_manager
+        monkeypatch.setattr(workspace_manager, '_WORKSPACE_ROOT', tmp_path / 'workspace')
+        monkeypatch.setattr(workspace_manager, '_seeded_root', None)
+        monkeypatch.setattr(workspace_manager, '_skill_meta_cache', {})
+        monkeypatch.setattr(notes, '_NOTES_DIR', tmp_path / 'notes')
+        return workspace_manager
+
+    def test_tool_writes_invalidate_dependent_reads(self, stores):
+        assert 'demo' not in tool_runner._run_tool('skill_list', {})
+        tool_runner._run_tool('skill_create', {'slug': 'demo', 'name': 'Demo', 'description': 'd', 'content': 'c'})
+        assert 'demo: Demo' in tool_runner._run_tool('skill_list', {})
+
+    def test_endpoint_writes_invalidate_tool_reads(self, stores, monkeypatch):
+        from starlette.testclient import TestClient
+        import app as app_mod
+        monkeypatch.setattr(app_mod, '_require_admin_token', lambda request: None)
+        monkeypatch.setattr(app_mod, '_require_bearer', lambda request: None)
+        monkeypatch.setattr(app_mod, '_audit', lambda *a, **k: None)
+        client = TestClient(app_mod.app)
+
+        assert 'demo' not in tool_runner._run_tool('skill_list', {})
+        assert client.post('/workspace/skills', json={
+            'slug': 'demo', 'name': 'Demo', 'description': 'd', 'content': 'v1'}).status_code == 200
+        assert 'demo: Demo' in tool_runner._run_tool('skill_list', {})
+        assert tool_runner._run_tool('skill_read', {'slug': 'demo'}).endswith('v1')
+        assert client.put('/workspace/skills/demo', json={'content': 'v2'}).status_code == 200
+        assert tool_runner._run_tool('skill_read', {'slug': 'demo'}) == 'v2'
+        assert client.delete('/workspace/skills/demo').status_code == 200
+        assert 'demo' not in tool_runner._run_tool('skill_list', {})
+
+        assert 'zebra crossing' not in tool_runner._run_tool('notes_search', {'query': 'zebra'})
+        assert client.post('/notes/save', json={'content': 'zebra crossing'}).status_code == 200
+        assert 'zebra crossing' in tool_runner._run_tool('notes_search', {'query': 'zebra'})
+
+    def test_store_writes_outside_tool_loop_invalidate(self, monkeypatch):
+        import notes
+        import workspace_manager
+        skills = self._count_calls(monkeypatch, 'skill_list', lambda k: f'{k} skills')
+        found = self._count_calls(monkeypatch, 'notes_search', lambda k: f'{k} hits')
+        tool_runner._run_tool('skill_list', {})
+        tool_runner._run_tool('notes_search', {'query': 'x'})
+        workspace_manager._skills_changed()
+        monkeypatch.setattr(notes, 'version', notes.version + 1)
+        assert tool_runner._run_tool('skill_list', {}) == '2 skills'
+        assert tool_runner._run_tool('notes_search', {'query': 'x'}) == '2 hits'
+        assert len(skills) == len(found) == 2
+
+    def test_registered_tools_opt_in(self, monkeypatch):
+        reads = []
+        tool_runner.register_tool('_test_read', lambda: reads.append(1) or len(reads), 'Read.', {},
+                                  pure=True, reads={'_test_ns'})
+        tool_runner.register_tool('_test_write', lambda: 'ok', 'Write.', {}, invalidates={'_test_ns'})
+        try:
+            assert [tool_runner._run_tool('_test_read', {}) for _ in range(2)] == ['1', '1']
+            tool_runner._run_tool('_test_write', {})
+            assert tool_runner._run_tool('_test_read', {}) == '2'
+        finally:
+            tool_runner._REGISTRY.pop('_test_read', None)
+            tool_runner._REGISTRY.pop('_test_write', None)
+
+    def test_invalidation_bumps_generation_only(self):
+        cache = tool_runner._ToolResultCache()
+        key = ('t', '{}', cache.generations(frozenset({'ns'})))
+        cache.put(key, 'old')
+        cache.invalidate(frozenset({'ns'}))
+        assert cache.generations(frozenset({'ns'})) == (1,)
+        assert cache.get(('t', '{}', cache.generations(frozenset({'ns'})))) is None
+        assert cache.get(key) == 'old'   # unreachable via fresh keys; ages out via LRU
+
+    def test_concurrent_identical_calls_share_one_run(self, monkeypatch):
+        release = threading.Event()
+        calls = self._count_calls(monkeypatch, 'web_search',
+                                  lambda k: release.wait(5) and f'result {k}')
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            tool_runner._run_tool('web_search', {'query': 'rust'}))) for _ in range(3)]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)   # let every thread reach the in-flight call
+        release.set()
+        for t in threads:
+            t.join(5)
+        assert results == ['result 1'] * 3
+        assert len(calls) == 1
+
+    def test_ttl_and_lru(self, monkeypatch):
+        cache = tool_runner._ToolResultCache(maxsize=2, ttl=10)
+        now = tool_runner.time.monotonic()
+        cache.put(('a', '{}'), 'A')
+        cache.put(('b', '{}'), 'B')
+        cache.get(('a', '{}'))
+        cache.put(('c', '{}'), 'C')           # evicts b
+        assert cache.get(('b', '{}')) is None
+        assert cache.get(('a', '{}')) == 'A'
+        monkeypatch.setattr(tool_runner.time, 'monotonic', lambda: now + 11)
+        assert cache.get(('a', '{}')) is None
+
+
+# ===========================================================================
+# Fuzzy memory_search reuse
+# ===========================================================================
+
+class TestFuzzyMemoryCache:
+    @pytest.fixture()
+    def store(self, monkeypatch):
+        import memory_store
+        st = memory_store.MemoryStore.__new__(memory_store.MemoryStore)
+        st._lock = threading.Lock()
+        st._backend = memory_store._KeywordBackend()
+        st.backend_name = 'keyword'
+        st.add('rust release notes are out', pinned=True)
+        monkeypatch.setattr(memory_store, 'get_store', lambda: st)
+        monkeypatch.setattr(tool_runner, '_FUZZY_MEMORY_CACHE', True)
+        monkeypatch.setattr(tool_runner, '_RECENT_QUERIES', type(tool_runner._RECENT_QUERIES)(maxlen=64))
+        self.searches = []
+        real = st._backend.search_batch
+        monkeypatch.setattr(st._backend, 'search_batch',
+                            lambda qs, n: (self.searches.append(list(qs)), real(qs, n))[1])
+        return st
+
+    def test_reworded_query_reuses_result(self, store):
+        first = tool_runner._memory_search('Latest rust news')
+        assert tool_runner._memory_search('latest Rust news?!') == first
+        assert self.searches == [['Latest rust news']]
+
+    def test_different_query_or_n_searches_again(self, store):
+        tool_runner._memory_search('latest rust news')
+        tool_runner._memory_search('latest python news')
+        tool_runner._memory_search('latest rust news', n=2)
+        assert len(self.searches) == 3
+
+    def test_store_change_invalidates(self, store):
+        tool_runner._memory_search('rust notes')
+        store.add('more rust notes', pinned=True)
+        tool_runner._memory_search('rust notes')
+        assert len(self.searches) == 2
+
+    def test_expired_entries_ignored(self, store, monkeypatch):
+        tool_runner._memory_search('rust notes')
+        now = tool_runner.time.monotonic()
+        monkeypatch.setattr(tool_runner.time, 'monotonic', lambda: now + tool_runner._FUZZY_TTL + 1)
+        tool_runner._memory_search('rust notes')
+        assert len(self.searches) == 2
+
+    def test_batch_only_searches_misses(self, store):
+        tool_runner._memory_search('rust notes')
+        tool_runner._memory_search_batch(['Rust notes.', 'python notes'])
+        assert self.searches[-1] == ['python notes']
+
+
+# ===========================================================================
+# Result formatting
+# ===========================================================================
+
+class TestListResultFormatting:
+    def test_layout(self, temp_tool, monkeypatch):
+        monkeypatch.setitem(tool_runner._REGISTRY[temp_tool], 'fn', lambda text='': [
+            {'title': 'A', 'url': 'https://a', 'snippet': 'about a'},
+            {'title': 'B'},
+            {'error': 'boom'},
+            'plain',
+        ])
+        assert tool_runner._run_tool(temp_tool, {}) == (
+            '1. **A**\n   URL: https://a\n   about a\n'
+            '2. **B**\n'
+            '3. ERROR: boom\n'
+            '4. plain'
+        )
+
+    def test_empty_list(self, temp_tool, monkeypatch):
+        monkeypatch.setitem(tool_runner._REGISTRY[temp_tool], 'fn', lambda text='': [])
+        assert tool_runner._run_tool(temp_tool, {}) == '(no results)'
+
+
+def test_memory_results_flatten_snippets(monkeypatch):
+    import memory_store
+    monkeypatch.setattr(memory_store, '_fmt_age', lambda ts: 'just now')
+    results = [
+        {'text': 'line one\r\nline\ttwo', 'score': 0.9, 'metadata': {'source': 'page', 'url': 'https://a'}},
+        {'text': 'x' * 400, 'score': 0.5, 'metadata': {'source': 'manual'}},
+    ]
+    assert tool_runner._format_memory_results(results) == (
+        '[page] https://a (just now, score=0.9)\n  line one  line two\n\n'
+        f'[manual] unknown (just now, score=0.5)\n  {"x" * 300}'
+    )
+
+
+def test_skill_created_event_never_blocks(monkeypatch, caplog):
+    import queue
+    import workspace_manager
+    monkeypatch.setattr(workspace_manager, 'create_skill',
+                        lambda slug, name, desc, content: {'path': f'/skills/{slug}'})
+    full = queue.Queue(maxsize=1)
+    full.put({'type': 'earlier'})
+    monkeypatch.setattr(tool_runner._CTX, 'event_queue', full, raising=False)
+    result = tool_runner._skill_create_fn('demo', 'Demo', 'A demo.', '# Demo')
+    assert result.startswith("Skill 'Demo' created")
+    assert 'skill_created event dropped' in caplog.text
+    full.get_nowait()
+    tool_runner._skill_create_fn('demo', 'Demo', 'A demo.', '# Demo')
+    assert full.get_nowait() == {'type': 'skill_created', 'slug': 'demo', 'name': 'Demo'}
+
+
+class TestJsonDumpsPretty:
+    SAMPLE = {'title': 'Café ☕', 'n': 3, 'nested': {'ok': True, 'items': [1, 2.5, None]}, 'empty': {}}
+
+    def test_matches_stdlib_layout(self):
+        import json
+        expected = json.dumps(self.SAMPLE, indent=2, ensure_ascii=False)
+        assert tool_runner._json_dumps_pretty(self.SAMPLE) == expected
+
+    def test_stdlib_fallback(self, monkeypatch):
+        monkeypatch.setattr(tool_runner, '_HAS_ORJSON', False)
+        assert tool_runner._json_dumps_pretty({'a': 1}) == '{\n  "a": 1\n}'
+
+    def test_huge_int_falls_back(self):
+        assert '340282366920938463463374607431768211456' in tool_runner._json_dumps_pretty({'n': 2 ** 128})
+
+
+# ===========================================================================
+# Streaming
+# ===========================================================================
+
+def _feed_in_chunks(text: str, size: int) -> tuple[list[list[dict]], list[dict]]:
+    stream = tool_runner._ToolCallStream()
+    per_chunk = [stream.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    return per_chunk, stream.finish()
+
+
+class TestToolCallStream:
+    TEXT = (
+        'Checking two things. tool_call :  {"name": "a", "args": {"q": "x}"}} then '
+        'TOOL_CALL: {"name": "b", "args": {}} done'
+    )
+
+    @pytest.mark.parametrize('size', [1, 3, 7, 1000])
+    def test_matches_full_parse(self, size):
+        _, final = _feed_in_chunks(self.TEXT, size)
+        assert final == tool_runner._extract_tool_calls(self.TEXT)
+
+    def test_call_reported_once_it_closes(self):
+        stream = tool_runner._ToolCallStream()
+        assert stream.feed('TOOL_CALL: {"name": "a", "args": {"q": 1}') == []
+        assert stream.feed('} more text') == [{'name': 'a', 'args': {'q': 1}}]
+        assert stream.finish() == [{'name': 'a', 'args': {'q': 1}}]
+
+    @pytest.mark.parametrize('size', [1, 2, 5])
+    def test_escapes_and_malformed_calls(self, size):
+        text = (
+            'TOOL_CALL: {"name": "a", "args": {oops}} '
+            'TOOL_CALL: {"name": "b", "args": {"js": "x = \\"}\\"; y = \'{\'"}} end'
+        )
+        per_chunk, final = _feed_in_chunks(text, size)
+        assert final == tool_runner._extract_tool_calls(text)
+        assert [c['name'] for chunk in per_chunk for c in chunk] == ['b']
+
+    def test_each_call_decoded_once(self, monkeypatch):
+        decoded = []
+        real = tool_runner._json_loads
+        monkeypatch.setattr(tool_runner, '_json_loads', lambda t: (decoded.append(t), real(t))[1])
+        text = 'TOOL_CALL: {"name": "a", "args": {"code": "' + 'x' * 500 + '"}} done'
+        _, final = _feed_in_chunks(text, 1)
+        assert final[0]['name'] == 'a'
+        assert len(decoded) == 1
+
+    def test_truncated_tail_repaired_on_finish(self):
+        _, final = _feed_in_chunks('TOOL_CALL: {"name": "a", "args": {"q": 1}', 4)
+        assert final == [{'name': 'a', 'args': {'q': 1}}]
+
+    def test_streaming_adapter_drives_the_loop(self, temp_tool):
+        adapter = _FakeStreamingAdapter(
+            f'Sure. TOOL_CALL: {{"name": "{temp_tool}", "args": {{"text": "hi"}}}}',
+            'All done.',
+        )
+        result = tool_runner.run_tool_loop(adapter, [])
+        assert result == {'content': 'All done.', 'model': 'fake'}
+        assert adapter.calls[1][-1]['content'] == f'TOOL_RESULT [{temp_tool}]:\necho:hi'
+
+    def test_sse_stream_reports_usage(self):
+        from providers.adapters import OpenAIAdapter
+
+        class _Resp:
+            closed = False
+
+            def iter_lines(self, decode_unicode=True):
+                yield 'data: {"model": "m", "choices": [{"delta": {"content": "Hel"}}]}'
+                yield 'data: {"choices": [{"delta": {"content": "lo"}}], "usage": null}'
+                yield 'data: {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2}}'
+                yield 'data: [DONE]'
+
+            def close(self):
+                self.closed = True
+
+        resp = _Resp()
+        gen = OpenAIAdapter()._stream_sse_deltas(resp, 'default')
+        deltas = []
+        try:
+            while True:
+                deltas.append(next(gen))
+        except StopIteration as stop:
+            reply = stop.value
+        assert deltas == ['Hel', 'lo'] and resp.closed
+        assert reply['content'] == 'Hello' and reply['model'] == 'm'
+        assert reply['usage'] == {'prompt_tokens': 3, 'completion_tokens': 2}
+
+    def test_calls_start_before_the_stream_ends(self):
+        started = threading.Event()
+        runs = []
+
+        def slow(text=''):
+            runs.append(text)
+            started.set()
+            return f'ran:{text}'
+
+        class _GatedAdapter(_FakeStreamingAdapter):
+            def stream_chat_complete(self, messages, **kwargs):
+                if not self.calls:
+                    self.calls.append(list(messages))
+                    yield 'TOOL_CALL: {"name": "_early_tool", "args": {"text": "x"}}'
+                    # The tool has to run while the reply is still streaming
+                    assert started.wait(5)
+                    yield ' and a little more prose.'
+                    return {'content': 'done streaming'}
+                return (yield from super().stream_chat_complete(messages, **kwargs))
+
+        tool_runner.register_tool(
+            '_early_tool', slow, 'Test-only tool.',
+            {'text': {'type': 'string', 'required': False, 'description': 'Text'}},
+            pure=True,
+        )
+        try:
+            adapter = _GatedAdapter('Finished.')
+            assert tool_runner.run_tool_loop(adapter, [])['content'] == 'Finished.'
+        finally:
+            tool_runner._REGISTRY.pop('_early_tool', None)
+        assert runs == ['x']
+        assert adapter.calls[1][-1]['content'] == 'TOOL_RESULT [_early_tool]:\nran:x'
+
+    def test_impure_calls_wait_for_the_whole_reply(self):
+        started = threading.Event()
+
+        def write(text=''):
+            started.set()
+            return f'wrote:{text}'
+
+        class _CheckingAdapter(_FakeStreamingAdapter):
+            def stream_chat_complete(self, messages, **kwargs):
+                if not self.calls:
+                    self.calls.append(list(messages))
+                    yield 'TOOL_CALL: {"name": "_write_tool", "args": {"text": "x"}}'
+                    assert not started.wait(0.2)
+                    yield ' done.'
+                    return {'content': 'done streaming'}
+                return (yield from super().stream_chat_complete(messages, **kwargs))
+
+        tool_runner.register_tool(
+            '_write_tool', write, 'Test-only tool.',
+            {'text': {'type': 'string', 'required': False, 'description': 'Text'}},
+        )
+        try:
+            adapter = _CheckingAdapter('Finished.')
+            assert tool_runner.run_tool_loop(adapter, [])['content'] == 'Finished.'
+        finally:
+            tool_runner._REGISTRY.pop('_write_tool', None)
+        assert adapter.calls[1][-1]['content'] == 'TOOL_RESULT [_write_tool]:\nwrote:x'
+
+    def test_early_calls_cancelled_when_the_stream_fails(self, monkeypatch):
+        import concurrent.futures as cf
+        submitted = []
+
+        class _IdleExecutor:
+            def submit(self, *args):
+                submitted.append(cf.Future())
+                return submitted[-1]
+
+        class _FailingAdapter:
+            supports_streaming = True
+
+            def stream_chat_complete(self, messages, **kwargs):
+                yield 'TOOL_CALL: {"name": "_early_tool", "args": {}}'
+                raise RuntimeError('503 service unavailable')
+
+        monkeypatch.setattr(tool_runner, '_TOOL_EXECUTOR', _IdleExecutor())
+        tool_runner.register_tool('_early_tool', lambda: 'ran', 'Test-only tool.', {}, pure=True)
+        early: dict = {}
+        try:
+            with pytest.raises(RuntimeError, match='503'):
+                tool_runner._complete_turn(_FailingAdapter(), [], 0.1, 100, {}, early)
+        finally:
+            tool_runner._REGISTRY.pop('_early_tool', None)
+        assert len(submitted) == 1 and submitted[0].cancelled()
+        assert early == {}
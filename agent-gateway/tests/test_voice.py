@@ -0,0 +1,245 @@
+"""Tests for voice.py — sentence chunking and streaming TTS.
+
+Covers:
+  - split_sentences: greedy packing up to max_chars, oversize sentences kept
+    whole, whitespace runs between sentences collapsed to one space
+  - speak_stream: long text synthesized concurrently per sentence chunk,
+    audio yielded in order, errors propagated
+  - speak_bytes: concatenation of the streamed chunks
+  - list_voices: catalogue served from the disk cache until it goes stale
+  - transcribe: transcripts cached by audio hash, errors never cached,
+    cache capped with least-recently-used pruning
+  - transcribe_long: audio split off the event loop, slices transcribed
+    concurrently, overlap words merged
+  - _whisper_timeout: upload allowance scales with size, capped
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+import voice
+
+
+class TestSplitSentences:
+    def test_packs_sentences_greedily(self):
+        text = 'One. Two! Three? Four.'
+        assert voice.split_sentences(text, max_chars=10) == ['One. Two!', 'Three?', 'Four.']
+
+    def test_short_text_is_one_chunk(self):
+        assert voice.split_sentences('Hello there. How are you?') == ['Hello there. How are you?']
+
+    def test_oversize_sentence_kept_whole(self):
+        long = 'x' * 50 + '.'
+        assert voice.split_sentences(f'Hi. {long} Bye.', max_chars=10) == ['Hi.', long, 'Bye.']
+
+    def test_whitespace_between_sentences_collapsed(self):
+        assert voice.split_sentences('  A.\n\n\tB.  ') == ['A. B.']
+
+    def test_abbreviation_without_space_not_split(self):
+        assert voice.split_sentences('v1.2 is out.', max_chars=6) == ['v1.2 is out.']
+
+    def test_empty(self):
+        assert voice.split_sentences('') == []
+        assert voice.split_sentences('   ') == []
+
+    def test_chunks_respect_limit(self):
+        text = ' '.join(f'Sentence number {i}.' for i in range(500))
+        chunks = voice.split_sentences(text, max_chars=200)
+        assert all(len(c) <= 200 for c in chunks)
+        assert ' '.join(chunks) == text
+
+
+@pytest.fixture()
+def fake_tts(monkeypatch):
+    """Replace edge-tts synthesis; later chunks finish first to test ordering."""
+    state = {'active': 0, 'peak': 0, 'calls': []}
+
+    async def synthesize(text, voice_, rate, pitch):
+        state['calls'].append(text)
+        state['active'] += 1
+        state['peak'] = max(state['peak'], state['active'])
+        try:
+            await asyncio.sleep(0.05 / len(state['calls']))
+            if text == 'Boom.':
+                raise RuntimeError('tts failed')
+            for word in text.split():
+                yield word.encode()
+        finally:
+            state['active'] -= 1
+
+    monkeypatch.setattr(voice, '_synthesize', synthesize)
+    monkeypatch.setattr(voice, '_TTS_SENTENCE_CHARS', 10)
+    monkeypatch.setattr(voice, '_TTS_CONCURRENCY', 2)
+    return state
+
+
+async def _collect(gen):
+    return [chunk async for chunk in gen]
+
+
+class TestSpeakStream:
+    def test_short_text_single_call(self, fake_tts):
+        assert asyncio.run(_collect(voice.speak_stream('Hi there'))) == [b'Hi', b'there']
+        assert fake_tts['calls'] == ['Hi there']
+
+    def test_chunks_synthesized_concurrently_in_order(self, fake_tts):
+        text = 'One. Two. Three. Four. Five.'
+        chunks = asyncio.run(_collect(voice.speak_stream(text)))
+        assert chunks == [w.encode() for w in text.split()]
+        assert fake_tts['peak'] == 2
+
+    def test_error_propagates(self, fake_tts):
+        with pytest.raises(RuntimeError, match='tts failed'):
+            asyncio.run(_collect(voice.speak_stream('Fine. Boom. Never.')))
+
+    def test_speak_bytes_joins_stream(self, fake_tts):
+        assert asyncio.run(voice.speak_bytes('Alpha. Beta.')) == b'Alpha.Beta.'
+        assert asyncio.run(voice.speak_bytes('   ')) == b''
+
+
+class TestVoiceCache:
+    @pytest.fixture()
+    def catalogue(self, tmp_path, monkeypatch):
+        """Point the disk cache at tmp_path and count catalogue downloads."""
+        state = {'fetches': 0}
+
+        async def fetch():
+            state['fetches'] += 1
+            return [{'name': 'en-US-A', 'locale': 'en-US', 'gender': 'Female', 'label': 'A'},
+                    {'name': 'fr-FR-B', 'locale': 'fr-FR', 'gender': 'Male', 'label': 'B'}]
+
+        monkeypatch.setattr(voice, '_fetch_voices', fetch)
+        monkeypatch.setattr(voice, '_VOICE_CACHE_FILE', tmp_path / 'voice_cache.json')
+        monkeypatch.setattr(voice, '_voice_cache', None)
+        return state
+
+    def test_fresh_process_reads_disk(self, catalogue, monkeypatch):
+        assert len(asyncio.run(voice.list_voices())) == 2
+        monkeypatch.setattr(voice, '_voice_cache', None)     # simulate a restart
+        assert [v['name'] for v in asyncio.run(voice.list_voices('fr'))] == ['fr-FR-B']
+        assert catalogue['fetches'] == 1
+
+    def test_stale_cache_refetched(self, catalogue, monkeypatch):
+        asyncio.run(voice.list_voices())
+        monkeypatch.setattr(voice, '_voice_cache', None)
+        monkeypatch.setattr(voice, '_VOICE_CACHE_TTL', 0)
+        asyncio.run(voice.list_voices())
+        assert catalogue['fetches'] == 2
+
+    def test_corrupt_cache_ignored(self, catalogue):
+        voice._VOICE_CACHE_FILE.write_text('{not json')
+        assert len(asyncio.run(voice.list_voices())) == 2
+        assert catalogue['fetches'] == 1
+
+
+class TestTranscriptCache:
+    @pytest.fixture()
+    def whisper(self, tmp_path, monkeypatch):
+        """Count uncached transcriptions; the reply is set via state['reply']."""
+        state = {'calls': 0, 'reply': 'hello world'}
+
+        def uncached(audio_bytes, filename, provider_key):
+            state['calls'] += 1
+            return state['reply']
+
+        monkeypatch.setattr(voice, '_transcribe_uncached', uncached)
+        monkeypatch.setattr(voice, '_STT_CACHE_DIR', tmp_path / 'stt')
+        return state
+
+    def test_same_audio_transcribed_once(self, whisper):
+        assert voice.transcribe(b'RIFF-audio') == 'hello world'
+        whisper['reply'] = 'different'
+        assert voice.transcribe(b'RIFF-audio', filename='again.wav') == 'hello world'
+        assert voice.transcribe(b'other-audio') == 'different'
+        assert whisper['calls'] == 2
+
+    def test_errors_not_cached(self, whisper):
+        whisper['reply'] = '[ERROR] Transcription failed.'
+        voice.transcribe(b'RIFF-audio')
+        whisper['reply'] = 'recovered'
+        assert voice.transcribe(b'RIFF-audio') == 'recovered'
+
+    def test_cache_pruned_to_max_entries(self, whisper, tmp_path, monkeypatch):
+        import os
+        monkeypatch.setattr(voice, '_STT_CACHE_MAX', 2)
+        for i, audio in enumerate((b'a', b'b')):
+            voice.transcribe(audio)
+            for f in (tmp_path / 'stt').iterdir():   # give each file a distinct age
+                os.utime(f, ns=(f.stat().st_atime_ns, f.stat().st_mtime_ns - 10**9))
+        voice.transcribe(b'a')                        # hit: a becomes most recent
+        voice.transcribe(b'c')
+        assert len(list((tmp_path / 'stt').iterdir())) == 2
+        calls = whisper['calls']
+        voice.transcribe(b'a')
+        voice.transcribe(b'c')
+        assert whisper['calls'] == calls              # b was the one evicted
+
+    def test_rejected_input_skips_cache(self, whisper):
+        assert voice.transcribe(b'').startswith('[ERROR]')
+        assert whisper['calls'] == 0
+
+
+class TestTranscribeLong:
+    @pytest.fixture()
+    def sliced(self, monkeypatch):
+        """Split audio into three fake slices and transcribe them with a lag."""
+        texts = {b'0': 'the quick brown fox jumps', b'1': 'Jumps over the lazy', b'2': 'lazy dog.'}
+        state = {'active': 0, 'peak': 0}
+
+        def transcribe(chunk, filename, provider_key):
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.05)
+            state['active'] -= 1
+            return texts[chunk]
+
+        monkeypatch.setattr(voice, '_split_audio', lambda audio, name: list(texts))
+        monkeypatch.setattr(voice, 'transcribe', transcribe)
+        monkeypatch.setattr(voice, '_STT_CONCURRENCY', 2)
+        return texts, state
+
+    def test_slices_merged_in_order(self, sliced):
+        texts, state = sliced
+        result = asyncio.run(voice.transcribe_long(b'long audio', 'talk.mp3'))
+        assert result == 'the quick brown fox jumps over the lazy dog.'
+        assert state['peak'] == 2
+
+    def test_slice_error_returned(self, sliced):
+        texts, _ = sliced
+        texts[b'1'] = '[ERROR] Transcription failed.'
+        assert asyncio.run(voice.transcribe_long(b'long audio')) == texts[b'1']
+
+    def test_split_runs_off_event_loop(self, monkeypatch):
+        import threading
+        seen = {}
+
+        def split(audio, name):
+            seen['thread'] = threading.current_thread()
+            return [audio]
+        monkeypatch.setattr(voice, '_split_audio', split)
+        monkeypatch.setattr(voice, 'transcribe', lambda audio, name, key: 'ok')
+        assert asyncio.run(voice.transcribe_long(b'abc')) == 'ok'
+        assert seen['thread'] is not threading.main_thread()
+
+    def test_short_audio_single_call(self, monkeypatch):
+        monkeypatch.setattr(voice, '_HAS_PYDUB', False)
+        monkeypatch.setattr(voice, 'transcribe', lambda audio, name, key: f'{len(audio)} bytes')
+        assert asyncio.run(voice.transcribe_long(b'abc')) == '3 bytes'
+
+    @pytest.mark.parametrize('before,after,merged', [
+        ('a b c', 'x y', 'a b c x y'),
+        ('one two three.', 'Three, four', 'one two three. four'),
+        ('', 'only after', 'only after'),
+    ])
+    def test_merge_overlap(self, before, after, merged):
+        assert voice._merge_overlap(before, after) == merged
+
+
+@pytest.mark.parametrize('size,expected', [(0, 30.0), (1_000_000, 50.0), (25 * 1024 * 1024, 300.0)])
+def test_whisper_timeout_scales_with_upload(size, expected):
+    timeout = voice._whisper_timeout(size)
+    assert (timeout.read, timeout.write) == (expected, expected)
+    assert timeout.connect == 10.0
@@ -0,0 +1,328 @@
+"""Tests for watcher.py — page text extraction and change scoring.
+
+Covers:
+  - _extract_text: scripts/styles dropped, tags and whitespace collapsed,
+    malformed markup handled in linear time
+  - _unified_diff: lazily capped at max_lines, same lines as the full diff
+  - _similarity: same score as SequenceMatcher.quick_ratio, baseline counted once
+  - _poll_one: unchanged pages skip scoring via the stored baseline hash,
+    as do pages where only clock times / timestamps / tokens changed
+  - _poll_due: due watchers fetched concurrently, others left alone
+  - schedule: heap pops only due watchers, failures retried after _TICK,
+    CRUD changes (trigger / disable / delete / interval) respected
+  - conditional GET: validators stored and sent back, 304 skips the pipeline
+  - persistence: one metadata write per tick, baselines in per-watcher files,
+    file writes happen outside the lock readers take, orjson output laid out
+    like the stdlib encoder's
+"""
+from __future__ import annotations
+
+import difflib
+import threading
+import time
+
+import pytest
+
+import watcher
+
+
+@pytest.fixture(autouse=True)
+def watchers_file(tmp_path, monkeypatch):
+    """Keep watcher state (metadata + baseline files) inside tmp_path."""
+    path = tmp_path / 'watchers.json'
+    monkeypatch.setattr(watcher, '_WATCHERS_FILE', path)
+    monkeypatch.setattr(watcher, '_heap', [])
+    monkeypatch.setattr(watcher, '_scheduled', {})
+    # app.py starts the poll thread on import; give tests their own wake-up
+    # event so schedule changes here never wake it into popping our entries
+    monkeypatch.setattr(watcher, '_wake', threading.Event())
+    return path
+
+
+@pytest.fixture()
+def regex_route(monkeypatch):
+    """Force the stdlib regex extractor even when selectolax is installed."""
+    monkeypatch.setattr(watcher, '_HAS_SELECTOLAX', False)
+
+
+class TestExtractText:
+    def test_strips_markup(self, regex_route):
+        html = (
+            '<html><head><style>p { color: red }</style></head>\n'
+            '<body><h1>Title</h1>\n\n  <p>Some <b>bold</b>\ttext</p>'
+            '<SCRIPT type="text/javascript">var x = "<p>";</SCRIPT></body></html>'
+        )
+        assert watcher._extract_text(html) == 'Title Some bold text'
+
+    def test_unclosed_script_runs_to_end(self, regex_route):
+        assert watcher._extract_text('<p>kept</p><script>never closed <p>dropped') == 'kept'
+
+    def test_truncated_to_max_chars(self, regex_route, monkeypatch):
+        monkeypatch.setattr(watcher, '_MAX_CONTENT_CHARS', 5)
+        assert watcher._extract_text('<p>abcdefgh</p>') == 'abcde'
+
+    @pytest.mark.parametrize('html', ['<script>' * 20_000, 'a < b ' * 20_000])
+    def test_malformed_markup_is_linear(self, regex_route, html):
+        start = time.perf_counter()
+        watcher._extract_text(html)
+        assert time.perf_counter() - start < 1.0
+
+
+class TestSimilarity:
+    @pytest.mark.parametrize('a,b', [
+        ('hello world', 'hello world'),
+        ('hello world', 'world hello!'),
+        ('abc', 'xyz'),
+        ('price: 10 USD', 'price: 12 USD'),
+    ])
+    def test_matches_quick_ratio(self, a, b):
+        assert watcher._similarity(a, b) == pytest.approx(difflib.SequenceMatcher(None, a, b).quick_ratio())
+
+    def test_empty_texts(self):
+        assert watcher._similarity('', '') == 1.0
+        assert watcher._similarity('', 'x') == 0.0
+
+    def test_baseline_counted_once(self):
+        watcher._char_counts.cache_clear()
+        baseline = 'the same baseline text ' * 100
+        for poll in ('changed once', 'changed twice'):
+            watcher._similarity(baseline, poll)
+        assert watcher._char_counts.cache_info().hits == 1
+
+
+class TestUnifiedDiff:
+    def test_matches_full_diff_prefix(self):
+        a = ''.join(f'line {i}\n' for i in range(1000))
+        b = ''.join(f'line {i * 7}\n' for i in range(1000))
+        full = list(difflib.unified_diff(a.splitlines(True), b.splitlines(True),
+                                         fromfile='before', tofile='after', n=3))
+        assert len(full) > 200
+        assert watcher._unified_diff(a, b) == ''.join(full[:200])
+        assert watcher._unified_diff(a, b, max_lines=5).count('\n') == 5
+
+    def test_identical_texts(self):
+        assert watcher._unified_diff('same\n', 'same\n') == ''
+
+
+class TestPollOne:
+    @pytest.fixture()
+    def page(self, monkeypatch):
+        """Serve page['html'] from _fetch and count _similarity calls."""
+        state = {'html': '<p>first version</p>', 'scored': 0}
+        monkeypatch.setattr(watcher, '_fetch', lambda url, validators=None: state['html'])
+        monkeypatch.setattr(watcher, '_alerts', {})
+        real = watcher._similarity
+
+        def counting(a, b):
+            state['scored'] += 1
+            return real(a, b)
+
+        monkeypatch.setattr(watcher, '_similarity', counting)
+        return state
+
+    def test_unchanged_page_skips_scoring(self, page):
+        w = {'id': 'w1', 'url': 'https://example.com'}
+        watcher._poll_one(w)
+        assert w['baseline_hash'] == watcher._digest('first version')
+        watcher._poll_one(w)
+        assert page['scored'] == 0
+        page['html'] = '<p>second version entirely</p>'
+        watcher._poll_one(w)
+        assert page['scored'] == 1
+        assert w['baseline_text'] == 'second version entirely'
+        assert w['baseline_hash'] == watcher._digest('second version entirely')
+
+    def test_volatile_tokens_skip_scoring(self, page):
+        w = {'id': 'w3', 'url': 'https://example.com'}
+        page['html'] = '<p>Updated 10:41:07 ts=1718000000 csrf=9f86d081884c7d65 price 10</p>'
+        watcher._poll_one(w)
+        page['html'] = '<p>Updated 10:42:31 ts=1718000090 csrf=2c26b46b68ffc68f price 10</p>'
+        watcher._poll_one(w)
+        assert page['scored'] == 0
+        page['html'] = '<p>Updated 10:42:31 ts=1718000090 csrf=2c26b46b68ffc68f price 12</p>'
+        watcher._poll_one(w)
+        assert page['scored'] == 1
+
+    def test_legacy_baseline_gets_hashed(self, page):
+        w = {'id': 'w2', 'url': 'https://example.com', 'baseline_text': 'first version'}
+        watcher._poll_one(w)
+        assert page['scored'] == 0
+        assert 'baseline_hash' not in watcher._public(w)
+        assert 'baseline_canon_hash' not in watcher._public(w)
+
+
+def test_due_watchers_polled_concurrently(monkeypatch):
+    barrier = threading.Barrier(3, timeout=5)   # every fetch must be in flight at once
+
+    def fetch(url, validators=None):
+        barrier.wait()
+        return f'<p>{url}</p>'
+
+    now = time.time()
+    due = [{'id': f'w{i}', 'url': f'https://{i}.example', 'last_checked': 0} for i in range(3)]
+    idle = {'id': 'idle', 'url': 'https://idle.example', 'last_checked': now, 'interval_minutes': 60}
+    monkeypatch.setattr(watcher, '_fetch', fetch)
+    monkeypatch.setattr(watcher, '_watchers', {w['id']: w for w in [*due, idle]})
+    watcher._reschedule_all()
+    assert watcher._poll_due(now) == 3
+    assert [w['baseline_text'] for w in due] == [f'https://{i}.example' for i in range(3)]
+    assert 'baseline_text' not in idle
+
+
+class TestSchedule:
+    @pytest.fixture(autouse=True)
+    def fetch(self, monkeypatch):
+        state = {'html': '<p>page</p>'}
+        monkeypatch.setattr(watcher, '_fetch', lambda url, validators=None: state['html'])
+        monkeypatch.setattr(watcher, '_watchers', {})
+        monkeypatch.setattr(watcher, '_alerts', {})
+        return state
+
+    def test_polled_watcher_rescheduled_by_interval(self):
+        now = time.time()
+        a = watcher.add_watcher('https://a.example', interval_minutes=5)['id']
+        b = watcher.add_watcher('https://b.example', interval_minutes=60)['id']
+        watcher._watchers[b]['last_checked'] = now
+        watcher._reschedule_all()
+        assert watcher._poll_due(now) == 1
+        assert watcher._watchers[a]['baseline_text'] == 'page'
+        assert watcher._seconds_until_due(now) == pytest.approx(300, abs=5)
+        assert watcher._poll_due(now + 60) == 0
+
+    def test_failed_fetch_retried_after_tick(self, fetch, monkeypatch):
+        monkeypatch.setattr(watcher, '_TICK', 30)
+        fetch['html'] = None
+        wid = watcher.add_watcher('https://down.example')['id']
+        now = time.time()
+        assert watcher._poll_due(now) == 1
+        assert watcher._scheduled[wid] == pytest.approx(now + 30)
+
+    def test_crud_changes_respected(self):
+        now = time.time()
+        ids = [watcher.add_watcher(f'https://{i}.example')['id'] for i in range(4)]
+        watcher.delete_watcher(ids[0])
+        watcher.update_watcher(ids[1], enabled=False)
+        watcher._watchers[ids[2]]['last_checked'] = now
+        watcher.update_watcher(ids[2], interval_minutes=10)
+        assert watcher._poll_due(now) == 1          # only ids[3]
+        watcher.trigger_watcher(ids[2])
+        assert [w['id'] for w in watcher._due_watchers(now)] == [ids[2]]
+        assert watcher._seconds_until_due(now) == pytest.approx(3600, abs=5)   # ids[3] again
+
+
+class TestConditionalGet:
+    @pytest.fixture()
+    def server(self, monkeypatch):
+        """Fake httpx.get: 304 when the client's validators match the page's."""
+        import httpx
+        state = {'etag': '"v1"', 'html': '<p>hello</p>', 'requests': []}
+
+        class _Response:
+            def __init__(self, status, text='', headers=None):
+                self.status_code, self.text, self.headers = status, text, headers or {}
+
+            def raise_for_status(self):
+                pass
+
+        def get(url, headers=None, **kwargs):
+            state['requests'].append(dict(headers or {}))
+            if headers.get('If-None-Match') == state['etag']:
+                return _Response(304)
+            return _Response(200, state['html'], {'ETag': state['etag'], 'Last-Modified': 'Mon'})
+
+        monkeypatch.setattr(httpx, 'get', get)
+        monkeypatch.setattr(watcher, '_alerts', {})
+        return state
+
+    def test_unchanged_page_returns_304(self, server, monkeypatch):
+        w = {'id': 'w', 'url': 'https://example.com'}
+        watcher._poll_one(w)
+        assert (w['etag'], w['last_modified']) == ('"v1"', 'Mon')
+        assert 'If-None-Match' not in server['requests'][0]
+
+        monkeypatch.setattr(watcher, '_extract_text', lambda html: pytest.fail('parsed a 304'))
+        watcher._poll_one(w)
+        assert server['requests'][1]['If-None-Match'] == '"v1"'
+        assert server['requests'][1]['If-Modified-Since'] == 'Mon'
+
+    def test_changed_page_refreshes_validators(self, server):
+        w = {'id': 'w', 'url': 'https://example.com'}
+        watcher._poll_one(w)
+        server.update(etag='"v2"', html='<p>a completely different page</p>')
+        watcher._poll_one(w)
+        assert w['etag'] == '"v2"'
+        assert w['baseline_text'] == 'a completely different page'
+
+
+class TestPersistence:
+    def test_tick_saves_metadata_once(self, monkeypatch, watchers_file):
+        saves = []
+        monkeypatch.setattr(watcher, '_fetch', lambda url, validators=None: '<p>page</p>')
+        monkeypatch.setattr(watcher, '_save', lambda: saves.append(1))
+        monkeypatch.setattr(watcher, '_watchers', {
+            f'w{i}': {'id': f'w{i}', 'url': f'https://{i}.example', 'last_checked': 0} for i in range(4)
+        })
+        watcher._reschedule_all()
+        watcher._poll_due(time.time())
+        assert saves == [1]
+
+    def test_baselines_stored_outside_metadata(self, monkeypatch, watchers_file):
+        import json
+        monkeypatch.setattr(watcher, '_fetch', lambda url, validators=None: '<p>page text</p>')
+        monkeypatch.setattr(watcher, '_watchers', {})
+        wid = watcher.add_watcher('https://example.com')['id']
+        watcher._poll_due(time.time())
+        assert 'baseline_text' not in json.loads(watchers_file.read_text())[0]
+        assert (watchers_file.parent / 'baselines' / f'{wid}.txt').read_text() == 'page text'
+
+        monkeypatch.setattr(watcher, '_watchers', {})
+        watcher._load()
+        assert watcher._watchers[wid]['baseline_text'] == 'page text'
+        watcher.delete_watcher(wid)
+        assert not (watchers_file.parent / 'baselines' / f'{wid}.txt').exists()
+
+    def test_inline_baselines_migrated_on_load(self, monkeypatch, watchers_file):
+        import json
+        watchers_file.write_text(json.dumps([{'id': 'old', 'url': 'u', 'baseline_text': 'legacy'}]))
+        monkeypatch.setattr(watcher, '_watchers', {})
+        watcher._load()
+        assert (watchers_file.parent / 'baselines' / 'old.txt').read_text() == 'legacy'
+        watcher._save()
+        assert 'baseline_text' not in json.loads(watchers_file.read_text())[0]
+
+    def test_reads_not_blocked_by_slow_write(self, monkeypatch):
+        release = threading.Event()
+        writing = threading.Event()
+        real_write = watcher._write_atomic
+        held = []
+
+        def slow_write(path, text):
+            held.append(watcher._lock.locked())
+            writing.set()
+            release.wait(5)
+            real_write(path, text)
+
+        monkeypatch.setattr(watcher, '_watchers', {})
+        wid = watcher.add_watcher('https://example.com')['id']
+        monkeypatch.setattr(watcher, '_write_atomic', slow_write)
+        saver = threading.Thread(target=watcher._save)
+        saver.start()
+        try:
+            assert writing.wait(5)
+            assert [w['id'] for w in watcher.list_watchers()] == [wid]
+            assert watcher.get_all_alerts() == []
+        finally:
+            release.set()
+            saver.join(5)
+        assert held == [False]
+
+    @pytest.mark.parametrize('orjson', [True, False])
+    def test_metadata_layout(self, monkeypatch, watchers_file, orjson):
+        import json
+        if orjson and not watcher._HAS_ORJSON:
+            pytest.skip('orjson not installed')
+        monkeypatch.setattr(watcher, '_HAS_ORJSON', orjson)
+        monkeypatch.setattr(watcher, '_watchers', {})
+        watcher.add_watcher('https://example.com/café', label='Café ☕')
+        meta = json.loads(watchers_file.read_text(encoding='utf-8'))
+        assert watchers_file.read_text(encoding='utf-8') == json.dumps(meta, indent=2, ensure_ascii=False)
@@ -5,6 +5,12 @@ Covers:
   - HTTP: POST /admin/webhooks, GET /admin/webhooks, GET /admin/webhooks/{id},
           DELETE /admin/webhooks/{id}
   - Webhook events fired from approval approve/reject endpoints
+  - Delivery through the shared pooled httpx client (HTTP/2 when h2 is installed)
+  - Registry persistence: debounced, coalesced, atomic writes
+  - Public hook view: fixed key order, signed flag precomputed
+  - Retry back-offs parked on a heap instead of sleeping on a worker
+  - Delivery headers built from the shared base headers
+  - Keyed HMAC templates reused per secret, dropped when a hook is deleted
 """
 from __future__ import annotations
 
@@ -15,6 +21,7 @@ from pathlib import Path
 from typing import Any, Dict, List
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 from starlette.testclient import TestClient
 
@@ -38,7 +45,9 @@ def _reset_webhooks(tmp_path, monkeypatch):
     monkeypatch.setattr(webhooks, '_delivery_log', {})  # clear delivery log
     # Default to 1 attempt so unreachable-URL tests don't sleep between retries
     monkeypatch.setattr(webhooks, '_MAX_RETRIES', 1)
+    monkeypatch.setattr(webhooks, '_save_timer', None)
     yield
+    webhooks._flush_pending()   # land any debounced write in this test's tmp file
     monkeypatch.setattr(webhooks, '_hooks', {})
     monkeypatch.setattr(webhooks, '_loaded', True)
     monkeypatch.setattr(webhooks, '_delivery_log', {})
@@ -53,6 +62,11 @@ def _auth(token: str = ADMIN_TOKEN) -> dict:
     return {'Authorization': f'Bearer {token}'}
 
 
+def _serve(monkeypatch, handler) -> None:
+    """Route webhook deliveries to *handler* (httpx.Request -> httpx.Response)."""
+    monkeypatch.setattr(webhooks, '_client', httpx.Client(transport=httpx.MockTransport(handler)))
+
+
 # ===========================================================================
 # Module-level unit tests
 # ===========================================================================
@@ -86,6 +100,7 @@ class TestRegisterWebhook:
         f = tmp_path / 'wh.json'
         monkeypatch.setattr(webhooks, 'WEBHOOKS_FILE', f)
         webhooks.register_webhook('https://save.test/')
+        webhooks._flush_pending()   # writes are debounced
         assert f.exists()
         data = json.loads(f.read_text())
         assert len(data) == 1
@@ -103,6 +118,14 @@ class TestListWebhooks:
         assert urls == {'https://one.com/', 'https://two.com/'}
 
 
+class TestPublicHook:
+    def test_key_order_and_no_secret(self):
+        hook = webhooks.register_webhook('https://view.test/', secret='x')
+        assert list(hook) == ['id', 'url', 'events', 'signed', 'created_at']
+        assert hook['signed'] is True
+        assert '_signed' not in hook
+
+
 class TestGetWebhook:
     def test_returns_none_for_missing(self):
         assert webhooks.get_webhook('nonexistent') is None
@@ -133,7 +156,7 @@ class TestFireWebhooks:
     def test_fire_calls_deliver_for_matching_event(self, monkeypatch):
         delivered: List[Dict[str, Any]] = []
 
-        def _fake_deliver(hook_id, url, event, body, secret=''):
+        def _fake_deliver(hook_id, url, event, body, secret='', signature=None, blocking=True):
             delivered.append({'hook_id': hook_id, 'url': url, 'event': event})
 
         monkeypatch.setattr(webhooks, '_deliver', _fake_deliver)
@@ -149,7 +172,7 @@ class TestFireWebhooks:
     def test_no_delivery_for_non_subscribed_event(self, monkeypatch):
         delivered: List[str] = []
 
-        def _fake_deliver(hook_id, url, event, body, secret=''):
+        def _fake_deliver(hook_id, url, event, body, secret='', signature=None, blocking=True):
             delivered.append(event)
 
         monkeypatch.setattr(webhooks, '_deliver', _fake_deliver)
@@ -319,6 +342,126 @@ class TestWebhookFireOnApprovalEvents:
 # Delivery log (module-level)
 # ===========================================================================
 
+class TestPersistence:
+    @pytest.mark.parametrize('has_orjson', [True, False])
+    def test_load_parses_bytes(self, monkeypatch, has_orjson):
+        monkeypatch.setattr(webhooks, '_HAS_ORJSON', has_orjson and webhooks._orjson is not None)
+        webhooks.WEBHOOKS_FILE.write_bytes(json.dumps({'h1': {
+            'id': 'h1', 'url': 'https://café.test/', 'events': ['approval.created'],
+            'secret': '', 'created_at': 'x'}}, ensure_ascii=False).encode())
+        monkeypatch.setattr(webhooks, '_loaded', False)
+        assert webhooks.get_webhook('h1')['url'] == 'https://café.test/'
+
+    def test_registry_round_trips(self, monkeypatch):
+        hook = webhooks.register_webhook('https://persist.test/', events=['approval.created'])
+        webhooks._flush_pending()
+        monkeypatch.setattr(webhooks, '_hooks', {})
+        monkeypatch.setattr(webhooks, '_loaded', False)
+        webhooks._load()
+        assert webhooks._hooks[hook['id']]['url'] == 'https://persist.test/'
+        assert webhooks._hooks[hook['id']]['events'] == ['approval.created']
+
+    def test_burst_coalesced_into_one_write(self, monkeypatch):
+        writes: list = []
+        real_save = webhooks._save
+        monkeypatch.setattr(webhooks, '_SAVE_DELAY', 60)
+        monkeypatch.setattr(webhooks, '_save', lambda hooks, path: writes.append(len(hooks)) or real_save(hooks, path))
+        ids = [webhooks.register_webhook(f'https://burst{i}.test/')['id'] for i in range(10)]
+        webhooks.delete_webhook(ids[0])
+        assert writes == []
+        webhooks._flush_pending()
+        assert writes == [9]
+        assert webhooks._save_timer is None
+        assert len(json.loads(webhooks.WEBHOOKS_FILE.read_text())) == 9
+
+    def test_timer_writes_after_delay(self, monkeypatch):
+        monkeypatch.setattr(webhooks, '_SAVE_DELAY', 0.01)
+        webhooks.register_webhook('https://later.test/')
+        deadline = _time.monotonic() + 5
+        while not webhooks.WEBHOOKS_FILE.exists() and _time.monotonic() < deadline:
+            _time.sleep(0.01)
+        data = json.loads(webhooks.WEBHOOKS_FILE.read_text())
+        assert [h['url'] for h in data.values()] == ['https://later.test/']
+
+    def test_write_is_atomic_replace(self):
+        webhooks.register_webhook('https://atomic.test/')
+        webhooks._flush_pending()
+        assert [p.name for p in webhooks.WEBHOOKS_FILE.parent.iterdir()] == ['webhooks.json']
+
+    def test_secret_not_written_in_clear(self, monkeypatch):
+        monkeypatch.delenv('INTELLI_WEBHOOK_SECRET_KEY', raising=False)
+        webhooks.register_webhook('https://signed.test/', secret='s3cret')
+        webhooks._flush_pending()
+        assert 's3cret' not in webhooks.WEBHOOKS_FILE.read_text()
+        assert next(iter(webhooks._hooks.values()))['secret'] == 's3cret'
+
+    def test_signed_flag_derived_on_load_not_persisted(self, monkeypatch):
+        from cryptography.fernet import Fernet
+        monkeypatch.setenv('INTELLI_WEBHOOK_SECRET_KEY', Fernet.generate_key().decode())
+        signed = webhooks.register_webhook('https://s.test/', secret='k')
+        plain = webhooks.register_webhook('https://p.test/')
+        webhooks._flush_pending()
+        assert '_signed' not in webhooks.WEBHOOKS_FILE.read_text()
+        monkeypatch.setattr(webhooks, '_hooks', {})
+        monkeypatch.setattr(webhooks, '_loaded', False)
+        assert webhooks.get_webhook(signed['id'])['signed'] is True
+        assert webhooks.get_webhook(plain['id'])['signed'] is False
+
+    def test_event_set_rebuilt_on_load(self, monkeypatch):
+        hook = webhooks.register_webhook('https://ev.test/', events=['approval.approved'])
+        webhooks._flush_pending()
+        assert '_events_set' not in webhooks.WEBHOOKS_FILE.read_text()
+        monkeypatch.setattr(webhooks, '_hooks', {})
+        monkeypatch.setattr(webhooks, '_loaded', False)
+        fired: list = []
+        monkeypatch.setattr(webhooks, '_deliver', lambda *a, **kw: fired.append(a[0]))
+        monkeypatch.setattr(webhooks._executor, 'submit', lambda fn, *a, **kw: fn(*a, **kw))
+        webhooks.fire_webhooks('approval.approved', {})
+        webhooks.fire_webhooks('approval.created', {})
+        assert fired == [hook['id']]
+        assert webhooks._hooks[hook['id']]['_events_set'] == frozenset({'approval.approved'})
+
+    @pytest.mark.parametrize('has_orjson', [True, False])
+    def test_registry_written_compact(self, monkeypatch, has_orjson):
+        monkeypatch.setattr(webhooks, '_HAS_ORJSON', has_orjson and webhooks._orjson is not None)
+        hook = webhooks.register_webhook('https://compact.test/')
+        webhooks._flush_pending()
+        raw = webhooks.WEBHOOKS_FILE.read_text()
+        assert '\n' not in raw
+        assert json.loads(raw)[hook['id']]['url'] == 'https://compact.test/'
+
+    def test_write_fsynced_before_replace(self, monkeypatch):
+        order: list = []
+        real_fsync, real_replace = webhooks.os.fsync, webhooks.os.replace
+        monkeypatch.setattr(webhooks.os, 'fsync', lambda fd: order.append('fsync') or real_fsync(fd))
+        monkeypatch.setattr(webhooks.os, 'replace', lambda a, b: order.append('replace') or real_replace(a, b))
+        webhooks.register_webhook('https://durable.test/')
+        webhooks._flush_pending()
+        assert order == ['fsync', 'replace']
+
+
+class TestUtcNowStr:
+    def test_shared_by_registry_and_delivery_log(self, monkeypatch):
+        monkeypatch.setattr(webhooks, '_ts_cache', (0, ''))
+        monkeypatch.setattr(webhooks, '_utc_now_str', lambda: '2030-01-01T00:00:00Z')
+        _serve(monkeypatch, lambda request: httpx.Response(200))
+        hook = webhooks.register_webhook('https://ts.test/')
+        webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{}')
+        assert hook['created_at'] == '2030-01-01T00:00:00Z'
+        assert webhooks.get_deliveries(hook['id'])[0]['timestamp'] == '2030-01-01T00:00:00Z'
+
+    def test_formatted_once_per_second(self, monkeypatch):
+        clock = iter([1700000000.1, 1700000000.9, 1700000001.0])
+        formatted: list = []
+        real_strftime = _time.strftime
+        monkeypatch.setattr(webhooks, '_ts_cache', (0, ''))
+        monkeypatch.setattr(_time, 'time', lambda: next(clock))
+        monkeypatch.setattr(_time, 'strftime', lambda fmt, t: formatted.append(t) or real_strftime(fmt, t))
+        stamps = [webhooks._utc_now_str() for _ in range(3)]
+        assert stamps == ['2023-11-14T22:13:20Z', '2023-11-14T22:13:20Z', '2023-11-14T22:13:21Z']
+        assert len(formatted) == 2
+
+
 class TestGetDeliveries:
     def test_empty_for_new_hook(self):
         hook = webhooks.register_webhook('https://example.com/')
@@ -331,13 +474,7 @@ class TestGetDeliveries:
         """_deliver() should create an 'ok' record when the HTTP call returns 2xx."""
         hook = webhooks.register_webhook('https://example.com/')
 
-        # Stub urllib to return a 200 response
-        class _FakeResp:
-            status = 200
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        monkeypatch.setattr('urllib.request.urlopen', lambda *a, **kw: _FakeResp())
+        _serve(monkeypatch, lambda request: httpx.Response(200))
         webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{}')
 
         deliveries = webhooks.get_deliveries(hook['id'])
@@ -353,10 +490,10 @@ class TestGetDeliveries:
         """_deliver() should record an 'error' entry on network failure."""
         hook = webhooks.register_webhook('https://badhost.invalid/')
 
-        def _raise(*a, **kw):
-            raise ConnectionError('no route to host')
+        def _raise(request):
+            raise httpx.ConnectError('no route to host')
 
-        monkeypatch.setattr('urllib.request.urlopen', _raise)
+        _serve(monkeypatch, _raise)
         webhooks._deliver(hook['id'], hook['url'], 'approval.rejected', b'{}')
 
         deliveries = webhooks.get_deliveries(hook['id'])
@@ -364,18 +501,13 @@ class TestGetDeliveries:
         rec = deliveries[0]
         assert rec['status'] == 'error'
         assert rec['status_code'] is None
-        assert 'ConnectionError' in rec['error']
+        assert 'ConnectError' in rec['error']
 
     def test_deliveries_newest_first(self, monkeypatch):
         """Records are ordered newest-first."""
         hook = webhooks.register_webhook('https://example.com/')
 
-        class _FakeResp:
-            status = 200
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        monkeypatch.setattr('urllib.request.urlopen', lambda *a, **kw: _FakeResp())
+        _serve(monkeypatch, lambda request: httpx.Response(200))
         # Two deliveries
         webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{}')
         webhooks._deliver(hook['id'], hook['url'], 'approval.approved', b'{}')
@@ -385,16 +517,64 @@ class TestGetDeliveries:
         # Newest (approval.approved) should be first
         assert deliveries[0]['event'] == 'approval.approved'
 
+    def test_read_does_not_wait_for_lock(self, monkeypatch):
+        """get_deliveries must not block while a writer holds _lock."""
+        _serve(monkeypatch, lambda request: httpx.Response(200))
+        hook = webhooks.register_webhook('https://example.com/')
+        webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{}')
+        result: list = []
+        with webhooks._lock:
+            reader = threading.Thread(target=lambda: result.append(webhooks.get_deliveries(hook['id'])))
+            reader.start()
+            reader.join(timeout=2)
+        assert result and len(result[0]) == 1
+
+    def test_write_does_not_wait_for_lock(self, monkeypatch):
+        """Recording a delivery must not block behind registry calls on _lock."""
+        with webhooks._lock:
+            writer = threading.Thread(target=webhooks._log_delivery, args=('h1', {'event': 'e'}))
+            writer.start()
+            writer.join(timeout=2)
+            assert not writer.is_alive()
+        assert webhooks.get_deliveries('h1') == [{'event': 'e'}]
+
+    def test_delivery_completes_while_registry_locked(self, monkeypatch):
+        """A full _deliver run never touches _lock, e.g. behind a slow registry write."""
+        _serve(monkeypatch, lambda request: httpx.Response(200))
+        with webhooks._lock:
+            t = threading.Thread(target=webhooks._deliver,
+                                 args=('h1', 'https://x.test/', 'approval.created', b'{}'))
+            t.start()
+            t.join(timeout=2)
+            assert not t.is_alive()
+            assert webhooks.get_deliveries('h1')[0]['status'] == 'ok'
+
+    def test_log_bounded_newest_first(self, monkeypatch):
+        for i in range(webhooks._LOG_MAX + 5):
+            webhooks._log_delivery('h1', {'n': i})
+        log = webhooks.get_deliveries('h1', limit=webhooks._LOG_MAX)
+        assert len(log) == webhooks._LOG_MAX
+        assert log[0]['n'] == webhooks._LOG_MAX + 4
+        assert log[-1]['n'] == 5
+
+    def test_concurrent_first_writes_share_one_log(self):
+        barrier = threading.Barrier(8)
+
+        def write(i):
+            barrier.wait()
+            webhooks._log_delivery('h1', {'n': i})
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(r['n'] for r in webhooks.get_deliveries('h1')) == list(range(8))
+
     def test_limit_parameter(self, monkeypatch):
         """get_deliveries respects limit."""
         hook = webhooks.register_webhook('https://example.com/')
 
-        class _FakeResp:
-            status = 200
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        monkeypatch.setattr('urllib.request.urlopen', lambda *a, **kw: _FakeResp())
+        _serve(monkeypatch, lambda request: httpx.Response(200))
         for _ in range(5):
             webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{}')
 
@@ -434,12 +614,7 @@ class TestDeliveriesEndpoint:
         monkeypatch.setattr(_auth_mod, 'check_role', lambda token, role: True)
         hook = webhooks.register_webhook('https://example.com/')
 
-        class _FakeResp:
-            status = 201
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        monkeypatch.setattr('urllib.request.urlopen', lambda *a, **kw: _FakeResp())
+        _serve(monkeypatch, lambda request: httpx.Response(201))
         webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{}')
 
         r = client.get(f'/admin/webhooks/{hook["id"]}/deliveries', headers=_auth())
@@ -456,12 +631,7 @@ class TestDeliveriesEndpoint:
         monkeypatch.setattr(_auth_mod, 'check_role', lambda token, role: True)
         hook = webhooks.register_webhook('https://example.com/')
 
-        class _FakeResp:
-            status = 200
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        monkeypatch.setattr('urllib.request.urlopen', lambda *a, **kw: _FakeResp())
+        _serve(monkeypatch, lambda request: httpx.Response(200))
         for _ in range(5):
             webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{}')
 
@@ -482,19 +652,14 @@ class TestHMACSigning:
     """Verify that _deliver adds/omits X-Intelli-Signature-256 correctly."""
 
     def _captured_headers(self, monkeypatch) -> dict:
-        """Patch urlopen to capture the request headers and return 200."""
+        """Serve 200 from the delivery client and capture the request headers."""
         captured: dict = {}
 
-        class _FakeResp:
-            status = 200
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        def _fake_urlopen(req, *args, **kwargs):
-            captured.update(dict(req.headers))
-            return _FakeResp()
+        def _handler(request):
+            captured.update(request.headers)
+            return httpx.Response(200)
 
-        monkeypatch.setattr('urllib.request.urlopen', _fake_urlopen)
+        _serve(monkeypatch, _handler)
         return captured
 
     def test_signature_header_present_when_secret(self, monkeypatch):
@@ -545,7 +710,7 @@ class TestHMACSigning:
         """fire_webhooks should forward the stored secret when calling _deliver."""
         calls: list = []
 
-        def _fake_deliver(hook_id, url, event, body, secret=''):
+        def _fake_deliver(hook_id, url, event, body, secret='', signature=None, blocking=True):
             calls.append({'secret': secret})
 
         monkeypatch.setattr(webhooks, '_deliver', _fake_deliver)
@@ -556,6 +721,63 @@ class TestHMACSigning:
         import time; time.sleep(0.05)
         assert any(c['secret'] == 'passme' for c in calls)
 
+    def test_fire_webhooks_signs_each_secret_once(self, monkeypatch):
+        """Hooks sharing a secret get one precomputed, correct signature."""
+        calls: list = []
+        signed: list = []
+        real_sign = webhooks._sign
+
+        def _fake_deliver(hook_id, url, event, body, secret='', signature=None, blocking=True):
+            calls.append((secret, signature, body))
+
+        monkeypatch.setattr(webhooks, '_deliver', _fake_deliver)
+        monkeypatch.setattr(webhooks, '_sign', lambda sec, body: signed.append(sec) or real_sign(sec, body))
+        monkeypatch.setattr(webhooks._executor, 'submit', lambda fn, *a, **kw: fn(*a, **kw))
+
+        for secret in ('shared', 'shared', 'shared', 'other', ''):
+            webhooks.register_webhook('https://group.test/', secret=secret)
+        webhooks.fire_webhooks('approval.created', {'id': 1})
+
+        assert sorted(signed) == ['other', 'shared']
+        for secret, signature, body in calls:
+            expected = 'sha256=' + _hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            assert signature == (expected if secret else None)
+
+    def test_keyed_hmac_reused_across_deliveries(self):
+        webhooks._hmac_template.cache_clear()
+        for body in (b'{"n":1}', b'{"n":2}', b'{"n":3}'):
+            expected = 'sha256=' + _hmac.new(b'reuse', body, hashlib.sha256).hexdigest()
+            assert webhooks._sign('reuse', body) == expected
+        assert webhooks._hmac_template.cache_info().misses == 1
+
+    def test_delete_forgets_cached_secret(self):
+        hook = webhooks.register_webhook('https://gone.test/', secret='s3cret')
+        webhooks._sign('s3cret', b'{}')
+        assert webhooks._hmac_template.cache_info().currsize >= 1
+        webhooks.delete_webhook(hook['id'])
+        assert webhooks._hmac_template.cache_info().currsize == 0
+
+    def test_fire_webhooks_body_is_json(self, monkeypatch):
+        bodies: list = []
+        monkeypatch.setattr(webhooks, '_deliver', lambda *a, **kw: bodies.append(a[3]))
+        monkeypatch.setattr(webhooks._executor, 'submit', lambda fn, *a, **kw: fn(*a, **kw))
+        webhooks.register_webhook('https://body.test/')
+        webhooks.fire_webhooks('approval.created', {'id': 7, 'note': 'café'})
+        decoded = json.loads(bodies[0])
+        assert (decoded['event'], decoded['id'], decoded['note']) == ('approval.created', 7, 'café')
+
+    def test_payload_cannot_override_envelope(self, monkeypatch):
+        bodies: list = []
+        monkeypatch.setattr(webhooks, '_deliver', lambda *a, **kw: bodies.append(a[3]))
+        monkeypatch.setattr(webhooks._executor, 'submit', lambda fn, *a, **kw: fn(*a, **kw))
+        for _ in range(2):
+            webhooks.register_webhook('https://env.test/')
+        webhooks.fire_webhooks('approval.created', {'event': 'spoofed', 'timestamp': 'x', 'id': 1})
+        decoded = json.loads(bodies[0])
+        assert (decoded['event'], decoded['id']) == ('approval.created', 1)
+        assert decoded['timestamp'] != 'x'
+        assert bodies[0] is bodies[1]
+
     def test_create_webhook_endpoint_accepts_secret(self, client, monkeypatch):
         import auth as _auth_mod
         monkeypatch.setattr(_auth_mod, 'check_role', lambda token, role: True)
@@ -588,12 +810,7 @@ class TestDeliveryRetry:
 
     def test_attempts_recorded_on_success(self, monkeypatch):
         """Successful delivery on first try → attempts == 1."""
-        class _OK:
-            status = 200
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        monkeypatch.setattr('urllib.request.urlopen', lambda *a, **kw: _OK())
+        _serve(monkeypatch, lambda request: httpx.Response(200))
         monkeypatch.setattr(webhooks, '_MAX_RETRIES', 3)
         monkeypatch.setattr(_time, 'sleep', lambda s: None)
 
@@ -608,19 +825,11 @@ class TestDeliveryRetry:
         """First delivery returns 500, second returns 200 → status ok, attempts == 2."""
         call_count = {'n': 0}
 
-        class _Resp:
-            def __init__(self, code):
-                self.status = code
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        def _fake_urlopen(req, timeout=None):
+        def _handler(request):
             call_count['n'] += 1
-            if call_count['n'] < 2:
-                return _Resp(500)
-            return _Resp(200)
+            return httpx.Response(500 if call_count['n'] < 2 else 200)
 
-        monkeypatch.setattr('urllib.request.urlopen', _fake_urlopen)
+        _serve(monkeypatch, _handler)
         monkeypatch.setattr(webhooks, '_MAX_RETRIES', 3)
         monkeypatch.setattr(_time, 'sleep', lambda s: None)
 
@@ -634,18 +843,13 @@ class TestDeliveryRetry:
         """First delivery raises, second returns 200 → status ok, attempts == 2."""
         call_count = {'n': 0}
 
-        class _OK:
-            status = 200
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        def _fake_urlopen(req, timeout=None):
+        def _handler(request):
             call_count['n'] += 1
             if call_count['n'] < 2:
-                raise ConnectionError('refused')
-            return _OK()
+                raise httpx.ConnectError('refused')
+            return httpx.Response(200)
 
-        monkeypatch.setattr('urllib.request.urlopen', _fake_urlopen)
+        _serve(monkeypatch, _handler)
         monkeypatch.setattr(webhooks, '_MAX_RETRIES', 3)
         monkeypatch.setattr(_time, 'sleep', lambda s: None)
 
@@ -657,10 +861,10 @@ class TestDeliveryRetry:
 
     def test_all_retries_exhausted_records_error(self, monkeypatch):
         """Delivery always fails → status error, attempts == MAX_RETRIES."""
-        def _always_fail(*a, **kw):
-            raise ConnectionError('connection refused')
+        def _always_fail(request):
+            raise httpx.ConnectError('connection refused')
 
-        monkeypatch.setattr('urllib.request.urlopen', _always_fail)
+        _serve(monkeypatch, _always_fail)
         monkeypatch.setattr(webhooks, '_MAX_RETRIES', 3)
         monkeypatch.setattr(_time, 'sleep', lambda s: None)
 
@@ -671,16 +875,29 @@ class TestDeliveryRetry:
         assert recs[0]['attempts'] == 3
         assert recs[0]['error'] is not None
 
+    def test_retries_resend_precomputed_signature(self, monkeypatch):
+        """A signature passed in by fire_webhooks is reused on every attempt."""
+        sent: list = []
+
+        def _handler(request):
+            sent.append(request.headers['X-Intelli-Signature-256'])
+            return httpx.Response(503 if len(sent) < 3 else 200)
+
+        _serve(monkeypatch, _handler)
+        monkeypatch.setattr(webhooks, '_sign', lambda *a: pytest.fail('signature recomputed'))
+        monkeypatch.setattr(webhooks, '_MAX_RETRIES', 3)
+        monkeypatch.setattr(_time, 'sleep', lambda s: None)
+
+        hook = self._make_hook()
+        webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{}', 'k', 'sha256=precomputed')
+        assert sent == ['sha256=precomputed'] * 3
+        assert webhooks.get_deliveries(hook['id'])[0]['attempts'] == 3
+
     def test_no_sleep_on_single_attempt(self, monkeypatch):
         """With MAX_RETRIES == 1, time.sleep must never be called."""
         slept: list = []
 
-        class _OK:
-            status = 200
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        monkeypatch.setattr('urllib.request.urlopen', lambda *a, **kw: _OK())
+        _serve(monkeypatch, lambda request: httpx.Response(200))
         monkeypatch.setattr(webhooks, '_MAX_RETRIES', 1)
         monkeypatch.setattr(_time, 'sleep', lambda s: slept.append(s))
 
@@ -690,16 +907,126 @@ class TestDeliveryRetry:
 
     def test_attempts_field_absent_in_old_deliveries_is_int(self, monkeypatch):
         """Delivery log records always have an int 'attempts' field."""
-        class _OK:
-            status = 200
-            def __enter__(self): return self
-            def __exit__(self, *a): pass
-
-        monkeypatch.setattr('urllib.request.urlopen', lambda *a, **kw: _OK())
+        _serve(monkeypatch, lambda request: httpx.Response(200))
         monkeypatch.setattr(webhooks, '_MAX_RETRIES', 3)
         monkeypatch.setattr(_time, 'sleep', lambda s: None)
 
         hook = self._make_hook()
         webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{}')
         rec = webhooks.get_deliveries(hook['id'])[0]
-        assert isinstance(rec['attempts'], int) and rec['attempts'] >= 1
\ No newline at end of file
+        assert isinstance(rec['attempts'], int) and rec['attempts'] >= 1
+
+    def test_non_blocking_parks_back_off(self, monkeypatch):
+        """blocking=False never sleeps: each back-off is handed to the retry heap."""
+        statuses = iter([500, 503, 200])
+        _serve(monkeypatch, lambda request: httpx.Response(next(statuses)))
+        monkeypatch.setattr(webhooks, '_MAX_RETRIES', 3)
+        monkeypatch.setattr(_time, 'sleep', lambda s: pytest.fail('worker slept'))
+        parked: list = []
+        monkeypatch.setattr(webhooks, '_retry_later', lambda delay, steps: parked.append((delay, steps)))
+
+        hook = self._make_hook()
+        webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{}', blocking=False)
+        assert [d for d, _ in parked] == [1]
+        assert webhooks.get_deliveries(hook['id']) == []
+        webhooks._step(parked[0][1])           # back-off elapsed: attempt 2 fails
+        assert [d for d, _ in parked] == [1, 2]
+        webhooks._step(parked[1][1])           # attempt 3 succeeds
+        rec = webhooks.get_deliveries(hook['id'])[0]
+        assert (rec['status'], rec['attempts']) == ('ok', 3)
+
+    @pytest.mark.parametrize('secret', ['', 'k'])
+    def test_delivery_headers(self, monkeypatch, secret):
+        seen: list = []
+        _serve(monkeypatch, lambda request: seen.append(request.headers) or httpx.Response(200))
+        webhooks._deliver('hid', 'https://h.test/', 'approval.created', b'{}', secret)
+        h = seen[0]
+        assert (h['content-type'], h['x-gateway-event'], h['x-gateway-hook-id']) == (
+            'application/json', 'approval.created', 'hid')
+        assert ('x-intelli-signature-256' in h) is bool(secret)
+        assert dict(webhooks._BASE_HEADERS) == {'Content-Type': 'application/json'}
+
+    def test_retry_heap_resubmits_when_due(self, monkeypatch):
+        """Parked deliveries are resumed on the executor in due order."""
+        resumed: list = []
+        done = threading.Event()
+
+        def steps(name):
+            resumed.append(name)
+            if len(resumed) == 2:
+                done.set()
+            return
+            yield
+        webhooks._retry_later(0.05, steps('late'))
+        webhooks._retry_later(0.01, steps('early'))
+        assert done.wait(5)
+        assert resumed == ['early', 'late']
+
+class TestDeliveryClient:
+    """Deliveries share one pooled httpx client."""
+
+    def test_client_created_once(self, monkeypatch):
+        monkeypatch.setattr(webhooks, '_client', None)
+        client = webhooks._get_client()
+        assert webhooks._get_client() is client
+        assert client.timeout.read == webhooks._TIMEOUT
+
+    @pytest.mark.parametrize('has_h2', [True, False])
+    def test_http2_follows_h2_availability(self, monkeypatch, has_h2):
+        made: list = []
+        monkeypatch.setattr(webhooks, '_client', None)
+        monkeypatch.setattr(webhooks, '_HAS_H2', has_h2)
+        monkeypatch.setattr(webhooks.httpx, 'Client', lambda **kw: made.append(kw) or MagicMock())
+        webhooks._get_client()
+        assert made[0]['http2'] is has_h2
+
+    def test_keep_alive_connection_reused(self, monkeypatch):
+        """Repeat deliveries to one endpoint share a single TCP connection."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        connections: list = []
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                connections.append(self.client_address)
+                super().setup()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        monkeypatch.setattr(webhooks, '_client', None)
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/hook'
+            hook = webhooks.register_webhook(url)
+            for _ in range(3):
+                webhooks._deliver(hook['id'], url, 'approval.created', b'{}')
+        finally:
+            webhooks._client.close()
+            server.shutdown()
+            server.server_close()
+        assert [r['status_code'] for r in webhooks.get_deliveries(hook['id'])] == [200] * 3
+        assert len(connections) == 1
+
+    def test_body_posted_through_shared_client(self, monkeypatch):
+        seen: list = []
+
+        def _handler(request):
+            seen.append((request.method, str(request.url), request.content))
+            return httpx.Response(204)
+
+        _serve(monkeypatch, _handler)
+        hook = webhooks.register_webhook('https://pool.test/hook')
+        for _ in range(2):
+            webhooks._deliver(hook['id'], hook['url'], 'approval.created', b'{"a":1}')
+        assert seen == [('POST', 'https://pool.test/hook', b'{"a":1}')] * 2
+        assert webhooks.get_deliveries(hook['id'])[0]['status_code'] == 204
@@ -0,0 +1,484 @@
+"""Tests for workspace_manager.py.
+
+Covers:
+  - list_files: recursive listing, relative paths, sorted like Path objects,
+    directory symlinks not followed; iter_files streams the same entries;
+    depth-limited walks (also via GET /workspace/files?depth=)
+  - _parse_skill_frontmatter: leading block parsed alone (heading still names a
+    nameless skill), line-scan fallback
+  - list_skills: scandir listing, frontmatter cached by mtime, re-parsed after
+    edits, empty SKILL.md never parsed, only the head of SKILL.md read
+  - _safe_path: traversal, sibling-prefix and symlink escapes rejected, workspace root resolved once
+  - read_file / write_file / create_skill: binary I/O, text-mode newline semantics
+  - skills_version: bumped by every write under skills/, and only those
+  - per-path write locks: unrelated writes don't wait, same-skill creates serialise
+  - build_system_prompt: cached until a source file changes
+  - build_page_context_block: truncation, repeat snapshots served from a cache
+    keyed on the truncated slice
+  - _ensure_root: seeds each root once per process
+  - _seed_defaults: Skill Creator section refreshed in place
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+import workspace_manager
+
+
+@pytest.fixture()
+def ws(tmp_path, monkeypatch):
+    """Point the workspace root at a temp dir."""
+    root = tmp_path / 'workspace'
+    monkeypatch.setattr(workspace_manager, '_WORKSPACE_ROOT', root)
+    monkeypatch.setattr(workspace_manager, '_seeded_root', None)
+    monkeypatch.setattr(workspace_manager, '_skill_meta_cache', {})
+    return root
+
+
+class TestListFiles:
+    def test_matches_rglob_listing(self, ws):
+        workspace_manager.write_file('context/a-b.md', 'x')
+        workspace_manager.write_file('context/a/deep.txt', 'yy')
+        workspace_manager.write_file('context/a.md', 'zzz')
+        files = workspace_manager.list_files()
+        expected = [str(p.relative_to(ws)) for p in sorted(ws.rglob('*')) if p.is_file()]
+        assert [f['path'] for f in files] == expected
+        sizes = {f['path']: f['size'] for f in files}
+        assert sizes[os.path.join('context', 'a', 'deep.txt')] == 2
+        assert all(f['modified'].endswith('+00:00') for f in files)
+
+    def test_symlinks_match_rglob(self, ws, tmp_path):
+        outside = tmp_path / 'outside'
+        outside.mkdir()
+        (outside / 'secret.txt').write_text('s')
+        root = workspace_manager._ensure_root()
+        (root / 'context' / 'linked-dir').symlink_to(outside, target_is_directory=True)
+        (root / 'context' / 'linked-file.txt').symlink_to(outside / 'secret.txt')
+        paths = [f['path'] for f in workspace_manager.list_files()]
+        expected = [str(p.relative_to(ws)) for p in sorted(ws.rglob('*')) if p.is_file()]
+        assert paths == expected
+        assert os.path.join('context', 'linked-file.txt') in paths
+        assert not any('secret.txt' in p for p in paths)
+
+    def test_iter_files_is_lazy(self, ws):
+        workspace_manager.write_file('context/a.md', 'a')
+        workspace_manager.write_file('context/b.md', 'b')
+        it = workspace_manager.iter_files()
+        assert iter(it) is it
+        first = next(it)
+        assert set(first) == {'path', 'size', 'modified'}
+        rest = list(it)
+        assert sorted(f['path'] for f in [first, *rest]) == sorted(
+            f['path'] for f in workspace_manager.list_files())
+
+    def test_depth_limits_walk(self, ws):
+        workspace_manager.write_file('top.md', 't')
+        workspace_manager.write_file('context/one.md', '1')
+        workspace_manager.write_file('context/deeper/two.md', '2')
+        top = [f['path'] for f in workspace_manager.list_files(depth=1)]
+        assert 'top.md' in top and not any(os.sep in p for p in top)
+        two = [f['path'] for f in workspace_manager.list_files(depth=2)]
+        assert os.path.join('context', 'one.md') in two
+        assert os.path.join('context', 'deeper', 'two.md') not in two
+        assert os.path.join('context', 'deeper', 'two.md') in [
+            f['path'] for f in workspace_manager.list_files()]
+
+    def test_depth_query_param(self, ws, monkeypatch):
+        from starlette.testclient import TestClient
+        import app as app_mod
+        monkeypatch.setattr(app_mod, '_require_admin_token', lambda request: None)
+        workspace_manager.write_file('context/one.md', '1')
+        client = TestClient(app_mod.app)
+        shallow = client.get('/workspace/files', params={'depth': 1}).json()['files']
+        full = client.get('/workspace/files').json()['files']
+        assert len(shallow) < len(full)
+        assert client.get('/workspace/files', params={'depth': 0}).status_code == 422
+
+    def test_directories_are_not_listed(self, ws):
+        (Path(workspace_manager._ensure_root()) / 'context' / 'empty').mkdir()
+        paths = [f['path'] for f in workspace_manager.list_files()]
+        assert not any(p.endswith('empty') for p in paths)
+
+
+class TestParseSkillFrontmatter:
+    def test_fenced_block(self):
+        text = '---\nName: Demo\ndescription: does things\nversion: 1.2\n---\n# Ignored\n'
+        meta = workspace_manager._parse_skill_frontmatter(text)
+        assert meta == {'name': 'Demo', 'description': 'does things', 'version': '1.2'}
+
+    def test_heading_used_when_no_name(self):
+        meta = workspace_manager._parse_skill_frontmatter('# My Skill\n\nbody text')
+        assert meta == {'name': 'My Skill'}
+
+    def test_heading_after_block_names_nameless_skill(self):
+        text = '---\ndescription: x\n---\n# My Skill\nbody'
+        assert workspace_manager._parse_skill_frontmatter(text) == {'description': 'x', 'name': 'My Skill'}
+        assert workspace_manager.validate_skill(text)['valid']
+
+    def test_heading_after_block_only_within_20_lines(self):
+        text = '---\ndescription: x\n---\n' + 'filler\n' * 20 + '# Too Late\n'
+        assert workspace_manager._parse_skill_frontmatter(text) == {'description': 'x'}
+
+    def test_heading_inside_fence_ignored(self):
+        meta = workspace_manager._parse_skill_frontmatter('---\n# not a name\n---\n')
+        assert meta == {}
+
+    def test_body_pairs_after_block_ignored(self):
+        text = '---\nname: Demo\ndescription: d\n---\n\nExample: not metadata\n'
+        assert workspace_manager._parse_skill_frontmatter(text) == {'name': 'Demo', 'description': 'd'}
+
+    def test_crlf_block(self):
+        text = '---\r\nname: Demo\r\nversion: 2\r\n---\r\nbody'
+        assert workspace_manager._parse_skill_frontmatter(text) == {'name': 'Demo', 'version': '2'}
+
+    def test_bare_key_does_not_take_next_line(self):
+        text = '---\nname:\ndescription: d\n---\n'
+        assert workspace_manager._parse_skill_frontmatter(text) == {'description': 'd'}
+
+    def test_line_scan_crlf_and_limit(self):
+        text = '# Title\r\nversion: 3\r\n' + 'filler\r\n' * 30 + 'late: ignored\r\n'
+        assert workspace_manager._parse_skill_frontmatter(text) == {'name': 'Title', 'version': '3'}
+
+    def test_colonless_lines_skip_regex(self, monkeypatch):
+        seen: list = []
+
+        class _Spy:
+            def match(self, line):
+                seen.append(line)
+                return workspace_manager.re.compile(r'^(\w[\w ]{0,80}):\s*([^\r\n]{1,500})').match(line)
+        monkeypatch.setattr(workspace_manager, '_FM_LINE_RE', _Spy())
+        meta = workspace_manager._parse_skill_frontmatter('# Title\nplain text\nversion: 1\n')
+        assert meta == {'name': 'Title', 'version': '1'}
+        assert seen == ['version: 1']
+
+    def test_pattern_is_precompiled(self, monkeypatch):
+        def boom(*a, **k):
+            raise AssertionError('re.match called per line')
+        monkeypatch.setattr(workspace_manager.re, 'match', boom)
+        assert workspace_manager._parse_skill_frontmatter('name: x')['name'] == 'x'
+
+
+class TestListSkillsCache:
+    def _count_parses(self, monkeypatch):
+        calls = []
+        real = workspace_manager._parse_skill_frontmatter
+
+        def counting(text):
+            calls.append(text)
+            return real(text)
+        monkeypatch.setattr(workspace_manager, '_parse_skill_frontmatter', counting)
+        return calls
+
+    def test_unchanged_skills_not_reparsed(self, ws, monkeypatch):
+        first = workspace_manager.list_skills()
+        calls = self._count_parses(monkeypatch)
+        assert workspace_manager.list_skills() == first
+        assert calls == []
+
+    def test_edited_skill_reparsed(self, ws, monkeypatch):
+        workspace_manager.create_skill('demo', 'Demo', 'old', 'body')
+        workspace_manager.list_skills()
+        skill_md = ws / 'skills' / 'demo' / 'SKILL.md'
+        skill_md.write_text('---\nname: Demo\ndescription: brand new text\n---\n', encoding='utf-8')
+        st = skill_md.stat()
+        os.utime(skill_md, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        calls = self._count_parses(monkeypatch)
+        skills = {s['slug']: s for s in workspace_manager.list_skills()}
+        assert skills['demo']['description'] == 'brand new text'
+        assert len(calls) == 1
+
+    def test_skill_without_skill_md(self, ws):
+        (workspace_manager._ensure_root() / 'skills' / 'bare').mkdir()
+        skills = {s['slug']: s for s in workspace_manager.list_skills()}
+        assert skills['bare']['name'] == 'bare'
+
+    def test_empty_skill_md_not_parsed(self, ws, monkeypatch):
+        empty = workspace_manager._ensure_root() / 'skills' / 'empty'
+        empty.mkdir()
+        (empty / 'SKILL.md').touch()
+        calls = self._count_parses(monkeypatch)
+        skills = {s['slug']: s for s in workspace_manager.list_skills()}
+        assert skills['empty']['name'] == 'empty'
+        assert '' not in calls
+
+    def test_only_head_of_large_skill_read(self, ws, monkeypatch):
+        workspace_manager.create_skill('big', 'Big', 'large body', 'x' * 100_000)
+        calls = self._count_parses(monkeypatch)
+        skills = {s['slug']: s for s in workspace_manager.list_skills()}
+        assert skills['big']['name'] == 'Big'
+        assert skills['big']['description'] == 'large body'
+        assert all(len(c) <= workspace_manager._SKILL_HEAD_BYTES for c in calls)
+
+    def test_head_drops_cut_off_line(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(workspace_manager, '_SKILL_HEAD_BYTES', 32)
+        skill_md = tmp_path / 'SKILL.md'
+        skill_md.write_bytes(b'name: Short\ndescription: ' + b'd' * 100 + b'\n')
+        assert workspace_manager._read_skill_head(skill_md) == 'name: Short\n'
+
+    def test_sorted_dirs_only(self, ws):
+        skills_dir = workspace_manager._ensure_root() / 'skills'
+        for slug in ('zeta', 'alpha'):
+            (skills_dir / slug).mkdir()
+        (skills_dir / 'stray.txt').write_text('x', encoding='utf-8')
+        slugs = [s['slug'] for s in workspace_manager.list_skills()]
+        assert slugs == sorted(slugs)
+        assert {'alpha', 'zeta'} <= set(slugs) and 'stray.txt' not in slugs
+
+
+class TestReadWriteFile:
+    def test_round_trip_and_size(self, ws):
+        info = workspace_manager.write_file('context/u.md', 'héllo\nwörld')
+        assert info['size'] == len('héllo\nwörld'.encode('utf-8'))
+        assert workspace_manager.read_file('context/u.md') == 'héllo\nwörld'
+
+    def test_read_normalises_newlines(self, ws):
+        workspace_manager._ensure_root()
+        (ws / 'context' / 'crlf.txt').write_bytes(b'a\r\nb\rc\n')
+        assert workspace_manager.read_file('context/crlf.txt') == 'a\nb\nc\n'
+
+    def test_missing_file(self, ws):
+        with pytest.raises(FileNotFoundError, match='workspace file not found'):
+            workspace_manager.read_file('context/nope.md')
+
+    def test_large_file(self, ws):
+        content = 'x' * (3 * 1024 * 1024 + 7)
+        assert workspace_manager.write_file('context/big.txt', content)['size'] == len(content)
+        assert workspace_manager.read_file('context/big.txt') == content
+
+    def test_create_skill_header(self, ws):
+        workspace_manager.create_skill('hello', 'Héllo', 'says hi', 'body\n')
+        raw = (ws / 'skills' / 'hello' / 'SKILL.md').read_bytes().decode('utf-8')
+        assert raw.startswith('---\nname: Héllo\ndescription: says hi\ncreated: ')
+        assert raw.endswith('\n---\n\nbody\n')
+        assert workspace_manager.get_skill('hello')['name'] == 'Héllo'
+
+    def test_create_existing_skill_rejected(self, ws):
+        workspace_manager.create_skill('dup', 'Dup', 'd', 'one')
+        with pytest.raises(ValueError, match='already exists'):
+            workspace_manager.create_skill('dup', 'Dup', 'd', 'two')
+        assert (ws / 'skills' / 'dup' / 'SKILL.md').read_text(encoding='utf-8').endswith('one')
+
+
+class TestSkillsVersion:
+    def test_skill_writes_bump_version(self, ws):
+        seen = [workspace_manager.skills_version]
+        workspace_manager.create_skill('v', 'V', 'd', 'body')
+        seen.append(workspace_manager.skills_version)
+        workspace_manager.update_skill('v', '---\nname: V2\n---\n')
+        seen.append(workspace_manager.skills_version)
+        workspace_manager.write_file('skills/v/extra.md', 'x')
+        seen.append(workspace_manager.skills_version)
+        workspace_manager.delete_file('skills/v/extra.md')
+        seen.append(workspace_manager.skills_version)
+        workspace_manager.delete_skill('v')
+        seen.append(workspace_manager.skills_version)
+        assert seen == sorted(set(seen))   # strictly increasing
+
+    def test_other_files_leave_version(self, ws):
+        before = workspace_manager.skills_version
+        workspace_manager.write_file('context/n.md', 'x')
+        workspace_manager.delete_file('context/n.md')
+        assert workspace_manager.skills_version == before
+
+
+class TestSafePath:
+    def test_inside_root(self, ws):
+        p = workspace_manager._safe_path('context/notes.md')
+        assert p == Path(os.path.realpath(ws)) / 'context' / 'notes.md'
+
+    @pytest.mark.parametrize('rel', ['../escape.txt', 'context/../../x', '/etc/passwd'])
+    def test_escape_rejected(self, ws, rel):
+        with pytest.raises(ValueError, match='escapes'):
+            workspace_manager._safe_path(rel)
+
+    def test_sibling_with_root_prefix_rejected(self, ws):
+        sibling = ws.parent / (ws.name + 'plus')
+        sibling.mkdir()
+        with pytest.raises(ValueError, match='escapes'):
+            workspace_manager._safe_path(f'../{sibling.name}/x.md')
+
+    def test_root_itself_rejected(self, ws):
+        with pytest.raises(ValueError, match='escapes'):
+            workspace_manager._safe_path('.')
+
+    def test_symlinked_directory_escape_rejected(self, ws, tmp_path):
+        outside = tmp_path / 'outside'
+        outside.mkdir()
+        (workspace_manager._ensure_root() / 'context' / 'link').symlink_to(outside, target_is_directory=True)
+        with pytest.raises(ValueError, match='escapes'):
+            workspace_manager._safe_path('context/link/x.md')
+        with pytest.raises(ValueError, match='escapes'):
+            workspace_manager.write_file('context/link/x.md', 'nope')
+        assert not (outside / 'x.md').exists()
+
+    def test_root_resolved_once(self, ws, monkeypatch):
+        workspace_manager._safe_path('a.md')
+        resolved: list = []
+        real = os.path.realpath
+        monkeypatch.setattr(workspace_manager.os.path, 'realpath', lambda p: resolved.append(p) or real(p))
+        workspace_manager._safe_path('b.md')
+        workspace_manager._safe_path('c.md')
+        assert len(resolved) == 2   # only the joined candidate paths
+
+
+class TestBuildSystemPrompt:
+    def test_joins_files(self, ws):
+        workspace_manager._ensure_root()
+        (ws / 'SOUL.md').write_text('soul\n', encoding='utf-8')
+        (ws / 'TOOLS.md').write_text('tools', encoding='utf-8')
+        agents = (ws / 'AGENTS.md').read_text(encoding='utf-8').strip()
+        assert workspace_manager.build_system_prompt() == agents + '\n\n---\n\nsoul'
+        assert workspace_manager.build_system_prompt(include_tools=True).endswith('---\n\ntools')
+
+    def test_unchanged_files_not_reread(self, ws, monkeypatch):
+        first = workspace_manager.build_system_prompt(include_tools=True)
+        reads: list = []
+        real = Path.read_text
+        monkeypatch.setattr(Path, 'read_text', lambda self, *a, **k: reads.append(self.name) or real(self, *a, **k))
+        assert workspace_manager.build_system_prompt(include_tools=True) == first
+        assert 'SOUL.md' not in reads and 'TOOLS.md' not in reads
+
+    def test_edit_invalidates(self, ws):
+        workspace_manager.build_system_prompt()
+        soul = ws / 'SOUL.md'
+        soul.write_text('a different soul', encoding='utf-8')
+        assert workspace_manager.build_system_prompt().endswith('a different soul')
+
+    def test_outdated_skill_creator_section_replaced(self, ws):
+        workspace_manager._ensure_root()
+        agents = ws / 'AGENTS.md'
+        agents.write_text('# Mine\n\nkeep me\n\n## Skill Creator\nold text\n', encoding='utf-8')
+        workspace_manager._seed_defaults()
+        text = agents.read_text(encoding='utf-8')
+        assert text == '# Mine\n\nkeep me\n\n' + workspace_manager._SKILL_CREATOR_SECTION
+
+    def test_concurrent_callers_agree(self, ws):
+        import threading
+        expected = workspace_manager.build_system_prompt(include_tools=True)
+        results: list = []
+        threads = [threading.Thread(target=lambda: results.append(
+            workspace_manager.build_system_prompt(include_tools=True))) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == [expected] * 16
+
+    def test_include_tools_cached_separately(self, ws):
+        without = workspace_manager.build_system_prompt()
+        with_tools = workspace_manager.build_system_prompt(include_tools=True)
+        assert with_tools.startswith(without) and len(with_tools) > len(without)
+        assert workspace_manager.build_system_prompt() == without
+
+    def test_seeding_leaves_agents_md_untouched(self, ws):
+        workspace_manager._ensure_root()
+        before = (ws / 'AGENTS.md').stat().st_mtime_ns
+        os.utime(ws / 'AGENTS.md', ns=(before - 10**9, before - 10**9))
+        workspace_manager._seed_defaults()
+        assert (ws / 'AGENTS.md').stat().st_mtime_ns == before - 10**9
+
+
+class TestBuildPageContextBlock:
+    def test_short_html_not_truncated(self):
+        block = workspace_manager.build_page_context_block(
+            {'url': 'https://a.test', 'title': 'A', 'html': '<p>hi</p>'})
+        assert block == ('## Active browser tab\n**URL**: https://a.test\n**Title**: A\n\n'
+                         '### Page HTML source\n```html\n<p>hi</p>\n```')
+
+    def test_long_html_truncated(self):
+        block = workspace_manager.build_page_context_block({'html': 'x' * 20}, max_html=5)
+        assert '```html\nxxxxx\n\n[… HTML truncated at 5 chars …]\n```' in block
+
+    def test_repeat_snapshot_reuses_block(self):
+        snap = {'url': 'https://b.test', 'title': 'B', 'html': 'y' * 10_000}
+        first = workspace_manager.build_page_context_block(snap)
+        assert workspace_manager.build_page_context_block(dict(snap)) is first
+        snap['html'] = 'z' * 10_000
+        assert workspace_manager.build_page_context_block(snap) is not first
+
+    def test_cache_keyed_on_slice_not_full_page(self):
+        workspace_manager._format_page_block.cache_clear()
+        page = 'p' * 2_000_000
+        first = workspace_manager.build_page_context_block({'html': page + 'a'})
+        assert workspace_manager.build_page_context_block({'html': page + 'b'}) is first
+        assert workspace_manager._format_page_block.cache_info().currsize == 1
+
+
+class TestEnsureRoot:
+    def test_seeds_once_per_root(self, ws, monkeypatch):
+        calls: list = []
+        real = workspace_manager._seed_defaults
+        monkeypatch.setattr(workspace_manager, '_seed_defaults', lambda: calls.append(1) or real())
+        for _ in range(3):
+            assert workspace_manager._ensure_root() == ws
+        assert len(calls) == 1
+        assert (ws / 'AGENTS.md').exists() and (ws / 'skills' / 'web-search' / 'SKILL.md').exists()
+
+    def test_existing_builtins_kept(self, ws):
+        ws.mkdir()
+        (ws / 'SOUL.md').write_text('custom soul', encoding='utf-8')
+        workspace_manager._ensure_root()
+        assert (ws / 'SOUL.md').read_text(encoding='utf-8') == 'custom soul'
+        assert (ws / 'TOOLS.md').read_text(encoding='utf-8') == workspace_manager._DEFAULT_TOOLS_MD
+
+    def test_builtin_checks_use_one_scandir(self, ws, monkeypatch):
+        workspace_manager._ensure_root()
+        probed: list = []
+        real_exists = Path.exists
+        monkeypatch.setattr(Path, 'exists', lambda self: probed.append(self.name) or real_exists(self))
+        workspace_manager._seed_defaults()
+        assert not set(probed) & set(workspace_manager.BUILTIN_FILES)
+
+    def test_fresh_agents_md_written_once(self, ws, monkeypatch):
+        writes: list = []
+        real_write_text, real_write_bytes = Path.write_text, Path.write_bytes
+        monkeypatch.setattr(Path, 'write_text', lambda self, *a, **k: writes.append(self.name) or real_write_text(self, *a, **k))
+        monkeypatch.setattr(Path, 'write_bytes', lambda self, *a, **k: writes.append(self.name) or real_write_bytes(self, *a, **k))
+        workspace_manager._ensure_root()
+        assert writes.count('AGENTS.md') == 1
+        assert (ws / 'AGENTS.md').read_text(encoding='utf-8').endswith(workspace_manager._SKILL_CREATOR_SECTION)
+
+    def test_new_root_is_seeded(self, ws, tmp_path, monkeypatch):
+        workspace_manager._ensure_root()
+        other = tmp_path / 'other'
+        monkeypatch.setattr(workspace_manager, '_WORKSPACE_ROOT', other)
+        assert workspace_manager._ensure_root() == other
+        assert (other / 'SOUL.md').exists()
+
+
+class TestPathLocks:
+    def test_unrelated_write_not_blocked(self, ws):
+        import threading
+        held = workspace_manager._path_lock(workspace_manager._safe_path('context/a.md'))
+        with held:
+            t = threading.Thread(target=workspace_manager.write_file, args=('context/b.md', 'b'))
+            t.start()
+            t.join(timeout=2)
+            assert not t.is_alive()
+
+    def test_same_path_shares_lock(self, ws):
+        p = workspace_manager._safe_path('context/a.md')
+        assert workspace_manager._path_lock(p) is workspace_manager._path_lock(p)
+
+    def test_concurrent_create_skill_single_winner(self, ws):
+        import threading
+        workspace_manager._ensure_root()
+        barrier = threading.Barrier(8)
+        outcomes: list = []
+
+        def create():
+            barrier.wait()
+            try:
+                workspace_manager.create_skill('race', 'Race', 'd', 'body')
+                outcomes.append('ok')
+            except ValueError:
+                outcomes.append('exists')
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(outcomes) == ['exists'] * 7 + ['ok']
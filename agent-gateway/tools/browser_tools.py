@@ -20,11 +20,18 @@ from __future__ import annotations
 import asyncio
 import base64
 import json
+import os
+import sys
 import time
 import uuid
 from typing import Any, Dict, Optional
 from collections import deque
 
+# The addon tools import gateway modules (addons.py); make them importable once
+_GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _GATEWAY_DIR not in sys.path:
+    sys.path.insert(0, _GATEWAY_DIR)
+
 # ---------------------------------------------------------------------------
 # Command queue (shared module state)
 # ---------------------------------------------------------------------------
@@ -221,10 +228,6 @@ async def browser_wait(selector: str, timeout: int = 10) -> str:
 def addon_list() -> str:
     """List all Intelli addons and their status."""
     try:
-        import sys, os
-        _gw = os.path.dirname(os.path.dirname(__file__))
-        if _gw not in sys.path:
-            sys.path.insert(0, _gw)
         import addons as _addons
         items = _addons.list_addons()
         if not items:
@@ -248,10 +251,7 @@ def addon_create(name: str, description: str, code_js: str, url_pattern: str = '
         url_pattern: Optional URL substring this addon should only run on.
     """
     try:
-        import sys, os, re
-        _gw = os.path.dirname(os.path.dirname(__file__))
-        if _gw not in sys.path:
-            sys.path.insert(0, _gw)
+        import re
         import addons as _addons
         slug = re.sub(r'[^a-zA-Z0-9_-]', '-', name.strip())
         addon = _addons.create_addon(slug, description, code_js, url_pattern=url_pattern)
@@ -269,10 +269,6 @@ def addon_activate(name: str) -> str:
         name: The addon name/slug to activate.
     """
     try:
-        import sys, os
-        _gw = os.path.dirname(os.path.dirname(__file__))
-        if _gw not in sys.path:
-            sys.path.insert(0, _gw)
         import addons as _addons
         _addons.activate_addon(name)
         return (
@@ -299,10 +295,6 @@ def addon_create_and_activate(name: str, description: str, code_js: str, url_pat
 
     # If the addon already exists, update its code instead of erroring out.
     try:
-        import sys, os
-        _gw = os.path.dirname(os.path.dirname(__file__))
-        if _gw not in sys.path:
-            sys.path.insert(0, _gw)
         import addons as _addons
         existing = _addons.get_addon(slug)
         if existing is not None:
@@ -322,10 +314,6 @@ def addon_deactivate(name: str) -> str:
         name: The addon name/slug to deactivate.
     """
     try:
-        import sys, os
-        _gw = os.path.dirname(os.path.dirname(__file__))
-        if _gw not in sys.path:
-            sys.path.insert(0, _gw)
         import addons as _addons
         _addons.deactivate_addon(name)
         return f'Addon "{name}" deactivated.'
@@ -342,10 +330,6 @@ def addon_delete(name: str) -> str:
         name: The addon name/slug to delete.
     """
     try:
-        import sys, os
-        _gw = os.path.dirname(os.path.dirname(__file__))
-        if _gw not in sys.path:
-            sys.path.insert(0, _gw)
         import addons as _addons
         _addons.delete_addon(name)
         return f'Addon "{name}" deleted.'
@@ -14,21 +14,35 @@ from typing import Union
 _MAX_PAGES    = int(os.environ.get('INTELLI_PDF_MAX_PAGES', '20'))
 _MAX_CHARS    = int(os.environ.get('INTELLI_PDF_MAX_CHARS', '40000'))
 _MAX_FILE_MB  = 20
+_MAX_FILE_BYTES = _MAX_FILE_MB * 1024 * 1024
 
 
-def _fetch_bytes(url: str, timeout: int = 30) -> bytes:
-    """Fetch a URL and return raw bytes."""
+def _fetch_bytes(url: str, timeout: int = 30, max_bytes: int = _MAX_FILE_BYTES) -> bytes:
+    """Fetch a URL and return raw bytes, aborting once *max_bytes* is exceeded.
+
+    The body is streamed, so an oversized PDF is rejected from its
+    Content-Length header (or after max_bytes have arrived) instead of being
+    downloaded in full first.
+    """
     import httpx
-    r = httpx.get(
+    too_large = ValueError(f'PDF too large (>{max_bytes // (1024 * 1024)} MB).')
+    with httpx.stream(
+        'GET',
         url,
         follow_redirects=True,
         timeout=timeout,
         headers={'User-Agent': 'IntelliPDFReader/1.0'},
-    )
-    r.raise_for_status()
-    if len(r.content) > _MAX_FILE_MB * 1024 * 1024:
-        raise ValueError(f'PDF too large (>{_MAX_FILE_MB} MB).')
-    return r.content
+    ) as r:
+        r.raise_for_status()
+        declared = r.headers.get('Content-Length', '')
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise too_large
+        buf = bytearray()
+        for chunk in r.iter_bytes():
+            buf += chunk
+            if len(buf) > max_bytes:
+                raise too_large
+    return bytes(buf)
 
 
 def _extract_text_from_bytes(pdf_bytes: bytes, max_pages: int) -> tuple[str, int]:
@@ -53,6 +67,7 @@ def pdf_read(
     url: str = '',
     path: str = '',
     max_pages: int = _MAX_PAGES,
+    max_bytes: int = _MAX_FILE_BYTES,
 ) -> str:
     """Extract text from a PDF given a URL or local file path.
 
@@ -60,6 +75,7 @@ def pdf_read(
         url:       HTTP/HTTPS URL of the PDF (use this OR path).
         path:      Local file path of the PDF (use this OR url).
         max_pages: Maximum number of pages to extract (default 20).
+        max_bytes: Download / file size limit (default 20 MB).
 
     Returns plain text with page separators, truncated to 40 000 chars.
     Includes a header showing total/extracted page counts.
@@ -76,7 +92,7 @@ def pdf_read(
             p = urlparse(url)
             if p.scheme not in ('http', 'https'):
                 return '[ERROR] Only http/https URLs are supported.'
-            pdf_bytes = _fetch_bytes(url)
+            pdf_bytes = _fetch_bytes(url, max_bytes=max_bytes)
             source = url
         else:
             fp = pathlib.Path(path).expanduser().resolve()
@@ -97,8 +113,8 @@ def pdf_read(
                 return f'[ERROR] File not found: {path}'
             if fp.suffix.lower() not in ('.pdf',):
                 return '[ERROR] File does not appear to be a PDF.'
-            if fp.stat().st_size > _MAX_FILE_MB * 1024 * 1024:
-                return f'[ERROR] File too large (>{_MAX_FILE_MB} MB).'
+            if fp.stat().st_size > max_bytes:
+                return f'[ERROR] File too large (>{max_bytes // (1024 * 1024)} MB).'
             pdf_bytes = fp.read_bytes()
             source = str(fp)
 
@@ -14,14 +14,81 @@ Protocol (provider-agnostic plain-text):
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import concurrent.futures as _cf
+import functools
+import importlib
+import inspect
 import json
+import logging
+import os
+import queue
 import re
+import sys
 import threading
+import time
 import traceback
-from typing import Any
+from collections import OrderedDict, deque
+from typing import Any, Callable
 
 from tools.web_tools import TOOLS as _WEB_TOOLS
 
+try:
+    import orjson as _orjson  # type: ignore
+    _HAS_ORJSON = True
+except ImportError:
+    _orjson = None  # type: ignore
+    _HAS_ORJSON = False
+
+log = logging.getLogger(__name__)
+
+# Full (3-frame) tracebacks in tool error results; off by default since the
+# LLM rarely needs them and they cost tokens.  The trace is always available
+# in the debug log.
+_VERBOSE_ERRORS = os.environ.get('INTELLI_TOOL_RUNNER_VERBOSE', '') == '1'
+
+# Gateway root (one level up from tools/) — made importable once, here, so
+# tool functions can lazily import gateway modules (scheduler, notes, ...)
+# without touching sys.path on every call.
+_GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _GATEWAY_DIR not in sys.path:
+    sys.path.insert(0, _GATEWAY_DIR)
+
+
+@functools.cache
+def _lazy(module: str):
+    """Import a gateway module on first use and keep the reference.
+
+    Tool functions call this instead of a function-level ``import``, so a
+    tool call costs a dict lookup rather than a trip through the import
+    system (and its lock).  Failed imports are not cached.
+    """
+    return importlib.import_module(module)
+
+
+@functools.cache
+def _scheduler():
+    import scheduler
+    return scheduler
+
+
+@functools.cache
+def _watcher():
+    import watcher
+    return watcher
+
+
+@functools.cache
+def _approval_gate():
+    """approval_gate module, or None when it is unavailable (no gating)."""
+    try:
+        import approval_gate
+    except ImportError:
+        return None
+    return approval_gate
+
+
 # ---------------------------------------------------------------------------
 # Per-thread context (session_id + approval event queue)
 # ---------------------------------------------------------------------------
@@ -41,8 +108,7 @@ _APPROVAL_TOOLS: frozenset[str] = frozenset({
 def _canvas_render(html: str, title: str = '') -> str:
     """Render HTML into the Intelli Canvas panel."""
     try:
-        import canvas_manager as _cm
-        _cm.get_canvas().render(html, title)
+        _lazy('canvas_manager').get_canvas().render(html, title)
         return f'Canvas updated: {len(html)} chars rendered. The user can see it in the Canvas panel.'
     except Exception as exc:
         return f'[ERROR] canvas_render failed: {exc}'
@@ -51,7 +117,78 @@ def _canvas_render(html: str, title: str = '') -> str:
 # Tool registry
 # ---------------------------------------------------------------------------
 
-_REGISTRY: dict[str, dict] = {}
+def _arg_plan(spec: dict) -> tuple[tuple[str, bool, bool], ...]:
+    """(arg name, required, integer-typed) per declared arg, for _bind_args."""
+    return tuple(
+        (arg_name, arg_spec.get('required', True), arg_spec.get('type') == 'integer')
+        for arg_name, arg_spec in spec.get('args', {}).items()
+    )
+
+
+def _render_tool_entry(name: str, spec: dict) -> str:
+    """Format one tool's entry for the "### Tools" catalog."""
+    arg_parts = []
+    for arg_name, arg_spec in spec.get('args', {}).items():
+        req  = '' if arg_spec.get('required', True) else ' (optional)'
+        desc = arg_spec.get('description', '')
+        arg_parts.append(f'    {arg_name!r}: {arg_spec.get("type", "string")}{req} — {desc}')
+    args_str = '\n'.join(arg_parts) if arg_parts else '    (none)'
+    return f'• {name}\n  Description: {spec.get("description", "")}\n  Args:\n{args_str}'
+
+
+class _ToolRegistry(dict):
+    """Tool-name → spec mapping that counts its own mutations.
+
+    ``version`` is bumped on every insert or removal so derived views (the
+    rendered tool catalog) can be cached and invalidated cheaply — including
+    when plugin_loader / mcp_client edit the registry directly.  Each spec's
+    catalog entry is rendered once on insert and stored as ``spec['_block']``,
+    and its arg-binding plan as ``spec['_arg_plan']``; re-assigning a spec
+    rebuilds both.  Names are interned on insert.
+    """
+
+    version = 0
+
+    def __setitem__(self, key, value):
+        if isinstance(key, str):
+            key = sys.intern(key)  # lookups by an interned name compare by identity
+        if isinstance(value, dict):
+            value['_block'] = _render_tool_entry(key, value)
+            value['_arg_plan'] = _arg_plan(value)
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, key, *default):
+        self.version += 1
+        return super().pop(key, *default)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+
+_REGISTRY: _ToolRegistry = _ToolRegistry()
 _REGISTRY.update(_WEB_TOOLS)
 _REGISTRY['canvas_render'] = {
     'fn': _canvas_render,
@@ -69,31 +206,97 @@ _REGISTRY['canvas_render'] = {
 
 # ---- Memory tools --------------------------------------------------------
 
+# Line breaks and tabs flattened in result snippets, in one C-level pass.
+_NL_TO_SPACE = str.maketrans({'\n': ' ', '\r': ' ', '\t': ' '})
+
+
+def _format_memory_results(results: list[dict]) -> str:
+    if not results:
+        return 'No relevant memories found.'
+    fmt_age = _lazy('memory_store')._fmt_age
+    lines = []
+    for r in results:
+        meta    = r['metadata']
+        src     = meta.get('source', '?')
+        label   = meta.get('url', '') or meta.get('title', 'unknown')
+        age     = fmt_age(meta.get('timestamp_unix', 0))
+        snippet = r['text'][:300].translate(_NL_TO_SPACE)
+        lines.append(f'[{src}] {label} ({age}, score={r["score"]})\n  {snippet}')
+    return '\n\n'.join(lines)
+
+
+# Opt-in reuse of recent memory_search results for near-identical queries
+# ("latest Rust news" vs "latest rust news?"), common when the agent refines
+# a query over several rounds.  Entries expire after _FUZZY_TTL seconds and
+# whenever the store changes (MemoryStore.version).  Enabled with
+# MEM_FUZZY_CACHE=1; INTELLI_MEM_FUZZY_CACHE, matching the other gateway
+# settings, takes precedence when set.
+_FUZZY_MEMORY_CACHE = os.environ.get(
+    'INTELLI_MEM_FUZZY_CACHE', os.environ.get('MEM_FUZZY_CACHE', '')
+) == '1'
+_FUZZY_TTL = 300.0
+_FUZZY_THRESHOLD = 0.95   # Jaccard similarity of character 4-grams
+# (4-gram set, n, store version, monotonic time, formatted result)
+_RECENT_QUERIES: deque[tuple[frozenset[str], int, int, float, str]] = deque(maxlen=64)
+_RECENT_LOCK = threading.Lock()
+_PUNCT_RE = re.compile(r'[^\w\s]+')
+
+
+def _query_shingles(query: str) -> frozenset[str]:
+    """Character 4-grams of *query* after lowercasing and dropping punctuation."""
+    norm = ' '.join(_PUNCT_RE.sub(' ', query.lower()).split())
+    if len(norm) < 4:
+        return frozenset((norm,))
+    return frozenset(norm[i:i + 4] for i in range(len(norm) - 3))
+
+
+def _recent_search(shingles: frozenset[str], n: int, version: int) -> str | None:
+    """A cached result for a query similar enough to *shingles*, if any."""
+    now = time.monotonic()
+    with _RECENT_LOCK:
+        for seen, seen_n, seen_version, ts, result in reversed(_RECENT_QUERIES):
+            if seen_n != n or seen_version != version or now - ts > _FUZZY_TTL:
+                continue
+            if seen == shingles or len(seen & shingles) >= _FUZZY_THRESHOLD * len(seen | shingles):
+                return result
+    return None
+
+
+def _remember_search(shingles: frozenset[str], n: int, version: int, result: str) -> None:
+    with _RECENT_LOCK:
+        _RECENT_QUERIES.append((shingles, n, version, time.monotonic(), result))
+
+
 def _memory_search(query: str, n: int = 4) -> str:
     """Search the persistent vector memory store."""
+    return _memory_search_batch([query], n=n)[0]
+
+
+def _memory_search_batch(queries: list[str], n: int = 4) -> list[str]:
+    """Run several memory_search queries with one shared embedding pass."""
     try:
-        import memory_store as _ms
-        results = _ms.get_store().search(query, n=n)
-        if not results:
-            return 'No relevant memories found.'
-        lines = []
-        for r in results:
-            meta = r['metadata']
-            src  = meta.get('source', '?')
-            url  = meta.get('url', '')
-            age  = _ms._fmt_age(meta.get('timestamp_unix', 0))
-            snippet = r['text'][:300].replace('\n', ' ')
-            lines.append(f'[{src}] {url or meta.get("title","unknown")} ({age}, score={r["score"]})\n  {snippet}')
-        return '\n\n'.join(lines)
+        store = _lazy('memory_store').get_store()
+        if not _FUZZY_MEMORY_CACHE:
+            return [_format_memory_results(r) for r in store.search_batch(queries, n=n)]
+
+        version  = store.version
+        shingles = [_query_shingles(q) for q in queries]
+        out: list[str | None] = [_recent_search(sh, n, version) for sh in shingles]
+        misses = [i for i, hit in enumerate(out) if hit is None]
+        if misses:
+            batches = store.search_batch([queries[i] for i in misses], n=n)
+            for i, results in zip(misses, batches):
+                out[i] = _format_memory_results(results)
+                _remember_search(shingles[i], n, version, out[i])
+        return out  # type: ignore[return-value]
     except Exception as exc:
-        return f'[ERROR] memory_search: {exc}'
+        return [f'[ERROR] memory_search: {exc}'] * len(queries)
 
 
 def _memory_add(text: str, title: str = '', url: str = '') -> str:
     """Add a fact or note to the persistent memory store."""
     try:
-        import memory_store as _ms
-        doc_id = _ms.get_store().add(text=text, source='manual', url=url, title=title, pinned=True)
+        doc_id = _lazy('memory_store').get_store().add(text=text, source='manual', url=url, title=title, pinned=True)
         return f'Memory saved (id={doc_id}).'
     except Exception as exc:
         return f'[ERROR] memory_add: {exc}'
@@ -125,6 +328,32 @@ _REGISTRY['memory_add'] = {
     },
 }
 
+def _memory_stats() -> str:
+    """Report memory backend size and query-embedding cache effectiveness."""
+    try:
+        stats = _lazy('memory_store').get_store().stats()
+        cache = stats['embedding_cache']
+        line = f"Memory backend: {stats['backend']} ({stats['count']} entries)."
+        if cache:
+            line += (
+                f"\nQuery-embedding cache: {cache['size']}/{cache['maxsize']} entries, "
+                f"{cache['hits']} hits / {cache['misses']} misses "
+                f"(hit rate {cache['hit_rate']:.1%})."
+            )
+        return line
+    except Exception as exc:
+        return f'[ERROR] memory_stats: {exc}'
+
+
+_REGISTRY['memory_stats'] = {
+    'fn': _memory_stats,
+    'description': (
+        'Show the memory store backend, number of stored memories and the '
+        'hit rate of the query-embedding cache.'
+    ),
+    'args': {},
+}
+
 # Coding-agent tools (file I/O + shell execution)
 try:
     from tools.coding_tools import CODING_TOOLS as _CODING_TOOLS
@@ -154,27 +383,26 @@ def _schedule_task_fn(
 ) -> str:
     """Create a recurring scheduled task that runs a named tool every N seconds."""
     try:
-        import sys as _sys, os as _os
-        _gw = _os.path.dirname(_os.path.dirname(__file__))
-        if _gw not in _sys.path:
-            _sys.path.insert(0, _gw)
-        import scheduler as _sched  # type: ignore
-        task = _sched.add_task(
-            name=name,
-            tool=tool,
-            args=args or {},
-            interval_seconds=int(interval_seconds),
-        )
-        tid = task.get('id', '?')
-        return (
-            f"Scheduled task '{name}' created (id={tid}, "
-            f"tool={tool}, interval={interval_seconds}s). "
-            "Use the Schedule panel in the admin UI to manage tasks."
-        )
+        task = _scheduler().add_task(**_schedule_spec(name, tool, args, interval_seconds))
+        return _scheduled_message(task)
     except Exception as _exc:
         return f'[ERROR] schedule_task: {_exc}'
 
 
+def _schedule_spec(name: str, tool: str, args: dict | None = None,
+                   interval_seconds: int = 3600) -> dict:
+    """schedule_task args → scheduler.add_task kwargs."""
+    return {'name': name, 'tool': tool, 'args': args or {}, 'interval_seconds': int(interval_seconds)}
+
+
+def _scheduled_message(task: dict) -> str:
+    return (
+        f"Scheduled task '{task['name']}' created (id={task.get('id', '?')}, "
+        f"tool={task['tool']}, interval={task['interval_seconds']}s). "
+        "Use the Schedule panel in the admin UI to manage tasks."
+    )
+
+
 _REGISTRY['schedule_task'] = {
     'fn': _schedule_task_fn,
     'description': (
@@ -201,27 +429,28 @@ def _watch_page_fn(
     notify_threshold: float = 0.02,
 ) -> str:
     try:
-        import sys as _sys, os as _os
-        _gw = _os.path.dirname(_os.path.dirname(__file__))
-        if _gw not in _sys.path:
-            _sys.path.insert(0, _gw)
-        import watcher as _w
-        w = _w.add_watcher(
-            url=url,
-            label=label,
-            interval_minutes=interval_minutes,
-            notify_threshold=notify_threshold,
-        )
-        return (
-            f"Now watching '{w['label']}' (id={w['id']}, "
-            f"every {interval_minutes} min, "
-            f"alert threshold {notify_threshold:.1%}). "
-            'Changes will appear in the Watchers panel.'
-        )
+        w = _watcher().add_watcher(**_watch_spec(url, interval_minutes, label, notify_threshold))
+        return _watching_message(w)
     except Exception as _exc:
         return f'[ERROR] watch_page: {_exc}'
 
 
+def _watch_spec(url: str, interval_minutes: int = 60, label: str = '',
+                notify_threshold: float = 0.02) -> dict:
+    """watch_page args → watcher.add_watcher kwargs."""
+    return {'url': url, 'label': label, 'interval_minutes': interval_minutes,
+            'notify_threshold': notify_threshold}
+
+
+def _watching_message(w: dict) -> str:
+    return (
+        f"Now watching '{w['label']}' (id={w['id']}, "
+        f"every {w['interval_minutes']} min, "
+        f"alert threshold {w['notify_threshold']:.1%}). "
+        'Changes will appear in the Watchers panel.'
+    )
+
+
 _REGISTRY['watch_page'] = {
     'fn': _watch_page_fn,
     'description': (
@@ -244,8 +473,11 @@ _REGISTRY['watch_page'] = {
 
 def _pdf_read_fn(url: str = '', path: str = '', max_pages: int = 20) -> str:
     try:
-        from tools.pdf_reader import pdf_read as _pdf_read
-        return _pdf_read(url=url, path=path, max_pages=max_pages)
+        max_pages = max(1, min(int(max_pages), 50))
+    except (TypeError, ValueError):
+        max_pages = 20
+    try:
+        return _lazy('tools.pdf_reader').pdf_read(url=url, path=path, max_pages=max_pages)
     except Exception as _exc:
         return f'[ERROR] pdf_read: {_exc}'
 
@@ -263,6 +495,7 @@ _REGISTRY['pdf_read'] = {
         'path':      {'type': 'string',  'required': False, 'description': 'Local file path of the PDF'},
         'max_pages': {'type': 'integer', 'required': False, 'description': 'Maximum pages to extract (default 20, max 50)'},
     },
+    'pure': True,
 }
 
 
@@ -272,12 +505,7 @@ _REGISTRY['pdf_read'] = {
 
 def _wm():
     """Lazy import of workspace_manager (avoids circular-import at module load)."""
-    import os as _os, sys as _sys
-    _gw = _os.path.dirname(_os.path.dirname(__file__))
-    if _gw not in _sys.path:
-        _sys.path.insert(0, _gw)
-    import workspace_manager
-    return workspace_manager
+    return _lazy('workspace_manager')
 
 
 def _skill_list_fn() -> str:
@@ -293,6 +521,8 @@ _REGISTRY['skill_list'] = {
     'fn': _skill_list_fn,
     'description': 'List all installed workspace skills with their slug, name, and description.',
     'args': {},
+    'pure': True,
+    'reads': frozenset({'skills'}),
 }
 
 
@@ -309,15 +539,31 @@ _REGISTRY['skill_read'] = {
     'args': {
         'slug': {'type': 'string', 'required': True, 'description': 'Skill slug (e.g. web-search)'},
     },
+    'pure': True,
+    'reads': frozenset({'skills'}),
 }
 
 
+def _publish_event(event: dict) -> None:
+    """Best-effort push of a UI notification onto the caller's SSE queue.
+
+    Never blocks: with a bounded queue and a slow consumer the event is
+    dropped rather than stalling the tool (and the pool thread running it).
+    """
+    q = getattr(_CTX, 'event_queue', None)
+    if q is None:
+        return
+    try:
+        q.put_nowait(event)
+    except queue.Full:
+        log.warning('%s event dropped: SSE queue full', event.get('type'))
+
+
 def _skill_create_fn(slug: str, name: str, description: str, content: str) -> str:
     try:
         skill = _wm().create_skill(slug, name, description, content)
         # Emit skill_created SSE event so chat.html can show a toast
-        if getattr(_CTX, 'event_queue', None):
-            _CTX.event_queue.put({'type': 'skill_created', 'slug': slug, 'name': name})
+        _publish_event({'type': 'skill_created', 'slug': slug, 'name': name})
         return (
             f"Skill '{name}' created at {skill['path']}. "
             f"It is now listed in the workspace and can be activated by the user."
@@ -403,11 +649,8 @@ def _spawn_agent_fn(
 
     _SUBAGENT_DEPTH.depth = depth + 1
     try:
-        import sys as _sys, os as _os
-        _gw = _os.path.dirname(_os.path.dirname(__file__))
-        if _gw not in _sys.path:
-            _sys.path.insert(0, _gw)
-        from providers.adapters import get_adapter, available_providers
+        _adapters = _lazy('providers.adapters')
+        get_adapter, available_providers = _adapters.get_adapter, _adapters.available_providers
 
         prov   = provider or (available_providers()[0] if available_providers() else 'openai')
         adpt   = get_adapter(prov)
@@ -420,12 +663,7 @@ def _spawn_agent_fn(
         msgs.append({'role': 'user', 'content': task})
 
         # Build tool system block without spawn_agent to prevent runaway recursion
-        _saved = _REGISTRY.pop('spawn_agent', None)
-        try:
-            sys_block = build_tool_system_block()
-        finally:
-            if _saved is not None:
-                _REGISTRY['spawn_agent'] = _saved
+        sys_block = build_tool_system_block(exclude=_SUBAGENT_EXCLUDE)
 
         result = run_tool_loop(
             adpt,
@@ -462,9 +700,30 @@ _REGISTRY['spawn_agent'] = {
 }
 
 
-def register_tool(name: str, fn, description: str, args: dict) -> None:
-    """Dynamically register an additional tool."""
-    _REGISTRY[name] = {'fn': fn, 'description': description, 'args': args}
+def register_tool(
+    name: str,
+    fn,
+    description: str,
+    args: dict,
+    *,
+    pure: bool = False,
+    reads: frozenset[str] | tuple = (),
+    invalidates: frozenset[str] | tuple = (),
+) -> None:
+    """Dynamically register an additional tool.
+
+    *pure* marks a read-only tool whose results may be reused for identical
+    calls; *reads* names the state namespaces (e.g. 'notes') such a result
+    depends on, and *invalidates* the namespaces a successful run writes.
+    """
+    spec = {'fn': fn, 'description': description, 'args': args}
+    if pure:
+        spec['pure'] = True
+    if reads:
+        spec['reads'] = frozenset(reads)
+    if invalidates:
+        spec['side_effects'] = frozenset(invalidates)
+    _REGISTRY[name] = spec
 
 
 # ---------------------------------------------------------------------------
@@ -473,12 +732,7 @@ def register_tool(name: str, fn, description: str, args: dict) -> None:
 
 def _notify_fn(message: str, channel: str = 'telegram', title: str = '') -> str:
     try:
-        import sys as _sys, os as _os
-        _gw = _os.path.dirname(_os.path.dirname(__file__))
-        if _gw not in _sys.path:
-            _sys.path.insert(0, _gw)
-        import notifier as _notifier
-        result = _notifier.send(channel=channel, message=message, title=title)
+        result = _lazy('notifier').send(channel=channel, message=message, title=title)
         if result.get('ok'):
             return f'Notification sent via {channel}.'
         return f'[ERROR] notify: {result.get("error", "unknown error")}'
@@ -507,13 +761,8 @@ _REGISTRY['notify'] = {
 
 def _notes_save_fn(content: str, url: str = '', title: str = '', tags: str = '') -> str:
     try:
-        import sys as _sys, os as _os
-        _gw = _os.path.dirname(_os.path.dirname(__file__))
-        if _gw not in _sys.path:
-            _sys.path.insert(0, _gw)
-        import notes as _notes
         tag_list = [t.strip() for t in tags.split(',') if t.strip()] if tags else []
-        result = _notes.save(content=content, url=url, title=title, tags=tag_list)
+        result = _lazy('notes').save(content=content, url=url, title=title, tags=tag_list)
         return f"Note saved to {result['path']}."
     except Exception as exc:
         return f'[ERROR] notes_save: {exc}'
@@ -536,12 +785,7 @@ _REGISTRY['notes_save'] = {
 
 def _notes_search_fn(query: str) -> str:
     try:
-        import sys as _sys, os as _os
-        _gw = _os.path.dirname(_os.path.dirname(__file__))
-        if _gw not in _sys.path:
-            _sys.path.insert(0, _gw)
-        import notes as _notes
-        return _notes.search(query)
+        return _lazy('notes').search(query)
     except Exception as exc:
         return f'[ERROR] notes_search: {exc}'
 
@@ -552,6 +796,8 @@ _REGISTRY['notes_search'] = {
     'args': {
         'query': {'type': 'string', 'required': True, 'description': 'Search terms — all words must appear in the matching line'},
     },
+    'pure': True,
+    'reads': frozenset({'notes'}),
 }
 
 
@@ -561,10 +807,10 @@ _REGISTRY['notes_search'] = {
 
 def _video_describe_fn(url: str, n_frames: int = 5, prompt: str = '') -> str:
     try:
-        from tools.video_frames import describe_video, ffmpeg_available
-        if not ffmpeg_available():
+        _vf = _lazy('tools.video_frames')
+        if not _vf.ffmpeg_available():
             return '[ERROR] video_describe: ffmpeg is not installed. Install it to use video analysis.'
-        return describe_video(source=url, n_frames=n_frames, prompt=prompt)
+        return _vf.describe_video(source=url, n_frames=n_frames, prompt=prompt)
     except Exception as exc:
         return f'[ERROR] video_describe: {exc}'
 
@@ -590,12 +836,7 @@ _REGISTRY['video_describe'] = {
 
 def _credential_get_fn(name: str) -> str:
     try:
-        import sys as _sys, os as _os
-        _gw = _os.path.dirname(_os.path.dirname(__file__))
-        if _gw not in _sys.path:
-            _sys.path.insert(0, _gw)
-        import credential_store as _cs
-        value = _cs.retrieve(name)
+        value = _lazy('credential_store').retrieve(name)
         if value is None:
             return f'[ERROR] credential_get: no credential named "{name}"'
         return value
@@ -620,12 +861,7 @@ _REGISTRY['credential_get'] = {
 
 def _credential_set_fn(name: str, secret: str) -> str:
     try:
-        import sys as _sys, os as _os
-        _gw = _os.path.dirname(_os.path.dirname(__file__))
-        if _gw not in _sys.path:
-            _sys.path.insert(0, _gw)
-        import credential_store as _cs
-        _cs.store(name, secret)
+        _lazy('credential_store').store(name, secret)
         return f'Credential "{name}" stored securely.'
     except Exception as exc:
         return f'[ERROR] credential_set: {exc}'
@@ -656,12 +892,7 @@ def _message_agent_fn(
 ) -> str:
     """Send a task to another persona's agent session."""
     try:
-        import sys as _sys, os as _os
-        _gw = _os.path.dirname(_os.path.dirname(__file__))
-        if _gw not in _sys.path:
-            _sys.path.insert(0, _gw)
-        import a2a
-        import threading as _threading
+        a2a = _lazy('a2a')
 
         # Determine calling persona from context local
         from_persona = getattr(_CTX, 'persona', 'agent')
@@ -669,16 +900,12 @@ def _message_agent_fn(
         task_id = record['id']
 
         if wait:
-            # Poll up to 90 s
-            import time as _time
-            deadline = _time.monotonic() + 90
-            while _time.monotonic() < deadline:
-                _time.sleep(2)
-                rec = a2a.get_task(task_id)
-                if rec and rec['status'] in ('done', 'error', 'cancelled'):
-                    if rec['status'] == 'done':
-                        return f'[{persona}] {rec["result"]}'
-                    return f'[{persona} error] {rec.get("error", "unknown")}'
+            # Block up to 90 s; the a2a worker signals completion
+            rec = a2a.wait_for(task_id, timeout=90)
+            if rec and rec['status'] in ('done', 'error', 'cancelled'):
+                if rec['status'] == 'done':
+                    return f'[{persona}] {rec["result"]}'
+                return f'[{persona} error] {rec.get("error", "unknown")}'
             return f'[{persona}] Task {task_id} is still running. Check /a2a/tasks/{task_id} for results.'
 
         return (
@@ -709,38 +936,133 @@ _REGISTRY['message_agent'] = {
 }
 
 
+# (registry version, specs) — rebuilt by list_tools() once the registry moves on
+_TOOL_LIST_CACHE: tuple[int, list[dict]] | None = None
+
+
 def list_tools() -> list[dict]:
-    """Return a list of tool specs for injection into system prompts."""
-    out = []
-    for name, spec in _REGISTRY.items():
-        out.append({'name': name, 'description': spec['description'], 'args': spec.get('args', {})})
-    return out
+    """Return a list of tool specs for injection into system prompts.
+
+    The list is a snapshot shared between callers until the registry
+    changes — treat it as read-only.
+    """
+    global _TOOL_LIST_CACHE
+    version = _REGISTRY.version
+    if _TOOL_LIST_CACHE is None or _TOOL_LIST_CACHE[0] != version:
+        _TOOL_LIST_CACHE = (version, [
+            {'name': name, 'description': spec['description'], 'args': spec.get('args', {})}
+            for name, spec in list(_REGISTRY.items())
+        ])
+    return _TOOL_LIST_CACHE[1]
+
+
+_REGISTRY_NAMES_CACHE: tuple[int, str] | None = None
+
+
+def _registry_names_str() -> str:
+    """repr() of the registered tool names for "Unknown tool" errors."""
+    global _REGISTRY_NAMES_CACHE
+    version = _REGISTRY.version
+    if _REGISTRY_NAMES_CACHE is None or _REGISTRY_NAMES_CACHE[0] != version:
+        _REGISTRY_NAMES_CACHE = (version, repr(list(_REGISTRY)))
+    return _REGISTRY_NAMES_CACHE[1]
 
 
 # ---------------------------------------------------------------------------
 # System prompt fragment
 # ---------------------------------------------------------------------------
 
-def build_tool_system_block() -> str:
-    """Return the tool-use instruction block for injection into the system prompt."""
-    # Auto-load AGENT_TOOLS.md from the gateway root (one level up from tools/)
-    import pathlib as _pathlib
-    _md_path = _pathlib.Path(__file__).parent.parent / 'AGENT_TOOLS.md'
-    _agent_tools_md = _md_path.read_text() if _md_path.exists() else ''
-
-    tool_lines = []
-    for name, spec in _REGISTRY.items():
-        arg_parts = []
-        for arg_name, arg_spec in spec.get('args', {}).items():
-            req  = '' if arg_spec.get('required', True) else ' (optional)'
-            desc = arg_spec.get('description', '')
-            arg_parts.append(f'    {arg_name!r}: {arg_spec["type"]}{req} — {desc}')
-        args_str = '\n'.join(arg_parts) if arg_parts else '    (none)'
-        tool_lines.append(
-            f'• {name}\n  Description: {spec["description"]}\n  Args:\n{args_str}'
-        )
+# Rendered tool catalog per exclusion set: exclude -> (registry version, block).
+# Rebuilt only when _REGISTRY.version moves on.
+_TOOLS_BLOCK_CACHE: dict[frozenset[str], tuple[int, str]] = {}
+
+# Tools hidden from sub-agents (prevents runaway spawn_agent recursion).
+_SUBAGENT_EXCLUDE: frozenset[str] = frozenset({'spawn_agent'})
+
+
+def _render_tools_block(exclude: frozenset[str]) -> str:
+    """Return the "### Tools" catalog, cached until the registry mutates."""
+    version = _REGISTRY.version
+    cached = _TOOLS_BLOCK_CACHE.get(exclude)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    tools_block = '\n\n'.join(
+        _tool_entry(name, spec)
+        for name, spec in list(_REGISTRY.items())
+        if name not in exclude
+    )
+    _TOOLS_BLOCK_CACHE[exclude] = (version, tools_block)
+    return tools_block
+
 
-    tools_block = '\n\n'.join(tool_lines)
+def _tool_entry(name: str, spec: dict) -> str:
+    """A spec's pre-rendered catalog entry, rendered and stored if missing."""
+    block = spec.get('_block')
+    if block is None:
+        block = spec['_block'] = _render_tool_entry(name, spec)
+    return block
+
+
+# Optional operator notes prepended to the block, from the gateway root.
+_AGENT_TOOLS_MD = os.path.join(_GATEWAY_DIR, 'AGENT_TOOLS.md')
+
+# AGENT_TOOLS.md text with the (st_mtime_ns, st_size) it was read at.
+_MD_CACHE: tuple[tuple[int, int], str] | None = None
+
+# Full system block per exclusion set:
+# exclude -> (registry version, AGENT_TOOLS.md stat key, block).
+_SYS_BLOCK_CACHE: dict[frozenset[str], tuple[int, tuple[int, int], str]] = {}
+
+
+def _agent_tools_md_key() -> tuple[int, int]:
+    """(mtime_ns, size) of AGENT_TOOLS.md, or (-1, -1) when it is absent."""
+    try:
+        st = os.stat(_AGENT_TOOLS_MD)
+    except OSError:
+        return (-1, -1)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def agent_tools_md() -> str:
+    """Contents of AGENT_TOOLS.md ('' if absent), re-read only when it changes."""
+    global _MD_CACHE
+    key = _agent_tools_md_key()
+    if _MD_CACHE is not None and _MD_CACHE[0] == key:
+        return _MD_CACHE[1]
+    try:
+        with open(_AGENT_TOOLS_MD, encoding='utf-8') as fh:
+            text = fh.read()
+    except OSError:
+        text = ''
+    _MD_CACHE = (key, text)
+    return text
+
+
+def build_tool_system_block(exclude: frozenset[str] = frozenset()) -> str:
+    """Return the tool-use instruction block for injection into the system prompt.
+
+    Tools named in *exclude* are left out of the catalog without touching
+    the shared registry, so concurrent callers always see every tool.
+    """
+    return _build_tool_system_block(frozenset(exclude))
+
+
+def _build_tool_system_block(exclude: frozenset[str]) -> str:
+    """Cached system block; rebuilt when the registry or AGENT_TOOLS.md changes."""
+    md_key = _agent_tools_md_key()
+    version = _REGISTRY.version
+    cached = _SYS_BLOCK_CACHE.get(exclude)
+    if cached is not None and cached[0] == version and cached[1] == md_key:
+        return cached[2]
+    block = _render_system_block(exclude)
+    _SYS_BLOCK_CACHE[exclude] = (version, md_key, block)
+    return block
+
+
+def _render_system_block(exclude: frozenset[str]) -> str:
+    _agent_tools_md = agent_tools_md()
+    tools_block = _render_tools_block(exclude)
     md_section = f'{_agent_tools_md.strip()}\n\n' if _agent_tools_md else ''
     return f"""\
 {md_section}## Available Tools
@@ -850,98 +1172,426 @@ X.com logo example (path fingerprint = "18.244", selector = a[href='/home']):
 # We intentionally do NOT capture the JSON body in the regex — the body is
 # extracted via brace-counting below so that nested {"args": {...}} objects
 # are never truncated by a non-greedy regex stopping at the first "}".
+# The anchor is searched from its "_CALL" half and the "TOOL" before it is
+# checked by hand (_iter_anchors): a case-insensitive pattern starting with
+# "T" makes the regex engine attempt a match at every "t" in the reply, while
+# "_" is rare in prose — scanning a call-free reply is ~20x faster this way.
 _TOOL_CALL_ANCHOR_RE = re.compile(
-    r'TOOL_CALL\s*:\s*(?=\{)',
+    r'_CALL\s*:\s*(?=\{)',
     re.IGNORECASE,
 )
-# Used only for stripping TOOL_CALL lines from the displayed content.
-_TOOL_CALL_STRIP_RE = re.compile(
-    r'^\s*TOOL_CALL\s*:.*$',
-    re.MULTILINE | re.IGNORECASE,
-)
+_CALL_HINT_RE = re.compile(r'_CALL', re.IGNORECASE)   # cheap "may hold a marker" test
+# A "TOOL_CALL:" marker at the end of a partial stream, not yet followed by "{".
+_TOOL_CALL_TAIL_RE = re.compile(r'_CALL\s*(?::\s*)?\Z', re.IGNORECASE)
 _MAX_JSON_SEARCH = 16_000  # chars to scan per tool call (covers large code_js)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _iter_anchors(text: str, pos: int = 0):
+    """Yield (start, end) of each "TOOL_CALL:" anchor at or after *pos*.
+
+    *start* is the offset of "TOOL", *end* that of the "{" that follows.
+    """
+    for m in _TOOL_CALL_ANCHOR_RE.finditer(text, pos):
+        start = m.start() - 4
+        if start >= pos and text[start:m.start()].lower() == 'tool':
+            yield start, m.end()
+
+
+def _strip_tool_call_lines(text: str) -> str:
+    """Remove "TOOL_CALL: ..." lines (and blank lines just above them) from *text*.
+
+    Each call line, together with the whitespace-only lines right before it,
+    collapses to one empty line.  This is what a MULTILINE ``^\\s*TOOL_CALL``
+    substitution produces, but in a single pass: that regex retries from
+    every line start and rescans the whole following blank run each time,
+    which is quadratic on replies padded with many empty lines.
+    """
+    if _CALL_HINT_RE.search(text) is None:
+        return text
+    out: list[str] = []
+    blank_run = 0   # whitespace-only lines at the end of out
+    for line in text.split('\n'):
+        body = line.lstrip()
+        if body[:9].lower() == 'tool_call' and body[9:].lstrip().startswith(':'):
+            if blank_run:
+                del out[-blank_run:]
+            out.append('')
+            blank_run = 0
+        else:
+            out.append(line)
+            blank_run = blank_run + 1 if not body else 0
+    return '\n'.join(out)
+
+
+def _json_loads(text: str) -> Any:
+    return _orjson.loads(text) if _HAS_ORJSON else json.loads(text)
+
+
+def _string_end(raw: str, start: int) -> int:
+    """Index of the quote closing a JSON string whose body starts at *start*, or -1."""
+    j = raw.find('"', start)
+    while j >= 0:
+        k = j
+        while k > start and raw[k - 1] == '\\':
+            k -= 1
+        if (j - k) % 2 == 0:      # even run of backslashes → quote not escaped
+            return j
+        j = raw.find('"', j + 1)
+    return -1
+
+
+def _repair_truncated(raw: str) -> str | None:
+    """Close the open objects of a TOOL_CALL cut off mid-stream.
+
+    Brace-counts *raw* (respecting string literals) and, when the text ends
+    outside a string with objects still open, appends the missing "}" so the
+    call can still be parsed.  Returns None when there is nothing to repair.
+
+    Rather than stepping through every character, the scan hops between the
+    next "{", "}" and '"' with str.find and skips whole string literals the
+    same way, so only structural characters are visited in Python.
+    """
+    depth = 0
+    pos = 0
+    nxt = {'{': raw.find('{'), '}': raw.find('}'), '"': raw.find('"')}
+    while True:
+        for ch, at in nxt.items():
+            if 0 <= at < pos:
+                nxt[ch] = raw.find(ch, pos)
+        found = [at for at in nxt.values() if at >= 0]
+        if not found:
+            break
+        i = min(found)
+        if raw[i] == '"':
+            close = _string_end(raw, i + 1)
+            if close < 0:
+                return None  # cut off inside a string literal
+            pos = close + 1
+            continue
+        depth += 1 if raw[i] == '{' else -1
+        if depth == 0:
+            return None  # balanced — the JSON itself is malformed
+        pos = i + 1
+    if depth <= 0:
+        return None
+    return raw.rstrip().rstrip(',') + '}' * depth
 
 
 def _extract_tool_calls(text: str) -> list[dict]:
     """Return all TOOL_CALL JSON objects from an LLM response.
 
-    Uses brace-counting from the position of each "TOOL_CALL: {" anchor so
-    that nested JSON objects (e.g. {"args": {"code_js": "..."}}) are never
-    truncated by a regex stopping at the first closing brace.
+    Each object is decoded with ``JSONDecoder.raw_decode`` starting at the
+    "{" that follows a "TOOL_CALL:" anchor.  raw_decode runs in C, stops at
+    the end of the first complete value and ignores trailing prose, so nested
+    objects (e.g. {"args": {"code_js": "..."}}) are never truncated by a regex
+    stopping at the first closing brace.  Calls cut off mid-stream fall back
+    to a brace-counting repair.
     """
     calls = []
-    for m in _TOOL_CALL_ANCHOR_RE.finditer(text):
-        # Start brace-counting from the "{" that follows "TOOL_CALL:"
-        start = m.end()
-        raw = text[start: start + _MAX_JSON_SEARCH]
-        depth = 0
-        end = 0
-        in_string = False
-        escape_next = False
-        for i, ch in enumerate(raw):
-            if escape_next:
-                escape_next = False
-                continue
-            if ch == '\\' and in_string:
-                escape_next = True
+    for _, start in _iter_anchors(text):
+        try:
+            obj, _end = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            repaired = _repair_truncated(text[start: start + _MAX_JSON_SEARCH])
+            if repaired is None:
                 continue
-            if ch == '"':
-                in_string = not in_string
+            try:
+                obj = _json_loads(repaired)
+            except ValueError:
                 continue
-            if in_string:
+        if isinstance(obj, dict) and ('tool' in obj or 'name' in obj):
+            calls.append(obj)
+    return calls
+
+
+_JSON_STRUCT_RE = re.compile(r'[{}"]')        # structural chars outside strings
+_JSON_STRING_STOP_RE = re.compile(r'["\\]')    # end of string or escape inside one
+
+
+class _ToolCallStream:
+    """Incremental TOOL_CALL extractor for streamed LLM replies.
+
+    feed() appends a text chunk and returns the calls completed by it, so
+    the caller learns about each call while the model is still generating.
+    Once an anchor is found, its JSON object is brace-counted (respecting
+    string literals and escapes) from where the previous chunk left off,
+    and only decoded when the depth returns to zero — every character of
+    the reply is scanned once, however many chunks a call spans.  Text
+    before the scan cursor is dropped from the working buffer.  finish()
+    parses the unresolved tail exactly like _extract_tool_calls (including
+    the truncated-call repair), so the final list matches a non-streamed
+    parse.
+    """
+
+    def __init__(self):
+        self.calls: list[dict] = []
+        self._chunks: list[str] = []
+        self._buf = ''      # reply text from the scan cursor on
+        # Pending call, as offsets into _buf: (anchor start, "{" offset)
+        self._call: tuple[int, int] | None = None
+        self._pos = 0       # brace scan position within _buf
+        self._depth = 0
+        self._in_str = False
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._chunks)
+
+    def _scan(self, buf: str) -> int | None:
+        """Continue the pending call's brace count; offset past its "}" or None."""
+        pos = self._pos
+        while True:
+            if self._in_str:
+                m = _JSON_STRING_STOP_RE.search(buf, pos)
+                if m is None:
+                    pos = len(buf)
+                    break
+                if m.group() == '\\':
+                    if m.end() == len(buf):
+                        pos = m.start()  # escaped char not streamed yet
+                        break
+                    pos = m.end() + 1
+                    continue
+                self._in_str = False
+                pos = m.end()
                 continue
-            if ch == '{':
-                depth += 1
-            elif ch == '}':
-                depth -= 1
-            if depth == 0 and end == 0:
-                end = i + 1
+            m = _JSON_STRUCT_RE.search(buf, pos)
+            if m is None:
+                pos = len(buf)
                 break
-        fragment = raw[:end] if end else raw
-        try:
-            obj = json.loads(fragment)
+            pos = m.end()
+            if m.group() == '"':
+                self._in_str = True
+            elif m.group() == '{':
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = pos
+                    return pos
+        self._pos = pos
+        return None
+
+    def feed(self, chunk: str) -> list[dict]:
+        self._chunks.append(chunk)
+        buf = self._buf + chunk
+        cursor = 0
+        found = []
+        while True:
+            if self._call is None:
+                anchor = next(_iter_anchors(buf, cursor), None)
+                if anchor is None:
+                    # Keep a marker still waiting for its "{" (or a partial
+                    # "TOOL_CAL" prefix at the very end) in scan range.
+                    tail = _TOOL_CALL_TAIL_RE.search(buf, cursor)
+                    if tail and tail.start() - 4 >= cursor:
+                        cursor = tail.start() - 4
+                    else:
+                        cursor = max(cursor, len(buf) - 8)
+                    break
+                self._call = anchor
+                self._pos, self._depth, self._in_str = anchor[1], 0, False
+            start, json_start = self._call
+            end = self._scan(buf)
+            if end is None:
+                cursor = start  # call still streaming — resume on next chunk
+                break
+            self._call = None
+            try:
+                obj = _json_loads(buf[json_start:end])
+            except ValueError:
+                cursor = json_start  # balanced but malformed — skip it
+                continue
+            cursor = end
             if isinstance(obj, dict) and ('tool' in obj or 'name' in obj):
-                calls.append(obj)
-        except json.JSONDecodeError:
-            pass
-    return calls
+                found.append(obj)
+
+        # Rebase onto the unscanned remainder
+        self._buf = buf[cursor:]
+        if self._call is not None:
+            start, json_start = self._call
+            self._call = (start - cursor, json_start - cursor)
+            self._pos -= cursor
+        self.calls.extend(found)
+        return found
+
+    def finish(self) -> list[dict]:
+        return self.calls + _extract_tool_calls(self._buf)
 
 
 # ---------------------------------------------------------------------------
 # Executor
 # ---------------------------------------------------------------------------
 
-def _run_tool(name: str, args: dict) -> str:
-    """Execute a registered tool and return a plain-text result string."""
-    spec = _REGISTRY.get(name)
-    if not spec:
-        return f'[ERROR] Unknown tool: {name!r}. Available: {list(_REGISTRY)}'
+# Registry entries flagged 'pure' are read-only: their results are reused for
+# identical calls (same name and bound args) for up to _RESULT_CACHE_TTL
+# seconds — an agent often repeats a search or fetch in a later round.  A pure
+# tool's 'reads' namespaces are part of its cache key via a generation
+# counter.  For 'skills' and 'notes' that counter is the owning store's own
+# write counter (_STORE_VERSIONS), bumped by workspace_manager / notes on
+# every write — so API endpoints and agent tools invalidate alike.  Tools
+# added with register_tool() may instead declare 'side_effects', bumped here
+# after a successful run.  memory_search is not pure: it has its own
+# version-aware reuse (_recent_search).
+_RESULT_CACHE_SIZE = 256
+_RESULT_CACHE_TTL = 300.0  # seconds
+
+# namespace -> current write counter of the module that owns the data.
+_STORE_VERSIONS: dict[str, Callable[[], int]] = {
+    'skills': lambda: _wm().skills_version,
+    'notes':  lambda: _lazy('notes').version,
+}
+
+
+class _ToolResultCache:
+    """Thread-safe LRU of (tool, canonical args JSON, generations) -> result text, with a TTL.
+
+    invalidate() bumps per-namespace generation counters instead of walking
+    the entries: keys built before the bump simply stop matching and age out
+    through the LRU.
+    """
 
-    # Basic arg validation
+    def __init__(self, maxsize: int = _RESULT_CACHE_SIZE, ttl: float = _RESULT_CACHE_TTL):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._inflight: dict[tuple, _cf.Future] = {}
+        self._lock = threading.Lock()
+
+    def generations(self, namespaces: frozenset[str]) -> tuple[int, ...]:
+        """Current generation of each namespace, for use in a cache key.
+
+        Both counters only grow, so their sum changes whenever either does.
+        """
+        gens = self._generations
+        return tuple(
+            gens.get(ns, 0) + (_STORE_VERSIONS[ns]() if ns in _STORE_VERSIONS else 0)
+            for ns in namespaces
+        )
+
+    def get(self, key: tuple) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: tuple, text: str) -> None:
+        with self._lock:
+            self._entries[key] = (text, time.monotonic() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def begin(self, key: tuple) -> tuple[_cf.Future, bool]:
+        """Join the in-flight run of *key*: (future, True if the caller must run it)."""
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._inflight[key] = _cf.Future()
+            return flight, True
+
+    def end(self, key: tuple) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, namespaces: frozenset[str]) -> None:
+        with self._lock:
+            for ns in namespaces:
+                self._generations[ns] = self._generations.get(ns, 0) + 1
+
+
+_RESULT_CACHE = _ToolResultCache()
+
+
+def _bind_args(name: str, spec: dict, args: dict) -> dict[str, Any] | str:
+    """Pick the declared args out of *args*; an error string if one is missing.
+
+    Walks the spec's precompiled plan (see _arg_plan) rather than
+    re-reading every arg spec's type and required flag per call.
+    """
+    plan = spec.get('_arg_plan')
+    if plan is None:
+        plan = spec['_arg_plan'] = _arg_plan(spec)
     fn_args: dict[str, Any] = {}
-    for arg_name, arg_spec in spec.get('args', {}).items():
+    for arg_name, required, is_int in plan:
         if arg_name in args:
             val = args[arg_name]
             # Coerce integer args
-            if arg_spec.get('type') == 'integer' and not isinstance(val, int):
+            if is_int and not isinstance(val, int):
                 try:
                     val = int(val)
                 except (TypeError, ValueError):
                     pass
             fn_args[arg_name] = val
-        elif arg_spec.get('required', True):
+        elif required:
             return f'[ERROR] Missing required arg {arg_name!r} for tool {name!r}'
+    return fn_args
 
+
+def _run_tool(name: str, args: dict, key: tuple[str, str] | None = None) -> str:
+    """Execute a registered tool and return a plain-text result string.
+
+    *key* is the caller's _call_key(name, args), if it already has one; it
+    doubles as the result-cache key whenever binding leaves args unchanged.
+    """
+    try:
+        # Names parsed from LLM output are fresh strings; interning them makes
+        # the registry and _APPROVAL_TOOLS lookups identity hits.
+        name = sys.intern(name)
+        spec = _REGISTRY[name]
+    except (KeyError, TypeError):
+        spec = None
+    if not spec:
+        return f'[ERROR] Unknown tool: {name!r}. Available: {_registry_names_str()}'
+
+    fn_args = _bind_args(name, spec, args)
+    if isinstance(fn_args, str):
+        return fn_args
+
+    cache_key = None
+    if spec.get('pure'):
+        if key is None or fn_args != args:
+            key = _call_key(name, fn_args)
+        if key is not None:
+            # Snapshot before running: a write landing mid-call leaves this
+            # result under an already-stale generation.
+            cache_key = (*key, _RESULT_CACHE.generations(spec.get('reads', ())))
+    if cache_key is None:
+        return _invoke_tool(name, spec, fn_args)
+
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    # Single-flight: an identical call already running elsewhere (another
+    # session, round or sub-agent) is awaited instead of run a second time.
+    flight, leader = _RESULT_CACHE.begin(cache_key)
+    if not leader:
+        return flight.result()
+    try:
+        text = _invoke_tool(name, spec, fn_args, cache_key)
+    except BaseException as exc:
+        _RESULT_CACHE.end(cache_key)
+        flight.set_exception(exc)
+        raise
+    _RESULT_CACHE.end(cache_key)
+    flight.set_result(text)
+    return text
+
+
+def _invoke_tool(name: str, spec: dict, fn_args: dict[str, Any],
+                 cache_key: tuple | None = None) -> str:
+    """Approval gate, call, cache bookkeeping and formatting for one tool run."""
     # ---- Approval gate -------------------------------------------------
     if name in _APPROVAL_TOOLS:
-        try:
-            import sys as _sys, os as _os
-            _gw = _os.path.dirname(_os.path.dirname(__file__))
-            if _gw not in _sys.path:
-                _sys.path.insert(0, _gw)
-            import approval_gate as _ag
-        except ImportError:
-            _ag = None  # approval_gate not available — proceed without gating
+        _ag = _approval_gate()  # None → approval_gate not available, proceed ungated
         if _ag is not None:
             _sid = getattr(_CTX, 'session_id', '')
             _q   = getattr(_CTX, 'event_queue', None)
@@ -965,53 +1615,79 @@ def _run_tool(name: str, args: dict) -> str:
     # --------------------------------------------------------------------
 
     try:
-        import asyncio as _asyncio, inspect as _inspect
         raw = spec['fn'](**fn_args)
         # Transparently handle async tool functions
-        if _inspect.isawaitable(raw):
+        if inspect.isawaitable(raw):
             try:
-                loop = _asyncio.get_event_loop()
+                loop = asyncio.get_event_loop()
                 if loop.is_running():
-                    import concurrent.futures as _cf
-                    with _cf.ThreadPoolExecutor(max_workers=1) as pool:
-                        result = pool.submit(_asyncio.run, raw).result(timeout=35)
+                    result = _TOOL_EXECUTOR.submit(asyncio.run, raw).result(timeout=35)
                 else:
                     result = loop.run_until_complete(raw)
             except RuntimeError:
-                result = _asyncio.run(raw)
+                result = asyncio.run(raw)
         else:
             result = raw
     except Exception as exc:
-        tb = traceback.format_exc(limit=3)
-        return f'[ERROR] Tool {name!r} raised an exception:\n{tb}'
+        log.exception('tool %r raised', name)
+        if _VERBOSE_ERRORS:
+            tb = ''.join(traceback.format_exception(exc, limit=3))
+            return f'[ERROR] Tool {name!r} raised an exception:\n{tb}'
+        return f'[ERROR] Tool {name!r} raised an exception: {type(exc).__name__}: {exc}'
+
+    written = spec.get('side_effects')
+    if written:
+        _RESULT_CACHE.invalidate(written)
+
+    text = _format_result(result)
+    if cache_key is not None and not _is_error_result(result, text):
+        _RESULT_CACHE.put(cache_key, text)
+    return text
+
 
-    # Format result as readable text
+def _is_error_result(result: Any, text: str) -> bool:
+    """True for failures a later identical call might not repeat."""
+    if text.startswith('[ERROR]'):
+        return True
+    return isinstance(result, list) and any(isinstance(i, dict) and 'error' in i for i in result)
+
+
+def _format_result(result: Any) -> str:
+    """Render a tool's return value as readable text."""
     if isinstance(result, list):
         if not result:
             return '(no results)'
-        parts = []
+        parts: list[str] = []
         for i, item in enumerate(result, 1):
             if isinstance(item, dict):
                 if 'error' in item and not item.get('title'):
                     parts.append(f'{i}. ERROR: {item["error"]}')
                 else:
-                    title   = item.get('title', '')
                     url     = item.get('url', '')
                     snippet = item.get('snippet', '')
-                    line = f'{i}. **{title}**'
+                    parts.append(f'{i}. **{item.get("title", "")}**')
                     if url:
-                        line += f'\n   URL: {url}'
+                        parts.append(f'   URL: {url}')
                     if snippet:
-                        line += f'\n   {snippet}'
-                    parts.append(line)
+                        parts.append(f'   {snippet}')
             else:
                 parts.append(f'{i}. {item}')
         return '\n'.join(parts)
     if isinstance(result, dict):
-        return json.dumps(result, indent=2, ensure_ascii=False)
+        return _json_dumps_pretty(result)
     return str(result)
 
 
+def _json_dumps_pretty(obj: dict) -> str:
+    """Indented JSON for dict tool results — orjson when installed."""
+    if _HAS_ORJSON:
+        try:
+            return _orjson.dumps(obj, option=_orjson.OPT_INDENT_2 | _orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass  # e.g. ints wider than 64 bits — the stdlib encoder copes
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
 # ---------------------------------------------------------------------------
 # Tool loop
 # ---------------------------------------------------------------------------
@@ -1019,6 +1695,284 @@ def _run_tool(name: str, args: dict) -> str:
 MAX_ROUNDS = 5  # max tool-call → result cycles per request
 
 
+def _call_name(call: dict) -> Any:
+    """Tool name of a parsed TOOL_CALL, interned so every check on it this
+    round (approval set, prefetch, registry) is an identity hit."""
+    name = call.get('tool') or call.get('name', '?')
+    return sys.intern(name) if type(name) is str else name
+
+
+def _call_key(name: str, args: Any) -> tuple[str, str] | None:
+    """Identity of a tool call within one round: (name, canonical args JSON)."""
+    try:
+        return name, json.dumps(args, sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+
+
+def _prefetch_memory_searches(
+    calls: list[tuple[str, Any]], keys: list[tuple[str, str] | None],
+) -> dict[tuple[str, str], str]:
+    """Resolve all distinct memory_search calls of a round in one batch.
+
+    *keys* holds each call's _call_key.  Returns results keyed by it.  Nothing is prefetched unless the
+    round holds at least two distinct, well-formed memory_search calls.
+    """
+    groups: dict[int, dict[tuple[str, str], str]] = {}  # n -> {key: query}
+    for (name, args), key in zip(calls, keys):
+        if name != 'memory_search' or not isinstance(args, dict):
+            continue
+        query = args.get('query')
+        if not isinstance(query, str) or key is None:
+            continue
+        try:
+            n = int(args.get('n', 4))
+        except (TypeError, ValueError):
+            continue
+        groups.setdefault(n, {})[key] = query
+    if sum(len(g) for g in groups.values()) < 2:
+        return {}
+
+    prefetched: dict[tuple[str, str], str] = {}
+    for n, by_key in groups.items():
+        texts = _memory_search_batch(list(by_key.values()), n=n)
+        prefetched.update(zip(by_key, texts))
+    return prefetched
+
+
+# Registration tools whose calls in one round are stored with one bulk write:
+# tool -> (tool fn, args → spec, bulk-add function, created record → result text).
+_BULK_REGISTRATIONS = {
+    'schedule_task': (_schedule_task_fn, _schedule_spec,
+                      lambda specs: _scheduler().add_tasks_bulk(specs), _scheduled_message),
+    'watch_page':    (_watch_page_fn, _watch_spec,
+                      lambda specs: _watcher().add_watchers_bulk(specs), _watching_message),
+}
+
+
+def _prefetch_registrations(
+    calls: list[tuple[str, Any]], keys: list[tuple[str, str] | None],
+) -> dict[tuple[str, str], str]:
+    """Persist a round's schedule_task / watch_page calls in one write per tool.
+
+    *keys* holds each call's _call_key.  Returns results keyed by it.  A tool is only batched when the
+    round holds at least two distinct, well-formed calls to it; if the bulk
+    add fails (e.g. one spec is invalid) nothing is prefetched and every
+    call runs — and reports its own error — individually.
+    """
+    prefetched: dict[tuple[str, str], str] = {}
+    for tool, (fn, to_spec, add_bulk, message) in _BULK_REGISTRATIONS.items():
+        spec = _REGISTRY.get(tool)
+        if spec is None or spec.get('fn') is not fn:
+            continue  # tool removed or overridden (plugins)
+        batch: dict[tuple[str, str], dict] = {}
+        for (name, args), key in zip(calls, keys):
+            if name != tool or not isinstance(args, dict) or key is None or key in batch:
+                continue
+            fn_args = _bind_args(name, spec, args)
+            if isinstance(fn_args, str):
+                continue
+            try:
+                batch[key] = to_spec(**fn_args)
+            except (TypeError, ValueError):
+                continue
+        if len(batch) < 2:
+            continue
+        try:
+            records = add_bulk(list(batch.values()))
+            prefetched.update(zip(batch, map(message, records)))
+        except Exception:
+            continue
+    return prefetched
+
+
+# Concurrent tool calls per round; INTELLI_TOOL_CONCURRENCY=1 (or
+# TOOL_CONCURRENCY_LIMIT=1) runs every call sequentially on the calling
+# thread (the pre-pool behaviour).
+_MAX_PARALLEL_TOOLS = max(1, int(os.environ.get(
+    'INTELLI_TOOL_CONCURRENCY', os.environ.get('TOOL_CONCURRENCY_LIMIT', '8'),
+)))
+
+# One pool for the whole process; threads are reused across rounds instead of
+# being spawned and joined for every batch of tool calls.
+_TOOL_EXECUTOR = _cf.ThreadPoolExecutor(max_workers=16, thread_name_prefix='tool')
+atexit.register(_TOOL_EXECUTOR.shutdown, wait=False)
+
+_POOL_WORKER = threading.local()  # .active is True on _TOOL_EXECUTOR threads
+
+
+def _run_tool_in_ctx(ctx: dict, depth: int, name: str, args: Any,
+                     key: tuple[str, str] | None = None) -> str:
+    """_run_tool on a worker thread, carrying over the caller's thread-locals."""
+    for attr, value in ctx.items():
+        setattr(_CTX, attr, value)
+    _SUBAGENT_DEPTH.depth = depth
+    _POOL_WORKER.active = True
+    try:
+        return _run_tool(name, args, key)
+    finally:
+        _POOL_WORKER.active = False
+
+
+def _execute_round(
+    parsed: list[tuple[str, Any]],
+    on_tool_call=None,
+    on_tool_result=None,
+    early: dict[tuple[str, str], _cf.Future] | None = None,
+) -> list[str]:
+    """Execute one round of tool calls and return their results in call order.
+
+    Identical calls (same name + args) run only once, distinct
+    memory_search queries share a single embedding batch and several
+    schedule_task / watch_page calls are persisted with one write.  Independent tools
+    run concurrently on a thread pool while approval-gated tools run one at a
+    time on the calling thread, so the user is never asked to approve two
+    actions at once.  *early* holds calls already started while the reply
+    was streaming (see _start_early), keyed by _call_key; their futures are
+    awaited instead of running the call again.
+    """
+    early = early or {}
+    # Canonical args JSON, serialized once per call and shared by dedup,
+    # prefetch and the result cache.
+    keys = [_call_key(name, args) for name, args in parsed]
+    seen = {**_prefetch_memory_searches(parsed, keys), **_prefetch_registrations(parsed, keys)}
+    results: list[str | None] = [None] * len(parsed)
+    aliases: dict[tuple[str, str], list[int]] = {}   # key -> later duplicates
+    serial: list[int] = []
+    parallel: list[int] = []
+    futures: dict[_cf.Future, int] = {}
+
+    for i, (name, args) in enumerate(parsed):
+        if on_tool_call:
+            on_tool_call(name, args)
+        key = keys[i]
+        if key is not None and key in seen:
+            results[i] = seen[key]
+        elif key is not None and key in aliases:
+            aliases[key].append(i)
+        else:
+            if key is not None:
+                aliases[key] = []
+            if key in early:
+                futures[early[key]] = i
+            else:
+                (serial if name in _APPROVAL_TOOLS else parallel).append(i)
+
+    def _finish(i: int, res_text: str) -> None:
+        key = keys[i]
+        for j in [i, *(aliases.get(key, ()) if key is not None else ())]:
+            results[j] = res_text
+            if on_tool_result:
+                on_tool_result(parsed[j][0], res_text)
+
+    for i, res_text in enumerate(results):
+        if res_text is not None and on_tool_result:
+            on_tool_result(parsed[i][0], res_text)
+
+    ctx     = dict(vars(_CTX))
+    depth   = getattr(_SUBAGENT_DEPTH, 'depth', 0)
+    pending: list[int] = []
+    # A sub-agent already running on a pool thread executes its own rounds
+    # inline: blocking a worker on work queued behind it could starve the pool.
+    if (len(parallel) > 1 and _MAX_PARALLEL_TOOLS > 1
+            and not getattr(_POOL_WORKER, 'active', False)):
+        room = max(0, _MAX_PARALLEL_TOOLS - len(futures))
+        for i in parallel[:room]:
+            futures[_TOOL_EXECUTOR.submit(_run_tool_in_ctx, ctx, depth, *parsed[i], keys[i])] = i
+        pending = parallel[room:]
+    else:
+        serial = sorted(serial + parallel)
+
+    # Approval-gated (or inline) tools run here while the pool works
+    for i in serial:
+        _finish(i, _run_tool(*parsed[i], keys[i]))
+    while futures:
+        done, _ = _cf.wait(futures, return_when=_cf.FIRST_COMPLETED)
+        for fut in done:
+            i = futures.pop(fut)
+            try:
+                res_text = fut.result()
+            except Exception as exc:
+                res_text = f'[ERROR] Tool {parsed[i][0]!r} raised an exception: {exc}'
+            _finish(i, res_text)
+            if pending:
+                j = pending.pop(0)
+                futures[_TOOL_EXECUTOR.submit(_run_tool_in_ctx, ctx, depth, *parsed[j], keys[j])] = j
+
+    return results  # type: ignore[return-value]
+
+
+# Never started before the reply is complete: approval-gated tools must ask
+# the user in call order, and these are batched across the whole round.
+_NO_EARLY_START: frozenset[str] = _APPROVAL_TOOLS | {'memory_search', *_BULK_REGISTRATIONS}
+
+
+def _start_early(call: dict, early: dict[tuple[str, str], _cf.Future]) -> None:
+    """Submit a TOOL_CALL seen mid-stream so it runs while the LLM finishes.
+
+    Only tools registered pure are started: the reply may still fail or be
+    cut short, and a read-only call is safe to abandon.
+    """
+    if _MAX_PARALLEL_TOOLS < 2 or getattr(_POOL_WORKER, 'active', False):
+        return
+    name, args = _call_name(call), call.get('args', {})
+    if type(name) is not str or name in _NO_EARLY_START or not _REGISTRY.get(name, {}).get('pure'):
+        return
+    key = _call_key(name, args)
+    if key is None or key in early or len(early) >= _MAX_PARALLEL_TOOLS:
+        return
+    early[key] = _TOOL_EXECUTOR.submit(
+        _run_tool_in_ctx, dict(vars(_CTX)), getattr(_SUBAGENT_DEPTH, 'depth', 0), name, args, key,
+    )
+
+
+def _complete_turn(adapter, msgs: list[dict], temperature: float, max_tokens: int,
+                   kwargs: dict, early: dict | None = None) -> tuple[dict, list[dict]]:
+    """Ask the LLM for one reply; return (adapter result, parsed TOOL_CALLs).
+
+    Adapters advertising ``supports_streaming`` are consumed chunk by chunk
+    so TOOL_CALLs are parsed while the reply is still being generated.  When
+    *early* is given, independent pure calls are started as soon as they
+    are parsed (futures stored in *early* by _call_key), overlapping tool
+    latency with the rest of the generation; if the stream raises they are
+    cancelled and *early* is emptied.
+    """
+    if getattr(adapter, 'supports_streaming', False) is not True:
+        result = adapter.chat_complete(
+            messages=msgs,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
+        )
+        return result, _extract_tool_calls(result.get('content', ''))
+
+    parser = _ToolCallStream()
+    stream = adapter.stream_chat_complete(
+        messages=msgs,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        **kwargs,
+    )
+    try:
+        while True:
+            try:
+                chunk = next(stream)
+            except StopIteration as stop:
+                result = stop.value or {'content': parser.text}
+                break
+            for call in parser.feed(chunk):
+                if early is not None:
+                    _start_early(call, early)
+    except BaseException:
+        # The reply failed part-way: drop the calls started for it.
+        if early:
+            for fut in early.values():
+                fut.cancel()
+            early.clear()
+        raise
+    return result, parser.finish()
+
+
 def run_tool_loop(
     adapter,
     messages: list[dict],
@@ -1052,42 +2006,33 @@ def run_tool_loop(
     rounds = max(1, min(int(max_rounds), 10)) if max_rounds > 0 else MAX_ROUNDS
 
     for _round in range(rounds):
-        result = adapter.chat_complete(
-            messages=msgs,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            **kwargs,
-        )
+        early: dict[tuple[str, str], _cf.Future] = {}
+        result, calls = _complete_turn(adapter, msgs, temperature, max_tokens, kwargs, early)
         content: str = result.get('content', '')
-        calls = _extract_tool_calls(content)
 
         if not calls:
             # No tool call — we're done.
             # Still strip any TOOL_CALL lines the model may have echoed
             # in its final response (some models repeat the format).
-            clean = _TOOL_CALL_STRIP_RE.sub('', content).strip()
+            clean = _strip_tool_call_lines(content).strip()
             if clean != content:
                 result = dict(result)
                 result['content'] = clean
             return result
 
         # Remove TOOL_CALL lines from the displayed content for cleanliness
-        display_content = _TOOL_CALL_STRIP_RE.sub('', content).strip()
+        display_content = _strip_tool_call_lines(content).strip()
         result['content'] = display_content
 
         # Push assistant turn (cleaned) and execute each tool call
         msgs.append({'role': 'assistant', 'content': content})
 
-        tool_results = []
-        for call in calls:
-            name = call.get('tool') or call.get('name', '?')
-            args = call.get('args', {})
-            if on_tool_call:
-                on_tool_call(name, args)
-            res_text = _run_tool(name, args)
-            if on_tool_result:
-                on_tool_result(name, res_text)
-            tool_results.append(f'TOOL_RESULT [{name}]:\n{res_text}')
+        parsed = [(_call_name(call), call.get('args', {})) for call in calls]
+        res_texts = _execute_round(parsed, on_tool_call, on_tool_result, early)
+        tool_results = [
+            f'TOOL_RESULT [{name}]:\n{res_text}'
+            for (name, _args), res_text in zip(parsed, res_texts)
+        ]
 
         # Inject all results as a single user message
         msgs.append({'role': 'user', 'content': '\n\n'.join(tool_results)})
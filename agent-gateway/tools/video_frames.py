@@ -22,12 +22,18 @@ import base64
 import os
 import shutil
 import subprocess
+import sys
 import tempfile
 import time
 import urllib.request
 from pathlib import Path
 from typing import Any, Dict, List, Optional, TypedDict
 
+# analyse_video imports providers.adapters from the gateway root
+_GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _GATEWAY_DIR not in sys.path:
+    sys.path.insert(0, _GATEWAY_DIR)
+
 # ---------------------------------------------------------------------------
 # Types
 # ---------------------------------------------------------------------------
@@ -207,11 +213,6 @@ def describe_video(
 
     Returns the model's textual description.
     """
-    import sys as _sys
-    _gw = os.path.dirname(os.path.dirname(__file__))
-    if _gw not in _sys.path:
-        _sys.path.insert(0, _gw)
-
     from providers.adapters import get_adapter, available_providers
 
     prov = provider or (available_providers()[0] if available_providers() else 'openai')
@@ -8,8 +8,11 @@ Available tools:
 
 from __future__ import annotations
 
+import atexit
+import http.cookiejar
 import re
 import textwrap
+import threading
 from typing import Any
 from urllib.parse import quote_plus, urljoin, urlparse
 
@@ -36,11 +39,40 @@ _HEADERS = {
 }
 
 _TIMEOUT = 12  # seconds
+_POOL_SIZE = 32  # keep-alive connections per host in the shared session
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide requests.Session, created on first use.
+
+    Tools share it so repeated calls to the same host reuse pooled
+    keep-alive connections instead of paying DNS + TCP + TLS each time.
+    Its cookie jar accepts nothing, so cookies set for one user's call are
+    never sent on another's.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                requests = _requests()
+                session = requests.Session()
+                session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=_POOL_SIZE, pool_maxsize=_POOL_SIZE,
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                atexit.register(session.close)
+                _session = session
+    return _session
 
 
 def _get(url: str, **kwargs) -> Any:
     """HTTP GET with shared headers and timeout."""
-    return _requests().get(url, headers=_HEADERS, timeout=_TIMEOUT, **kwargs)
+    return get_session().get(url, headers=_HEADERS, timeout=_TIMEOUT, **kwargs)
 
 
 # ---------------------------------------------------------------------------
@@ -60,7 +92,7 @@ def web_search(query: str, max_results: int = 5) -> list[dict]:
     No API key required.
     """
     try:
-        resp = _requests().post(
+        resp = get_session().post(
             _DDG_URL,
             data={'q': query, 'b': '', 'kl': 'us-en'},
             headers={**_HEADERS, 'Content-Type': 'application/x-www-form-urlencoded'},
@@ -186,6 +218,7 @@ TOOLS = {
             'query':       {'type': 'string',  'required': True,  'description': 'Search query'},
             'max_results': {'type': 'integer', 'required': False, 'description': 'Max results (default 5)'},
         },
+        'pure': True,
     },
     'web_fetch': {
         'fn': web_fetch,
@@ -194,5 +227,6 @@ TOOLS = {
             'url':       {'type': 'string',  'required': True,  'description': 'URL to fetch'},
             'max_chars': {'type': 'integer', 'required': False, 'description': 'Max chars to return (default 8000)'},
         },
+        'pure': True,
     },
 }
@@ -2,9 +2,12 @@
 
 Speech-to-text   (STT):
   transcribe(audio_bytes, filename, provider)
+  → returns the cached transcript if this exact audio was seen before
   → calls OpenAI Whisper API (requires OPENAI_API_KEY)
   → falls back to local ``whisper`` package if installed
   → falls back to echoing silence with a clear error message
+  transcribe_long(audio_bytes, filename, provider)
+  → long recordings split into overlapping slices transcribed in parallel
 
 Text-to-speech   (TTS):
   speak_bytes(text, voice, rate, pitch)
@@ -14,16 +17,31 @@ Text-to-speech   (TTS):
 Voice listing:
   list_voices(locale_prefix)
   → returns filtered list from edge-tts voice catalogue
+  → catalogue cached in ~/.intelli/voice_cache.json for 7 days
 """
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import io
+import json
 import logging
 import os
+import re
 import tempfile
+import time
+from pathlib import Path
 from typing import AsyncIterator, List, Dict, Any, Optional
 
+import httpx
+
+try:
+    from pydub import AudioSegment as _AudioSegment  # type: ignore
+    _HAS_PYDUB = True
+except ImportError:  # pragma: no cover - optional dependency
+    _AudioSegment = None  # type: ignore
+    _HAS_PYDUB = False
+
 log = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -35,8 +53,22 @@ DEFAULT_PITCH = os.environ.get('INTELLI_TTS_PITCH', '+0Hz')
 
 # Max text length for a single TTS call (large texts should be chunked by caller)
 _MAX_TTS_CHARS = 5000
+# speak_stream synthesizes long text in sentence chunks of about this size,
+# this many at a time
+_TTS_SENTENCE_CHARS = 200
+_TTS_CONCURRENCY = int(os.environ.get('INTELLI_TTS_CONCURRENCY', '4'))
 # Max audio bytes accepted for transcription (25 MB — matches OpenAI limit)
 _MAX_AUDIO_BYTES = 25 * 1024 * 1024
+# Longest upload/read time allowed for one Whisper API call (seconds)
+_WHISPER_MAX_TIMEOUT = float(os.environ.get('INTELLI_WHISPER_TIMEOUT', '300'))
+# transcribe_long: slice length, overlap between slices, parallel API calls
+_STT_CHUNK_MS = 10 * 60 * 1000
+_STT_OVERLAP_MS = 2000
+_STT_CONCURRENCY = int(os.environ.get('INTELLI_STT_CONCURRENCY', '4'))
+# Transcripts keyed by a hash of the audio, so re-sent recordings are free
+_STT_CACHE_DIR = Path(os.environ.get('INTELLI_STT_CACHE_DIR', Path.home() / '.intelli' / 'stt_cache'))
+# Most transcripts kept; the least recently used are pruned on write
+_STT_CACHE_MAX = int(os.environ.get('INTELLI_STT_CACHE_MAX', '500'))
 
 
 # ---------------------------------------------------------------------------
@@ -57,19 +89,71 @@ def transcribe(
 
     Returns:
         Transcribed text string, or error message prefixed with ``[ERROR]``.
+        Successful transcripts are cached under ``_STT_CACHE_DIR`` by a hash
+        of the audio, so the same bytes are only transcribed once; at most
+        ``_STT_CACHE_MAX`` are kept, least recently used pruned first.
     """
     if not audio_bytes:
         return '[ERROR] No audio received'
     if len(audio_bytes) > _MAX_AUDIO_BYTES:
         return f'[ERROR] Audio too large ({len(audio_bytes)//1024//1024} MB, max 25 MB)'
 
+    # The same recording always yields the same text — replays skip Whisper
+    cache_path = _STT_CACHE_DIR / f'{hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()}.txt'
+    try:
+        text = cache_path.read_text(encoding='utf-8')
+    except OSError:
+        pass
+    else:
+        try:
+            os.utime(cache_path)   # mtime doubles as last-use time for pruning
+        except OSError:
+            pass
+        return text
+
+    text = _transcribe_uncached(audio_bytes, filename, provider_key)
+    if not text.startswith('[ERROR]'):
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_suffix('.tmp')
+            tmp.write_text(text, encoding='utf-8')
+            os.replace(tmp, cache_path)
+        except OSError as exc:
+            log.debug('transcript not cached: %s', exc)
+        else:
+            _prune_stt_cache()
+    return text
+
+
+def _prune_stt_cache() -> None:
+    """Delete the least recently used transcripts beyond ``_STT_CACHE_MAX``."""
+    try:
+        with os.scandir(_STT_CACHE_DIR) as it:
+            entries = [e for e in it if e.name.endswith('.txt')]
+        if len(entries) <= _STT_CACHE_MAX:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime_ns)
+    except OSError as exc:
+        log.debug('transcript cache not pruned: %s', exc)
+        return
+    for entry in entries[:len(entries) - _STT_CACHE_MAX]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def _transcribe_uncached(audio_bytes: bytes, filename: str, provider_key: Optional[str]) -> str:
+    """Run the Whisper strategies in order; see :func:`transcribe`."""
     api_key = provider_key or os.environ.get('OPENAI_API_KEY', '')
 
     # ── Strategy 1: OpenAI Whisper API ──────────────────────────────────────
     if api_key:
         try:
             import openai
-            client = openai.OpenAI(api_key=api_key)
+            client = openai.OpenAI(
+                api_key=api_key, timeout=_whisper_timeout(len(audio_bytes)), max_retries=2,
+            )
             with io.BytesIO(audio_bytes) as buf:
                 buf.name = filename  # openai SDK uses .name for format detection
                 transcript = client.audio.transcriptions.create(
@@ -107,6 +191,82 @@ def transcribe(
     return '[ERROR] Transcription failed. Check gateway logs for details.'
 
 
+async def transcribe_long(
+    audio_bytes: bytes,
+    filename: str = 'audio.webm',
+    provider_key: Optional[str] = None,
+) -> str:
+    """Transcribe audio, splitting long recordings into parallel Whisper calls.
+
+    Recordings longer than ``_STT_CHUNK_MS`` are cut into fixed-length
+    slices overlapping by ``_STT_OVERLAP_MS`` (needs ``pydub`` + ffmpeg),
+    transcribed ``_STT_CONCURRENCY`` at a time and stitched back together
+    with the overlapping words removed.  Without pydub, or for short audio,
+    this is :func:`transcribe` on a worker thread.  The decode and the MP3
+    export of the slices run on a worker thread too, off the event loop.
+    """
+    chunks = await asyncio.to_thread(_split_audio, audio_bytes, filename)
+    try:
+        if len(chunks) == 1:
+            return await asyncio.to_thread(transcribe, audio_bytes, filename, provider_key)
+
+        slots = asyncio.Semaphore(_STT_CONCURRENCY)
+
+        async def _one(chunk: bytes) -> str:
+            async with slots:
+                return await asyncio.to_thread(transcribe, chunk, 'chunk.mp3', provider_key)
+
+        texts = await asyncio.gather(*(_one(c) for c in chunks))
+    finally:
+        chunks.clear()   # drop the encoded slices (up to 25 MB) right away
+    for text in texts:
+        if text.startswith('[ERROR]'):
+            return text
+    merged = texts[0]
+    for text in texts[1:]:
+        merged = _merge_overlap(merged, text)
+    return merged
+
+
+def _split_audio(audio_bytes: bytes, filename: str) -> List[bytes]:
+    """MP3 slices of a long recording, or ``[audio_bytes]`` when no split applies."""
+    if not _HAS_PYDUB or not audio_bytes or len(audio_bytes) > _MAX_AUDIO_BYTES:
+        return [audio_bytes]
+    try:
+        seg = _AudioSegment.from_file(io.BytesIO(audio_bytes), format=_ext(filename).lstrip('.'))
+    except Exception as exc:
+        log.debug('audio not split: %s', exc)
+        return [audio_bytes]
+    if len(seg) <= _STT_CHUNK_MS + _STT_OVERLAP_MS:
+        return [audio_bytes]
+    chunks: List[bytes] = []
+    for start in range(0, len(seg), _STT_CHUNK_MS):
+        buf = io.BytesIO()
+        seg[max(0, start - _STT_OVERLAP_MS):start + _STT_CHUNK_MS].export(buf, format='mp3')
+        chunks.append(buf.getvalue())
+    return chunks
+
+
+_WORD_PUNCT = '.,!?;:"\''
+
+
+def _merge_overlap(before: str, after: str, max_words: int = 40) -> str:
+    """Join two transcripts, dropping the words both slices heard in the overlap."""
+    a, b = before.split(), after.split()
+    tail = [w.strip(_WORD_PUNCT).lower() for w in a[-max_words:]]
+    head = [w.strip(_WORD_PUNCT).lower() for w in b[:max_words]]
+    for k in range(min(len(tail), len(head)), 0, -1):
+        if tail[-k:] == head[:k]:
+            return ' '.join(a + b[k:])
+    return ' '.join(a + b)
+
+
+def _whisper_timeout(size: int) -> httpx.Timeout:
+    """Upload/read allowance for *size* audio bytes: ~50 KB/s, 30 s to 300 s."""
+    budget = min(_WHISPER_MAX_TIMEOUT, 30.0 + size / 50_000)
+    return httpx.Timeout(connect=10.0, read=budget, write=budget, pool=10.0)
+
+
 def _ext(filename: str) -> str:
     """Return the file extension including the dot, e.g. '.webm'."""
     _, ext = os.path.splitext(filename)
@@ -125,6 +285,9 @@ async def speak_bytes(
 ) -> bytes:
     """Convert text to speech using edge-tts and return MP3 bytes.
 
+    Buffers the whole clip — interactive callers should stream
+    :func:`speak_stream` instead so audio starts before synthesis ends.
+
     Args:
         text:   Text to speak (max ``_MAX_TTS_CHARS`` characters).
         voice:  edge-tts voice short name, e.g. ``en-US-JennyNeural``.
@@ -134,18 +297,20 @@ async def speak_bytes(
     Returns:
         MP3 audio bytes.
     """
-    import edge_tts  # type: ignore
+    buf = io.BytesIO()
+    async for chunk in speak_stream(text, voice=voice, rate=rate, pitch=pitch):
+        buf.write(chunk)
+    return buf.getvalue()
 
-    text = text[:_MAX_TTS_CHARS].strip()
-    if not text:
-        return b''
+
+async def _synthesize(text: str, voice: str, rate: str, pitch: str) -> AsyncIterator[bytes]:
+    """Yield the MP3 audio chunks edge-tts produces for *text*."""
+    import edge_tts  # type: ignore
 
     comm = edge_tts.Communicate(text, voice=voice, rate=rate, pitch=pitch)
-    buf = io.BytesIO()
     async for chunk in comm.stream():
         if chunk['type'] == 'audio':
-            buf.write(chunk['data'])
-    return buf.getvalue()
+            yield chunk['data']
 
 
 async def speak_stream(
@@ -154,17 +319,45 @@ async def speak_stream(
     rate: str = DEFAULT_RATE,
     pitch: str = DEFAULT_PITCH,
 ) -> AsyncIterator[bytes]:
-    """Stream MP3 audio chunks for a text string — more responsive for long text."""
-    import edge_tts  # type: ignore
+    """Stream MP3 audio chunks for a text string — more responsive for long text.
 
+    Long text is split into sentence chunks that are synthesized up to
+    ``_TTS_CONCURRENCY`` at a time; audio is yielded strictly in order, so
+    the first sentence plays while later ones are still being generated.
+    """
     text = text[:_MAX_TTS_CHARS].strip()
     if not text:
         return
 
-    comm = edge_tts.Communicate(text, voice=voice, rate=rate, pitch=pitch)
-    async for chunk in comm.stream():
-        if chunk['type'] == 'audio':
-            yield chunk['data']
+    parts = split_sentences(text, max_chars=_TTS_SENTENCE_CHARS)
+    if len(parts) == 1:
+        async for data in _synthesize(text, voice, rate, pitch):
+            yield data
+        return
+
+    slots = asyncio.Semaphore(_TTS_CONCURRENCY)
+    queues: List[asyncio.Queue] = [asyncio.Queue() for _ in parts]
+
+    async def _produce(part: str, queue: asyncio.Queue) -> None:
+        async with slots:
+            try:
+                async for data in _synthesize(part, voice, rate, pitch):
+                    queue.put_nowait(data)
+            except Exception as exc:
+                queue.put_nowait(exc)
+            finally:
+                queue.put_nowait(None)
+
+    tasks = [asyncio.create_task(_produce(p, q)) for p, q in zip(parts, queues)]
+    try:
+        for queue in queues:
+            while (data := await queue.get()) is not None:
+                if isinstance(data, Exception):
+                    raise data
+                yield data
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
 # ---------------------------------------------------------------------------
@@ -173,30 +366,69 @@ async def speak_stream(
 
 _voice_cache: Optional[List[Dict[str, Any]]] = None
 
+# The edge-tts catalogue barely changes, so it is kept on disk between
+# restarts instead of being re-downloaded by every new process.
+_VOICE_CACHE_FILE = Path(os.environ.get(
+    'INTELLI_VOICE_CACHE_FILE', Path.home() / '.intelli' / 'voice_cache.json'
+))
+_VOICE_CACHE_TTL = 7 * 24 * 3600   # seconds
+
+
+def _read_voice_cache() -> Optional[List[Dict[str, Any]]]:
+    """Voices from the disk cache, or None when it is missing, stale or unreadable."""
+    try:
+        data = json.loads(_VOICE_CACHE_FILE.read_text(encoding='utf-8'))
+        if time.time() - float(data['fetched_at']) < _VOICE_CACHE_TTL:
+            return list(data['voices'])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _write_voice_cache(voices: List[Dict[str, Any]]) -> None:
+    try:
+        _VOICE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _VOICE_CACHE_FILE.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'fetched_at': time.time(), 'voices': voices}), encoding='utf-8')
+        os.replace(tmp, _VOICE_CACHE_FILE)
+    except OSError as exc:
+        log.debug('voice cache not written: %s', exc)
+
+
+async def _fetch_voices() -> List[Dict[str, Any]]:
+    """Download the edge-tts voice catalogue."""
+    import edge_tts  # type: ignore
+
+    raw = await edge_tts.list_voices()
+    return [
+        {
+            'name':   v['ShortName'],
+            'locale': v['Locale'],
+            'gender': v['Gender'],
+            'label':  v.get('FriendlyName', v['ShortName']),
+        }
+        for v in raw
+    ]
+
 
 async def list_voices(locale_prefix: str = '') -> List[Dict[str, Any]]:
     """Return available edge-tts voices, optionally filtered by locale prefix.
 
-    Results are cached after the first call.
+    Results are cached in memory after the first call and on disk for
+    ``_VOICE_CACHE_TTL`` seconds, so restarts skip the network fetch.
 
     Args:
         locale_prefix: Filter by locale, e.g. ``'en-'`` or ``'en-US'``.
                        Empty string returns all voices.
     """
     global _voice_cache
-    import edge_tts  # type: ignore
 
     if _voice_cache is None:
-        raw = await edge_tts.list_voices()
-        _voice_cache = [
-            {
-                'name':   v['ShortName'],
-                'locale': v['Locale'],
-                'gender': v['Gender'],
-                'label':  v.get('FriendlyName', v['ShortName']),
-            }
-            for v in raw
-        ]
+        voices = _read_voice_cache()
+        if voices is None:
+            voices = await _fetch_voices()
+            _write_voice_cache(voices)
+        _voice_cache = voices
 
     if locale_prefix:
         return [v for v in _voice_cache if v['locale'].startswith(locale_prefix)]
@@ -207,20 +439,39 @@ async def list_voices(locale_prefix: str = '') -> List[Dict[str, Any]]:
 # Utility — split long text into sentences for chunked TTS
 # ---------------------------------------------------------------------------
 
+# A sentence terminator and the whitespace run after it
+_SENT_SPLIT_RE = re.compile(r'[.!?]\s+')
+
+
+def _sentences(text: str):
+    """Yield the sentences of *text* without building the whole split list."""
+    start = 0
+    for m in _SENT_SPLIT_RE.finditer(text):
+        yield text[start:m.start() + 1]
+        start = m.end()
+    yield text[start:]
+
+
 def split_sentences(text: str, max_chars: int = 1000) -> List[str]:
-    """Split text into sentence-sized chunks for streaming TTS."""
-    import re
-    # Split on sentence boundaries
-    parts = re.split(r'(?<=[.!?])\s+', text)
+    """Split text into sentence-sized chunks for streaming TTS.
+
+    Sentences are packed greedily into chunks of at most *max_chars*
+    (a single longer sentence becomes its own chunk).
+    """
     chunks: List[str] = []
-    current = ''
-    for part in parts:
-        if len(current) + len(part) + 1 > max_chars:
-            if current:
-                chunks.append(current.strip())
-            current = part
+    current: List[str] = []   # sentences of the chunk being built
+    length = 0                # len(' '.join(current))
+    for part in _sentences(text):
+        if length + len(part) + 1 > max_chars:
+            if length:
+                chunks.append(' '.join(current).strip())
+            current, length = [part], len(part)
+        elif length:
+            current.append(part)
+            length += len(part) + 1
         else:
-            current = f'{current} {part}' if current else part
-    if current.strip():
-        chunks.append(current.strip())
+            current, length = [part], len(part)
+    joined = ' '.join(current).strip()
+    if joined:
+        chunks.append(joined)
     return chunks
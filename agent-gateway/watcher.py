@@ -5,22 +5,37 @@ extracted text changes beyond a configurable threshold, all pending alerts are
 queued and the latest diff stored per watcher.
 
 Storage:  ~/.intelli/watchers.json  (persists across restarts)
+          ~/.intelli/baselines/<id>.txt  (last seen page text per watcher)
 
 Environment variables:
   INTELLI_WATCHERS_FILE – override default storage path.
-  INTELLI_WATCHER_TICK  – poll loop interval in seconds (default 30).
+  INTELLI_WATCHER_TICK  – retry delay in seconds after a failed fetch (default 30).
+  INTELLI_WATCHER_WORKERS – watchers fetched concurrently per tick (default 8).
 """
 from __future__ import annotations
 
 import difflib
+import functools
+import hashlib
+import heapq
+import itertools
 import json
 import os
 import pathlib
 import threading
 import time
 import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional
 
+try:
+    import orjson as _orjson  # type: ignore
+    _HAS_ORJSON = True
+except ImportError:  # pragma: no cover - optional dependency
+    _orjson = None  # type: ignore
+    _HAS_ORJSON = False
+
 # ---------------------------------------------------------------------------
 # Config
 # ---------------------------------------------------------------------------
@@ -30,21 +45,60 @@ _WATCHERS_FILE = pathlib.Path(
         str(pathlib.Path.home() / '.intelli' / 'watchers.json'),
     )
 )
-_TICK = int(os.environ.get('INTELLI_WATCHER_TICK', '30'))  # seconds between poll cycles
+_TICK = int(os.environ.get('INTELLI_WATCHER_TICK', '30'))  # retry delay after a failed fetch
 _MAX_ALERTS_PER_WATCHER = 20
 _MAX_CONTENT_CHARS = 80_000  # store at most 80 KB of text per baseline
+_FETCH_WORKERS = max(1, int(os.environ.get('INTELLI_WATCHER_WORKERS', '8')))
+
+# Due watchers are fetched concurrently: a tick costs the slowest fetch, not their sum
+_executor = ThreadPoolExecutor(max_workers=_FETCH_WORKERS, thread_name_prefix='watcher-fetch')
 
 # ---------------------------------------------------------------------------
 # In-memory state (rebuilt from disk on startup)
 # ---------------------------------------------------------------------------
+# _lock guards _watchers and the watcher dicts, _alerts_lock guards _alerts.
+# Both are held only for in-memory work; _save() snapshots under _lock and
+# serializes + writes outside it, with _save_lock keeping writes in order.
 _lock: threading.Lock = threading.Lock()
+_alerts_lock: threading.Lock = threading.Lock()
+_save_lock: threading.Lock = threading.Lock()
 _watchers: dict[str, dict]  = {}   # id → watcher dict
 _alerts:   dict[str, list]  = {}   # id → list of alert dicts
 
+# Poll schedule: a heap of (due_ts, id) entries.  _scheduled holds each
+# watcher's current due time; heap entries that disagree with it are stale
+# (rescheduled, disabled or deleted watchers) and are dropped when popped.
+_heap:      list[tuple[float, str]] = []
+_scheduled: dict[str, float] = {}
+_wake = threading.Event()   # set when the earliest due time may have moved
+
 
 # ---------------------------------------------------------------------------
 # Persistence helpers
 # ---------------------------------------------------------------------------
+def _baselines_dir() -> pathlib.Path:
+    return _WATCHERS_FILE.parent / 'baselines'
+
+
+def _baseline_path(wid: str) -> pathlib.Path:
+    return _baselines_dir() / f'{wid}.txt'
+
+
+def _write_atomic(path: pathlib.Path, text: str) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def _store_baseline(wid: str, text: str) -> None:
+    """Persist one watcher's baseline text to its own file."""
+    try:
+        _baselines_dir().mkdir(parents=True, exist_ok=True)
+        _write_atomic(_baseline_path(wid), text)
+    except Exception:
+        pass
+
+
 def _load() -> None:
     global _watchers
     _WATCHERS_FILE.parent.mkdir(parents=True, exist_ok=True)
@@ -55,16 +109,40 @@ def _load() -> None:
         _watchers = {w['id']: w for w in data if isinstance(w, dict) and 'id' in w}
     except Exception:
         _watchers = {}
+    for wid, w in _watchers.items():
+        if 'baseline_text' in w:
+            # Older files kept baselines inline; move them out on first load
+            _store_baseline(wid, w['baseline_text'])
+            continue
+        try:
+            w['baseline_text'] = _baseline_path(wid).read_text(encoding='utf-8')
+        except OSError:
+            w['baseline_text'] = ''
+    _reschedule_all()
+
+
+def _dumps_pretty(obj) -> str:
+    """Indented JSON for the metadata file — orjson when installed."""
+    if _HAS_ORJSON:
+        try:
+            return _orjson.dumps(obj, option=_orjson.OPT_INDENT_2).decode()
+        except TypeError:
+            pass  # e.g. ints wider than 64 bits — the stdlib encoder copes
+    return json.dumps(obj, indent=2, ensure_ascii=False)
 
 
 def _save() -> None:
-    try:
-        _WATCHERS_FILE.write_text(
-            json.dumps(list(_watchers.values()), indent=2, ensure_ascii=False),
-            encoding='utf-8',
-        )
-    except Exception:
-        pass
+    """Write watcher metadata; baselines live in baselines/<id>.txt (_store_baseline).
+
+    Must be called without _lock held: only the snapshot is taken under it.
+    """
+    with _save_lock:
+        with _lock:
+            meta = [{k: v for k, v in w.items() if k != 'baseline_text'} for w in _watchers.values()]
+        try:
+            _write_atomic(_WATCHERS_FILE, _dumps_pretty(meta))
+        except Exception:
+            pass
 
 
 # ---------------------------------------------------------------------------
@@ -72,34 +150,81 @@ def _save() -> None:
 # ---------------------------------------------------------------------------
 import re as _re
 
-_TAG_RE    = _re.compile(r'<[^>]+>')
-_SPACE_RE  = _re.compile(r'\s+')
-_SCRIPT_RE = _re.compile(r'<(script|style)[^>]*>.*?</\1>', _re.DOTALL | _re.IGNORECASE)
+try:
+    from selectolax.parser import HTMLParser as _HTMLParser  # single C pass
+    _HAS_SELECTOLAX = True
+except ImportError:  # pragma: no cover - optional dependency
+    _HAS_SELECTOLAX = False
+
+# An unclosed <script>/<style> runs to the end of the document (as in a
+# browser), so a malformed page never makes the scan restart at every tag.
+_SCRIPT_RE = _re.compile(r'<(script|style)\b[^>]*>.*?(?:</\1\s*>|\Z)', _re.DOTALL | _re.IGNORECASE)
+# Tags and whitespace collapse to one space in a single pass.  "[^<>]" keeps
+# a stray "<" from scanning ahead to the next ">" in the document.
+_TAG_SPACE_RE = _re.compile(r'(?:<[^<>]+>|\s)+')
 
 
 def _extract_text(html: str) -> str:
+    if _HAS_SELECTOLAX:
+        tree = _HTMLParser(html)
+        tree.strip_tags(['script', 'style'])
+        node = tree.body or tree.root
+        text = ' '.join(node.text(separator=' ').split()) if node is not None else ''
+        return text[:_MAX_CONTENT_CHARS]
     html = _SCRIPT_RE.sub('', html)
-    text = _TAG_RE.sub(' ', html)
-    return _SPACE_RE.sub(' ', text).strip()[:_MAX_CONTENT_CHARS]
+    return _TAG_SPACE_RE.sub(' ', html).strip()[:_MAX_CONTENT_CHARS]
 
 
 # ---------------------------------------------------------------------------
 # Fetch helper (uses httpx if available, falls back to urllib)
 # ---------------------------------------------------------------------------
-def _fetch(url: str, timeout: int = 15) -> Optional[str]:
+NOT_MODIFIED = object()   # _fetch result for an HTTP 304
+
+
+def _fetch(url: str, timeout: int = 15, validators: Optional[dict] = None):
+    """GET *url*; return its text, NOT_MODIFIED, or None on failure.
+
+    *validators* holds the 'etag' / 'last_modified' of the previous response;
+    they are sent as If-None-Match / If-Modified-Since so an unchanged page
+    costs a 304 instead of a full download, and are replaced in place by the
+    new response's values.
+    """
+    headers = {'User-Agent': 'IntelliWatcher/1.0'}
+    if validators is not None:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+    def _remember(resp_headers) -> None:
+        if validators is not None:
+            validators['etag'] = resp_headers.get('ETag', '')
+            validators['last_modified'] = resp_headers.get('Last-Modified', '')
+
     try:
         import httpx
-        r = httpx.get(url, follow_redirects=True, timeout=timeout,
-                      headers={'User-Agent': 'IntelliWatcher/1.0'})
+        r = httpx.get(url, follow_redirects=True, timeout=timeout, headers=headers)
+        if r.status_code == 304:
+            return NOT_MODIFIED
         r.raise_for_status()
+        _remember(r.headers)
         return r.text
     except Exception:
         pass
+    import gzip
+    import urllib.error
+    import urllib.request
     try:
-        import urllib.request
-        req = urllib.request.Request(url, headers={'User-Agent': 'IntelliWatcher/1.0'})
+        # httpx negotiates compression itself; urllib needs asking (and decoding)
+        req = urllib.request.Request(url, headers={**headers, 'Accept-Encoding': 'gzip'})
         with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return resp.read().decode('utf-8', errors='replace')
+            body = resp.read()
+            if resp.headers.get('Content-Encoding', '').lower() == 'gzip':
+                body = gzip.decompress(body)
+            _remember(resp.headers)
+            return body.decode('utf-8', errors='replace')
+    except urllib.error.HTTPError as exc:
+        return NOT_MODIFIED if exc.code == 304 else None
     except Exception:
         return None
 
@@ -107,90 +232,197 @@ def _fetch(url: str, timeout: int = 15) -> Optional[str]:
 # ---------------------------------------------------------------------------
 # Diff helper
 # ---------------------------------------------------------------------------
+@functools.lru_cache(maxsize=32)
+def _char_counts(text: str) -> Counter:
+    """Character multiset of *text*; a baseline is counted once, not every poll."""
+    return Counter(text)
+
+
 def _similarity(a: str, b: str) -> float:
-    """Return 0.0–1.0 similarity via SequenceMatcher (1.0 = identical)."""
-    if not a and not b:
+    """Return 0.0–1.0 similarity (1.0 = identical).
+
+    Same value as ``difflib.SequenceMatcher(None, a, b).quick_ratio()`` — the
+    share of characters the two texts have in common, ignoring order — but
+    counted in C by Counter instead of a Python loop over both texts.  An
+    unchanged page short-circuits on plain equality.
+    """
+    if a == b:
         return 1.0
     if not a or not b:
         return 0.0
-    return difflib.SequenceMatcher(None, a, b).quick_ratio()
+    common = _char_counts(a) & _char_counts(b)
+    return 2.0 * sum(common.values()) / (len(a) + len(b))
+
+
+def _digest(text: str) -> str:
+    """Short fingerprint of extracted page text, stored as baseline_hash."""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+
+# Churn that changes on every load without the page changing: clock times,
+# long digit runs (epoch timestamps, counters, cache busters) and long hex
+# tokens (CSRF / session ids).
+_VOLATILE_RE = _re.compile(r'\b(?:\d{1,2}:\d{2}(?::\d{2})?|\d{6,}|[0-9a-fA-F]{16,})\b')
+
+
+def _canon_digest(text: str) -> str:
+    """Fingerprint of *text* with volatile tokens removed, stored as baseline_canon_hash."""
+    return _digest(_VOLATILE_RE.sub('', text))
 
 
-def _unified_diff(a: str, b: str, n: int = 3) -> str:
-    lines_a = a.splitlines(keepends=True)
-    lines_b = b.splitlines(keepends=True)
-    diff = list(difflib.unified_diff(lines_a, lines_b, fromfile='before', tofile='after', n=n))
-    return ''.join(diff[:200])  # cap at 200 lines
+def _unified_diff(a: str, b: str, n: int = 3, max_lines: int = 200) -> str:
+    """First *max_lines* lines of the unified diff, generated lazily.
+
+    unified_diff is a generator, so a full-page reflow stops being diffed
+    once the cap is reached instead of materializing every hunk first.
+    """
+    diff = difflib.unified_diff(a.splitlines(keepends=True), b.splitlines(keepends=True),
+                                fromfile='before', tofile='after', n=n)
+    return ''.join(itertools.islice(diff, max_lines))
 
 
 # ---------------------------------------------------------------------------
 # Background poll loop
 # ---------------------------------------------------------------------------
 def _poll_one(watcher: dict) -> None:
-    """Check one watcher, queue alert if content changed enough."""
+    """Check one watcher, queue alert if content changed enough.
+
+    Runs on a fetch worker concurrently with other watchers' polls, so the
+    watcher dict is only written under _lock (_save() snapshots it there).
+    """
     wid      = watcher['id']
     url      = watcher['url']
     threshold = float(watcher.get('notify_threshold', 0.02))  # fraction changed
 
-    html = _fetch(url)
+    baseline = watcher.get('baseline_text', '')
+    validators = {k: watcher.get(k, '') for k in ('etag', 'last_modified')} if baseline else {}
+    html = _fetch(url, validators=validators)
     if html is None:
-        watcher['last_error'] = f'fetch failed at {time.strftime("%H:%M:%S")}'
+        with _lock:
+            watcher['last_error'] = f'fetch failed at {time.strftime("%H:%M:%S")}'
+        return
+    if html is NOT_MODIFIED:
+        with _lock:
+            watcher.pop('last_error', None)
+            watcher['last_checked'] = time.time()
         return
 
     text = _extract_text(html)
-    watcher.pop('last_error', None)
-    watcher['last_checked'] = time.time()
+    digest = _digest(text)
+    now = time.time()
+    updates: dict = {'last_checked': now, **validators}
 
-    baseline = watcher.get('baseline_text', '')
     if not baseline:
         # First fetch — just store baseline
-        watcher['baseline_text'] = text
-        watcher['baseline_at']   = time.time()
-        return
+        updates.update(baseline_text=text, baseline_hash=digest,
+                       baseline_canon_hash=_canon_digest(text), baseline_at=now)
+    else:
+        known = watcher.get('baseline_hash') or _digest(baseline)  # pre-hash baselines
+        canon = watcher.get('baseline_canon_hash') or _canon_digest(baseline)
+        updates.update(baseline_hash=known, baseline_canon_hash=canon)
+        # An unchanged page (the usual case) has nothing to score or diff,
+        # and neither does one where only a clock or token moved
+        if digest != known and _canon_digest(text) != canon:
+            changed_fraction = 1.0 - _similarity(baseline, text)
+            if changed_fraction >= threshold:
+                diff = _unified_diff(baseline, text)
+                alert = {
+                    'watcher_id':       wid,
+                    'url':              url,
+                    'ts':               now,
+                    'changed_fraction': round(changed_fraction, 4),
+                    'diff_snippet':     diff[:2000],
+                }
+                with _alerts_lock:
+                    _alerts.setdefault(wid, [])
+                    _alerts[wid].append(alert)
+                    if len(_alerts[wid]) > _MAX_ALERTS_PER_WATCHER:
+                        _alerts[wid] = _alerts[wid][-_MAX_ALERTS_PER_WATCHER:]
+                # Update baseline to latest so we diff future changes against now
+                updates.update(baseline_text=text, baseline_hash=digest,
+                               baseline_canon_hash=_canon_digest(text),
+                               baseline_at=now, last_alert_ts=now)
+
+    if 'baseline_text' in updates:
+        _store_baseline(wid, text)
+    with _lock:
+        watcher.pop('last_error', None)
+        watcher.update(updates)
 
-    sim = _similarity(baseline, text)
-    changed_fraction = 1.0 - sim
-    if changed_fraction >= threshold:
-        diff = _unified_diff(baseline, text)
-        alert = {
-            'watcher_id':       wid,
-            'url':              url,
-            'ts':               time.time(),
-            'changed_fraction': round(changed_fraction, 4),
-            'diff_snippet':     diff[:2000],
-        }
-        with _lock:
-            _alerts.setdefault(wid, [])
-            _alerts[wid].append(alert)
-            if len(_alerts[wid]) > _MAX_ALERTS_PER_WATCHER:
-                _alerts[wid] = _alerts[wid][-_MAX_ALERTS_PER_WATCHER:]
-        # Update baseline to latest so we diff future changes against now
-        watcher['baseline_text'] = text
-        watcher['baseline_at']   = time.time()
-        watcher['last_alert_ts'] = time.time()
+
+def _next_due(w: dict) -> float:
+    return w.get('last_checked', 0) + int(w.get('interval_minutes', 60)) * 60
+
+
+def _schedule(w: dict, due: Optional[float] = None) -> None:
+    """(Re)schedule *w* at *due* (default: its next interval); caller holds _lock."""
+    due = _next_due(w) if due is None else due
+    _scheduled[w['id']] = due
+    heapq.heappush(_heap, (due, w['id']))
+    _wake.set()
+
+
+def _reschedule_all() -> None:
+    with _lock:
+        _heap.clear()
+        _scheduled.clear()
+        for w in _watchers.values():
+            if w.get('enabled', True):
+                _schedule(w)
+
+
+def _due_watchers(now: float) -> list[dict]:
+    """Pop every watcher due by *now* off the schedule."""
+    due: list[dict] = []
+    with _lock:
+        while _heap and _heap[0][0] <= now:
+            ts, wid = heapq.heappop(_heap)
+            if _scheduled.get(wid) != ts:
+                continue   # stale entry
+            del _scheduled[wid]
+            w = _watchers.get(wid)
+            if w is not None and w.get('enabled', True):
+                due.append(w)
+    return due
+
+
+def _seconds_until_due(now: float) -> Optional[float]:
+    """Time until the earliest scheduled poll, or None when nothing is scheduled."""
+    with _lock:
+        while _heap and _scheduled.get(_heap[0][1]) != _heap[0][0]:
+            heapq.heappop(_heap)   # drop stale entries so they cannot cause wake-ups
+        return max(0.0, _heap[0][0] - now) if _heap else None
+
+
+def _poll_due(now: float) -> int:
+    """Poll every due watcher concurrently; return how many were polled.
+
+    The metadata file is written once for the whole tick, not once per watcher.
+    """
+    due = _due_watchers(now)
+    futures = [_executor.submit(_poll_one, w) for w in due]
+    for fut in as_completed(futures):
+        try:
+            fut.result()
+        except Exception:
+            pass
+    with _lock:
+        for w in due:
+            if _watchers.get(w['id']) is w and w['id'] not in _scheduled:
+                # A failed fetch leaves last_checked alone: retry after _TICK
+                _schedule(w, max(_next_due(w), now + _TICK))
+    if due:
+        _save()
+    return len(due)
 
 
 def _poll_loop() -> None:
+    """Sleep until the earliest due watcher (or a schedule change), then poll."""
     _load()
     while True:
-        now = time.time()
-        with _lock:
-            ids = list(_watchers.keys())
-        for wid in ids:
-            with _lock:
-                w = _watchers.get(wid)
-            if not w or not w.get('enabled', True):
-                continue
-            interval = int(w.get('interval_minutes', 60)) * 60
-            last = w.get('last_checked', 0)
-            if now - last >= interval:
-                try:
-                    _poll_one(w)
-                    with _lock:
-                        _save()
-                except Exception:
-                    pass
-        time.sleep(_TICK)
+        _wake.clear()
+        _poll_due(time.time())
+        _wake.wait(_seconds_until_due(time.time()))
 
 
 # ---------------------------------------------------------------------------
@@ -218,22 +450,35 @@ def add_watcher(
     interval_minutes: int = 60,
     notify_threshold: float = 0.02,
 ) -> dict:
-    wid = str(uuid.uuid4())
-    w: dict = {
-        'id':               wid,
-        'url':              url,
-        'label':            label or url,
-        'interval_minutes': max(1, int(interval_minutes)),
-        'notify_threshold': max(0.001, float(notify_threshold)),
-        'enabled':          True,
-        'created_at':       time.time(),
-        'last_checked':     0,
-        'baseline_text':    '',
-    }
+    return add_watchers_bulk([{
+        'url': url, 'label': label,
+        'interval_minutes': interval_minutes, 'notify_threshold': notify_threshold,
+    }])[0]
+
+
+def add_watchers_bulk(specs: list[dict]) -> list[dict]:
+    """Add several watchers (add_watcher kwargs each) with one file write."""
+    new: list[dict] = []
+    for spec in specs:
+        url = spec['url']
+        new.append({
+            'id':               str(uuid.uuid4()),
+            'url':              url,
+            'label':            spec.get('label') or url,
+            'interval_minutes': max(1, int(spec.get('interval_minutes', 60))),
+            'notify_threshold': max(0.001, float(spec.get('notify_threshold', 0.02))),
+            'enabled':          True,
+            'created_at':       time.time(),
+            'last_checked':     0,
+            'baseline_text':    '',
+        })
     with _lock:
-        _watchers[wid] = w
+        for w in new:
+            _watchers[w['id']] = w
+            _schedule(w)
+    if new:
         _save()
-    return _public(w)
+    return [_public(w) for w in new]
 
 
 def list_watchers() -> list[dict]:
@@ -256,7 +501,11 @@ def update_watcher(wid: str, **kwargs) -> Optional[dict]:
         for key in ('label', 'interval_minutes', 'notify_threshold', 'enabled'):
             if key in kwargs:
                 w[key] = kwargs[key]
-        _save()
+        if w.get('enabled', True):
+            _schedule(w)
+        else:
+            _scheduled.pop(wid, None)
+    _save()
     return _public(w)
 
 
@@ -265,13 +514,16 @@ def delete_watcher(wid: str) -> bool:
         if wid not in _watchers:
             return False
         del _watchers[wid]
+        _scheduled.pop(wid, None)
+    with _alerts_lock:
         _alerts.pop(wid, None)
-        _save()
+    _save()
+    _baseline_path(wid).unlink(missing_ok=True)
     return True
 
 
 def get_alerts(wid: str, clear: bool = False) -> list[dict]:
-    with _lock:
+    with _alerts_lock:
         al = list(_alerts.get(wid, []))
         if clear:
             _alerts[wid] = []
@@ -279,7 +531,7 @@ def get_alerts(wid: str, clear: bool = False) -> list[dict]:
 
 
 def get_all_alerts(limit: int = 50) -> list[dict]:
-    with _lock:
+    with _alerts_lock:
         all_alerts = []
         for al in _alerts.values():
             all_alerts.extend(al)
@@ -294,13 +546,18 @@ def trigger_watcher(wid: str) -> dict:
         if not w:
             return {'error': f'watcher {wid!r} not found'}
         w['last_checked'] = 0
+        if w.get('enabled', True):
+            _schedule(w)
     return {'triggered': wid}
 
 
+_PRIVATE_KEYS = frozenset({'baseline_text', 'baseline_hash', 'baseline_canon_hash'})
+
+
 def _public(w: dict) -> dict:
     """Return a copy of watcher dict without the (potentially large) baseline_text."""
-    out = {k: v for k, v in w.items() if k != 'baseline_text'}
+    out = {k: v for k, v in w.items() if k not in _PRIVATE_KEYS}
     out['has_baseline'] = bool(w.get('baseline_text'))
-    with _lock:
+    with _alerts_lock:
         out['pending_alerts'] = len(_alerts.get(w['id'], []))
     return out
@@ -13,8 +13,13 @@ AGENT_GATEWAY_WEBHOOKS_FILE
 AGENT_GATEWAY_WEBHOOK_TIMEOUT
     HTTP timeout in seconds for outbound webhook calls.  Default: 5.
 AGENT_GATEWAY_WEBHOOK_MAX_RETRIES
-    Total delivery attempts (initial + retries) per event.  Between attempts
-    the thread sleeps for 2**attempt seconds (1 s, 2 s, 4 s …).  Default: 3.
+    Total delivery attempts (initial + retries) per event.  Attempts are
+    2**attempt seconds apart (1 s, 2 s, 4 s …).  Default: 3.
+AGENT_GATEWAY_WEBHOOK_KEEPALIVE
+    Idle keep-alive connections held by the shared delivery client.  Default: 32.
+AGENT_GATEWAY_WEBHOOK_SAVE_DELAY
+    Seconds registry changes are batched before WEBHOOKS_FILE is rewritten
+    (pending changes are also flushed at exit).  Default: 0.2.
 
 Webhook delivery
 ----------------
@@ -26,23 +31,45 @@ Outbound POST requests are sent with:
 
 If delivery fails (network error, timeout, non-2xx), the failure is logged
 but does NOT block the gateway.  Delivery is best-effort, fire-and-forget
-from an executor thread.
+from an executor thread; deliveries waiting to retry are parked on a timer
+heap rather than sleeping, so a failing endpoint never ties up a worker.
 """
 from __future__ import annotations
 
+import atexit
+import functools
 import hmac
 import hashlib
+import heapq
+import itertools
 import json
 import os
+import sys
 import threading
 import time
 import uuid
 from collections import deque
+from operator import itemgetter
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Deque, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Deque, Dict, Iterator, List, Optional
+import httpx
 from cryptography.fernet import Fernet, InvalidToken
 
+try:
+    import orjson as _orjson  # type: ignore
+    _HAS_ORJSON = True
+except ImportError:
+    _orjson = None  # type: ignore
+    _HAS_ORJSON = False
+
+try:
+    import h2  # type: ignore  # noqa: F401 — enables httpx's HTTP/2 support
+    _HAS_H2 = True
+except ImportError:
+    _HAS_H2 = False
+
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
@@ -63,15 +90,37 @@ VALID_EVENTS = frozenset({
 # Set AGENT_GATEWAY_WEBHOOK_MAX_RETRIES=0 for fire-and-forget with no retry.
 _MAX_RETRIES: int = int(os.environ.get('AGENT_GATEWAY_WEBHOOK_MAX_RETRIES', '3'))
 
+# Headers shared by every delivery; per-event fields are merged in by _deliver.
+_BASE_HEADERS = MappingProxyType({'Content-Type': 'application/json'})
+
+# Idle keep-alive connections kept per delivery client.
+_KEEPALIVE: int = int(os.environ.get('AGENT_GATEWAY_WEBHOOK_KEEPALIVE', '32'))
+
+# Seconds registry mutations are coalesced before the file is rewritten.
+_SAVE_DELAY: float = float(os.environ.get('AGENT_GATEWAY_WEBHOOK_SAVE_DELAY', '0.2'))
+
 # ---------------------------------------------------------------------------
 # Internal state
 # ---------------------------------------------------------------------------
-_lock = threading.Lock()
+_lock = threading.Lock()                  # guards _hooks / _loaded / _save_timer
 _hooks: Dict[str, Dict[str, Any]] = {}   # id -> {id, url, events, created_at}
 _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='webhook')
 _loaded = False
-
-# Per-hook delivery log (in-memory, not persisted across restarts)
+_save_lock = threading.Lock()             # serialises registry file writes
+_save_timer: Optional[threading.Timer] = None
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+_ts_cache: tuple = (0, '')   # (epoch second, formatted) for _utc_now_str
+
+# Deliveries waiting out a retry back-off: heap of (due monotonic, seq, steps).
+_retry_heap: List[tuple] = []
+_retry_seq = itertools.count()
+_retry_cv = threading.Condition()
+_retry_thread: Optional[threading.Thread] = None
+
+# Per-hook delivery log (in-memory, not persisted across restarts).  Never
+# guarded by _lock: writers use _log_delivery and readers get_deliveries,
+# both GIL-atomic, so delivery bookkeeping and registry calls don't contend.
 _LOG_MAX = 100   # entries per hook
 _delivery_log: Dict[str, Deque[Dict[str, Any]]] = {}  # hook_id -> deque
 
@@ -87,7 +136,8 @@ def _load() -> None:
     _loaded = True
     if WEBHOOKS_FILE.exists():
         try:
-            data = json.loads(WEBHOOKS_FILE.read_text(encoding='utf-8'))
+            raw = WEBHOOKS_FILE.read_bytes()   # both parsers take UTF-8 bytes directly
+            data = _orjson.loads(raw) if _HAS_ORJSON else json.loads(raw)
             if isinstance(data, dict):
                 key = _get_encryption_key()
                 fernet = Fernet(key) if key else None
@@ -104,12 +154,48 @@ def _load() -> None:
                         # Encrypted on disk but no key configured — can't decrypt.
                         h['secret'] = ''
                         del h['_secret_encrypted']
+                    h['_signed'] = bool(h.get('secret'))
+                    h['_events_set'] = frozenset(sys.intern(e) for e in h.get('events', ()))
                     _hooks[hook_id] = h
         except Exception:
             pass  # corrupted file — start fresh
 
 
-def _save() -> None:
+def _schedule_save() -> None:
+    """Arm a debounced registry write; the caller holds ``_lock``.
+
+    Mutations inside the :data:`_SAVE_DELAY` window share one write, so a
+    burst of registrations costs a single encrypt + dump + file replace.
+    The timer is bound to the current :data:`WEBHOOKS_FILE`.
+    """
+    global _save_timer
+    if _save_timer is None:
+        timer = threading.Timer(_SAVE_DELAY, _flush_hooks_to_disk, args=(WEBHOOKS_FILE,))
+        timer.daemon = True
+        _save_timer = timer
+        timer.start()
+
+
+def _flush_hooks_to_disk(path: Path) -> None:
+    """Write the registry to *path*.  Snapshots under ``_lock``, writes outside it."""
+    global _save_timer
+    with _save_lock:   # keeps overlapping flushes from landing out of order
+        with _lock:
+            _save_timer = None
+            snapshot = {hook_id: dict(hook) for hook_id, hook in _hooks.items()}
+        _save(snapshot, path)
+
+
+@atexit.register
+def _flush_pending() -> None:
+    """Write out a registry change still waiting on its timer."""
+    timer = _save_timer
+    if timer is not None:
+        timer.cancel()
+        _flush_hooks_to_disk(*timer.args)
+
+
+def _save(hooks: Dict[str, Dict[str, Any]], path: Path) -> None:
     # Encrypt secrets at the persistence boundary so the on-disk file never
     # contains cleartext HMAC secrets.  If no key is configured the secret
     # field is omitted from disk entirely (the hook remains functional until
@@ -117,8 +203,9 @@ def _save() -> None:
     key = _get_encryption_key()
     fernet = Fernet(key) if key else None
     to_write: Dict[str, Any] = {}
-    for hook_id, hook in _hooks.items():
-        h = dict(hook)
+    for hook_id, h in hooks.items():
+        h.pop('_signed', None)       # derived from the secret on load
+        h.pop('_events_set', None)   # derived from events on load
         raw_secret = h.pop('secret', '')
         if raw_secret and fernet:
             h['secret'] = fernet.encrypt(raw_secret.encode()).decode()
@@ -129,7 +216,15 @@ def _save() -> None:
         else:
             h['secret'] = ''
         to_write[hook_id] = h
-    WEBHOOKS_FILE.write_text(json.dumps(to_write, indent=2), encoding='utf-8')
+    # Write-then-rename so a crash mid-write never leaves a truncated registry;
+    # fsync first so the rename can't land before the data does.  Writes are
+    # debounced (see _schedule_save), so the fsync is off every request path.
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as fh:
+        fh.write(_encode_body(to_write))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
 
 
 def _get_encryption_key() -> Optional[bytes]:
@@ -171,19 +266,19 @@ def _decrypt_secret(token: str) -> str:
 # Public API
 # ---------------------------------------------------------------------------
 
+# Public view of a hook record: _PUBLIC_KEYS[i] is filled from _PROJ(hook)[i].
+_PUBLIC_KEYS = ('id', 'url', 'events', 'signed', 'created_at')
+_PROJ = itemgetter('id', 'url', 'events', '_signed', 'created_at')
+
+
 def _public_hook(hook: Dict[str, Any]) -> Dict[str, Any]:
     """Return a safe public view of a hook record.
 
     Strips the raw secret and replaces it with a boolean ``signed`` field so
-    that the REST API never leaks HMAC secrets to callers.
+    that the REST API never leaks HMAC secrets to callers.  ``signed`` is
+    read from the ``_signed`` flag set when the hook is registered or loaded.
     """
-    return {
-        'id': hook['id'],
-        'url': hook['url'],
-        'events': hook['events'],
-        'signed': bool(hook.get('secret')),
-        'created_at': hook['created_at'],
-    }
+    return dict(zip(_PUBLIC_KEYS, _PROJ(hook)))
 
 
 def register_webhook(url: str, events: Optional[List[str]] = None, secret: str = '') -> Dict[str, Any]:
@@ -218,15 +313,17 @@ def register_webhook(url: str, events: Optional[List[str]] = None, secret: str =
         'id': hook_id,
         'url': url,
         'events': sorted(events),
+        '_events_set': frozenset(sys.intern(e) for e in events),
         # Secret is held in-memory only; persistence is handled by _save(),
         # which encrypts secrets on disk so they are never stored in clear text.
         'secret': secret,
-        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        '_signed': bool(secret),
+        'created_at': _utc_now_str(),
     }
     with _lock:
         _load()
         _hooks[hook_id] = hook
-        _save()
+        _schedule_save()
     return _public_hook(hook)
 
 
@@ -252,8 +349,10 @@ def delete_webhook(hook_id: str) -> bool:
         if hook_id not in _hooks:
             return False
         del _hooks[hook_id]
-        _save()
-        return True
+        _schedule_save()
+    # Forget cached HMAC keys so the deleted hook's secret does not outlive it.
+    _hmac_template.cache_clear()
+    return True
 
 
 def fire_webhooks(event: str, payload: Dict[str, Any]) -> None:
@@ -262,14 +361,67 @@ def fire_webhooks(event: str, payload: Dict[str, Any]) -> None:
     This is fire-and-forget: failures are silently dropped so that a flaky
     external endpoint can never block or slow the gateway.
     """
+    event = sys.intern(event)
     with _lock:
         _load()
-        targets = [h for h in _hooks.values() if event in h['events']]
+        targets = [h for h in _hooks.values() if event in h['_events_set']]
+    if not targets:
+        return
 
-    body = json.dumps({'event': event, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), **payload}).encode()
+    # One body (and one timestamp) per event, shared by every target.  The
+    # payload stays flat for receivers, but cannot override the envelope keys.
+    body = _encode_body({**payload, 'event': event, 'timestamp': _utc_now_str()})
 
+    # Hooks sharing a secret share a signature — sign each secret once.
+    signatures: Dict[str, str] = {}
     for hook in targets:
-        _executor.submit(_deliver, hook['id'], hook['url'], event, body, hook.get('secret', ''))
+        secret = hook.get('secret', '')
+        if secret and secret not in signatures:
+            signatures[secret] = _sign(secret, body)
+        _executor.submit(_deliver, hook['id'], hook['url'], event, body, secret,
+                         signatures.get(secret), blocking=False)
+
+
+def _utc_now_str() -> str:
+    """Current UTC time as ``YYYY-MM-DDTHH:MM:SSZ``, formatted once per second.
+
+    Bursts of events within the same wall-clock second reuse the cached
+    string instead of calling gmtime + strftime again.
+    """
+    global _ts_cache
+    now = int(time.time())
+    sec, text = _ts_cache
+    if sec != now:
+        text = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))
+        _ts_cache = (now, text)   # one tuple store — safe to race
+    return text
+
+
+def _encode_body(obj: Dict[str, Any]) -> bytes:
+    """Compact JSON bytes (webhook bodies, registry file) — orjson when installed."""
+    if _HAS_ORJSON:
+        try:
+            return _orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. non-str keys or ints wider than 64 bits
+    return json.dumps(obj).encode()
+
+
+@functools.lru_cache(maxsize=128)
+def _hmac_template(secret: str) -> 'hmac.HMAC':
+    """HMAC-SHA256 keyed with *secret*; callers copy() it to skip key setup.
+
+    Cleared by :func:`delete_webhook`, so secrets of removed hooks are not
+    retained for the life of the process.
+    """
+    return hmac.new(secret.encode(), None, hashlib.sha256)
+
+
+def _sign(secret: str, body: bytes) -> str:
+    """Value of the ``X-Intelli-Signature-256`` header for *body*."""
+    mac = _hmac_template(secret).copy()
+    mac.update(body)
+    return 'sha256=' + mac.hexdigest()
 
 
 def get_deliveries(hook_id: str, limit: int = 50) -> List[Dict[str, Any]]:
@@ -283,54 +435,90 @@ def get_deliveries(hook_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         Maximum number of records to return (capped at :data:`_LOG_MAX`).
 
     Returns an empty list if the hook has no delivery history yet.
+
+    Reads take no lock: copying a bounded deque is a single C call that
+    delivery threads' ``appendleft`` cannot interleave with under the GIL,
+    so admin polling never waits behind deliveries.
     """
     limit = min(max(limit, 1), _LOG_MAX)
-    with _lock:
-        log = _delivery_log.get(hook_id)
+    log = _delivery_log.get(hook_id)
     if log is None:
         return []
-    return list(log)[:limit]
+    return list(itertools.islice(log, limit))
 
 
-def _deliver(hook_id: str, url: str, event: str, body: bytes, secret: str = '') -> None:
+def _get_client() -> httpx.Client:
+    """Shared delivery client, created on first use.
+
+    Deliveries to the same endpoint reuse pooled keep-alive connections
+    instead of paying a fresh TCP + TLS handshake per POST.  When the
+    optional ``h2`` package is installed, TLS receivers that negotiate
+    HTTP/2 get concurrent deliveries multiplexed on one connection.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                client = httpx.Client(
+                    http2=_HAS_H2,
+                    timeout=_TIMEOUT,
+                    limits=httpx.Limits(max_keepalive_connections=_KEEPALIVE),
+                )
+                atexit.register(client.close)
+                _client = client
+    return _client
+
+
+def _deliver(hook_id: str, url: str, event: str, body: bytes, secret: str = '',
+             signature: Optional[str] = None, *, blocking: bool = True) -> None:
     """Attempt webhook delivery with exponential back-off retry.
 
-    Up to ``_MAX_RETRIES`` total attempts are made.  Between attempts the
-    thread sleeps for ``2 ** attempt`` seconds (1 s, 2 s, 4 s, …).  On a
-    2xx response delivery stops immediately — no further retries needed.
-    All non-retriable and retriable failures are silently swallowed so that
+    *signature* is the precomputed :func:`_sign` value for *secret*; it is
+    derived here when the caller did not supply one.
+
+    Up to ``_MAX_RETRIES`` total attempts are made, ``2 ** attempt`` seconds
+    apart (1 s, 2 s, 4 s, …).  With *blocking* the calling thread sleeps
+    through each back-off; otherwise (as :func:`fire_webhooks` does) the
+    delivery is parked on the retry heap and the executor worker is freed
+    for other deliveries until the next attempt is due.  On a 2xx response
+    delivery stops immediately — no further retries needed.  All
+    non-retriable and retriable failures are silently swallowed so that
     external endpoints can never block or slow the gateway.
     """
-    import urllib.request
+    steps = _delivery_attempts(hook_id, url, event, body, secret, signature)
+    if blocking:
+        for delay in steps:
+            time.sleep(delay)
+    else:
+        _step(steps)
+
+
+def _delivery_attempts(hook_id: str, url: str, event: str, body: bytes, secret: str,
+                       signature: Optional[str]) -> Iterator[float]:
+    """Run delivery attempts, yielding the back-off delay before each retry.
 
-    ts = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    The outcome is recorded in the delivery log once the generator finishes.
+    """
+    ts = _utc_now_str()
     status_code: Optional[int] = None
     error: Optional[str] = None
     ok = False
     attempts = 0
 
-    headers: Dict[str, str] = {
-        'Content-Type': 'application/json',
-        'X-Gateway-Event': event,
-        'X-Gateway-Hook-ID': hook_id,
-    }
+    # One headers dict per delivery, reused unchanged by every attempt.
     if secret:
-        sig = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
-        headers['X-Intelli-Signature-256'] = f'sha256={sig}'
+        headers = {**_BASE_HEADERS, 'X-Gateway-Event': event, 'X-Gateway-Hook-ID': hook_id,
+                   'X-Intelli-Signature-256': signature or _sign(secret, body)}
+    else:
+        headers = {**_BASE_HEADERS, 'X-Gateway-Event': event, 'X-Gateway-Hook-ID': hook_id}
 
     max_attempts = max(1, _MAX_RETRIES)
     for attempt in range(max_attempts):
         attempts += 1
         try:
-            req = urllib.request.Request(
-                url,
-                data=body,
-                headers=headers,
-                method='POST',
-            )
-            with urllib.request.urlopen(req, timeout=_TIMEOUT) as resp:
-                status_code = int(resp.status or 0)
-                ok = 200 <= status_code < 300
+            resp = _get_client().post(url, content=body, headers=headers)
+            status_code = resp.status_code
+            ok = 200 <= status_code < 300
             if ok:
                 error = None
                 break   # success — stop retrying
@@ -339,11 +527,11 @@ def _deliver(hook_id: str, url: str, event: str, body: bytes, secret: str = '')
         except Exception as exc:
             error = type(exc).__name__ + ': ' + str(exc)
 
-        # Back-off before next attempt (skip sleeping after the last one)
+        # Back-off before next attempt (skip waiting after the last one)
         if attempt < max_attempts - 1:
-            time.sleep(2 ** attempt)   # 1 s, 2 s, 4 s, …
+            yield 2 ** attempt   # 1 s, 2 s, 4 s, …
 
-    # Record outcome in per-hook deque (creates it on first delivery if needed)
+    # Record outcome in the per-hook log (created on first delivery)
     record: Dict[str, Any] = {
         'timestamp': ts,
         'event': event,
@@ -352,7 +540,53 @@ def _deliver(hook_id: str, url: str, event: str, body: bytes, secret: str = '')
         'error': error,
         'attempts': attempts,
     }
-    with _lock:
-        if hook_id not in _delivery_log:
-            _delivery_log[hook_id] = deque(maxlen=_LOG_MAX)
-        _delivery_log[hook_id].appendleft(record)   # newest first
+    _log_delivery(hook_id, record)
+
+
+def _step(steps: Iterator[float]) -> None:
+    """Advance a delivery to its next back-off, then park it until due."""
+    try:
+        delay = next(steps)
+    except StopIteration:
+        return
+    _retry_later(delay, steps)
+
+
+def _retry_later(delay: float, steps: Iterator[float]) -> None:
+    """Queue *steps* to resume on the executor after *delay* seconds."""
+    global _retry_thread
+    with _retry_cv:
+        heapq.heappush(_retry_heap, (time.monotonic() + delay, next(_retry_seq), steps))
+        if _retry_thread is None:
+            _retry_thread = threading.Thread(target=_retry_loop, name='webhook-retry', daemon=True)
+            _retry_thread.start()
+        _retry_cv.notify()
+
+
+def _retry_loop() -> None:
+    """Hand parked deliveries back to the executor as their back-off expires."""
+    while True:
+        with _retry_cv:
+            while True:
+                now = time.monotonic()
+                if _retry_heap and _retry_heap[0][0] <= now:
+                    break
+                _retry_cv.wait(_retry_heap[0][0] - now if _retry_heap else None)
+            _, _, steps = heapq.heappop(_retry_heap)
+        try:
+            _executor.submit(_step, steps)
+        except RuntimeError:
+            return   # executor shut down at interpreter exit
+
+
+def _log_delivery(hook_id: str, record: Dict[str, Any]) -> None:
+    """Prepend *record* to *hook_id*'s bounded delivery log (newest first).
+
+    Takes no lock: ``dict.setdefault`` and ``deque.appendleft`` are each
+    atomic under the GIL, so concurrent deliveries never lose a log or a
+    record, and logging never contends with registry calls on ``_lock``.
+    """
+    log = _delivery_log.get(hook_id)
+    if log is None:
+        log = _delivery_log.setdefault(hook_id, deque(maxlen=_LOG_MAX))
+    log.appendleft(record)
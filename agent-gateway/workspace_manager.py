@@ -29,67 +29,99 @@ is blocked by design).
 
 from __future__ import annotations
 
+import functools
+import itertools
 import json
 import os
 import re
 import threading
+import weakref
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 # ---------------------------------------------------------------------------
 # Root
 # ---------------------------------------------------------------------------
 
 _WORKSPACE_ROOT = Path(__file__).parent / 'workspace'
-_lock = threading.Lock()
+_lock = threading.Lock()   # seed-once guard and _path_locks bookkeeping
+_path_locks: 'weakref.WeakValueDictionary[str, threading.Lock]' = weakref.WeakValueDictionary()
 
 BUILTIN_FILES = ('AGENTS.md', 'SOUL.md', 'TOOLS.md')
 
 
+_seeded_root: Optional[Path] = None   # root already created + seeded this process
+
+# Bumped after every write under skills/, whoever the caller (API endpoint or
+# agent tool), so views derived from the skills — the tool result cache —
+# can tell they are stale.  itertools.count: next() is atomic under the GIL.
+_skills_counter = itertools.count(1)
+skills_version = 0
+
+
+def _skills_changed() -> None:
+    global skills_version
+    skills_version = next(_skills_counter)
+
+
 def _ensure_root() -> Path:
-    _WORKSPACE_ROOT.mkdir(parents=True, exist_ok=True)
-    (_WORKSPACE_ROOT / 'skills').mkdir(exist_ok=True)
-    (_WORKSPACE_ROOT / 'context').mkdir(exist_ok=True)
-    _seed_defaults()
-    return _WORKSPACE_ROOT
+    """Return the workspace root, creating and seeding it on first use.
 
+    Every workspace call goes through here, so the directory setup and
+    :func:`_seed_defaults` run once per root per process rather than on
+    each request.
+    """
+    global _seeded_root
+    root = _WORKSPACE_ROOT
+    if _seeded_root != root:
+        with _lock:
+            if _seeded_root != root:
+                root.mkdir(parents=True, exist_ok=True)
+                (root / 'skills').mkdir(exist_ok=True)
+                (root / 'context').mkdir(exist_ok=True)
+                _seed_defaults()
+                _seeded_root = root
+    return root
 
-def _seed_defaults() -> None:
-    """Write default builtin files and starter skills if they don't exist yet."""
-    agents_md = _WORKSPACE_ROOT / 'AGENTS.md'
-    if not agents_md.exists():
-        agents_md.write_text(_DEFAULT_AGENTS_MD, encoding='utf-8')
 
-    soul_md = _WORKSPACE_ROOT / 'SOUL.md'
-    if not soul_md.exists():
-        soul_md.write_text(_DEFAULT_SOUL_MD, encoding='utf-8')
+_SKILL_CREATOR_HEADING_RE = re.compile(r'## Skill Creator\b')
+
 
-    tools_md = _WORKSPACE_ROOT / 'TOOLS.md'
-    if not tools_md.exists():
-        tools_md.write_text(_DEFAULT_TOOLS_MD, encoding='utf-8')
+def _seed_defaults() -> None:
+    """Write default builtin files and starter skills if they don't exist yet."""
+    # One directory read answers all three "does it exist" questions.
+    with os.scandir(_WORKSPACE_ROOT) as it:
+        present = {entry.name for entry in it if entry.is_file()}
+    for fname, default in _DEFAULT_FILE_BYTES:
+        if fname not in present:
+            (_WORKSPACE_ROOT / fname).write_bytes(default)
 
     # Seed starter skills
-    _seed_skill('page-summarize', _SKILL_PAGE_SUMMARIZE)
-    _seed_skill('web-search', _SKILL_WEB_SEARCH)
-    _seed_skill('translate', _SKILL_TRANSLATE)
+    for slug, content in _STARTER_SKILL_BYTES:
+        _seed_skill(slug, content)
 
-    # Keep the Skill Creator section in AGENTS.md current (replace if outdated)
+    # Keep the Skill Creator section in AGENTS.md current (replace if outdated).
+    # AGENTS.md is guaranteed to exist here — it was seeded above if missing.
     agents_md = _WORKSPACE_ROOT / 'AGENTS.md'
-    if agents_md.exists():
-        current = agents_md.read_text(encoding='utf-8')
-        # Strip any existing Skill Creator section before re-appending the latest
-        if '## Skill Creator' in current:
-            current = re.sub(r'\n*## Skill Creator\b.*', '', current, flags=re.DOTALL).rstrip()
-        agents_md.write_text(current + '\n\n' + _SKILL_CREATOR_SECTION, encoding='utf-8')
-
-
-def _seed_skill(slug: str, content: str) -> None:
+    original = agents_md.read_text(encoding='utf-8')
+    # Strip any existing Skill Creator section (heading to end of file)
+    # before re-appending the latest.
+    section = _SKILL_CREATOR_HEADING_RE.search(original)
+    current = (original[:section.start()] if section else original).rstrip()
+    updated = current + '\n\n' + _SKILL_CREATOR_SECTION
+    # Only write when the section changed, so AGENTS.md keeps its mtime
+    # (build_system_prompt's cache is keyed on it).
+    if updated != original:
+        agents_md.write_text(updated, encoding='utf-8')
+
+
+def _seed_skill(slug: str, content: bytes) -> None:
     skill_dir = _WORKSPACE_ROOT / 'skills' / slug
     skill_md  = skill_dir / 'SKILL.md'
     if not skill_md.exists():
         skill_dir.mkdir(parents=True, exist_ok=True)
-        skill_md.write_text(content, encoding='utf-8')
+        skill_md.write_bytes(content)
 
 
 _SKILL_PAGE_SUMMARIZE = """\
@@ -277,11 +309,36 @@ Example:
 - `GET /workspace/skills` — List skills
 """
 
+# Seed contents, encoded once at import.  AGENTS.md ships with the current
+# Skill Creator section so a fresh workspace needs no second rewrite.
+_DEFAULT_FILE_BYTES: tuple[tuple[str, bytes], ...] = (
+    ('AGENTS.md', (_DEFAULT_AGENTS_MD.rstrip() + '\n\n' + _SKILL_CREATOR_SECTION).encode('utf-8')),
+    ('SOUL.md', _DEFAULT_SOUL_MD.encode('utf-8')),
+    ('TOOLS.md', _DEFAULT_TOOLS_MD.encode('utf-8')),
+)
+_STARTER_SKILL_BYTES: tuple[tuple[str, bytes], ...] = (
+    ('page-summarize', _SKILL_PAGE_SUMMARIZE.encode('utf-8')),
+    ('web-search', _SKILL_WEB_SEARCH.encode('utf-8')),
+    ('translate', _SKILL_TRANSLATE.encode('utf-8')),
+)
+
 
 # ---------------------------------------------------------------------------
 # Path helpers
 # ---------------------------------------------------------------------------
 
+@functools.lru_cache(maxsize=8)
+def _realpath_dir(path: str) -> str:
+    """``os.path.realpath`` of a workspace directory plus a trailing separator.
+
+    Resolved once per path: the workspace root and skills/ are fixed for the
+    process lifetime, so only the caller-supplied part of a path needs
+    resolving on each request.  The trailing ``os.sep`` makes the prefix check
+    reject siblings such as ``<root>plus/`` and is built here, not per call.
+    """
+    return os.path.join(os.path.realpath(path), '')
+
+
 def _safe_path(rel: str) -> Path:
     """Resolve *rel* inside the workspace root, raising ValueError if it escapes.
 
@@ -289,9 +346,9 @@ def _safe_path(rel: str) -> Path:
     so CodeQL's two-state path-injection tracker sees both required steps.
     """
     root = _ensure_root()
-    joined = os.path.realpath(os.path.join(str(root), rel))
-    base = os.path.realpath(str(root))
-    if not joined.startswith(base + os.sep):
+    base = _realpath_dir(str(root))
+    joined = os.path.realpath(os.path.join(base, rel))
+    if not joined.startswith(base):
         raise ValueError(f'Path {rel!r} escapes workspace root')
     return Path(joined)
 
@@ -305,46 +362,106 @@ def _safe_skill_dir(slug: str) -> Path:
     if not _SLUG_RE.match(slug):
         raise ValueError(f'Invalid skill slug {slug!r} — use lowercase letters, digits, _ or -')
     root = _ensure_root()
-    skills_root = os.path.realpath(str(root / 'skills'))
+    skills_root = _realpath_dir(str(root / 'skills'))
     joined = os.path.realpath(os.path.join(skills_root, slug))
-    if not joined.startswith(skills_root + os.sep):
+    if not joined.startswith(skills_root):
         raise ValueError(f'Skill slug {slug!r} escapes skills directory')
     return Path(joined)
+
+
+def _path_lock(path: Path) -> threading.Lock:
+    """Return the lock serialising mutations of *path* (a resolved path).
+
+    Writers to different files never wait on each other; reads take no lock
+    at all.  Locks live only while some caller holds a reference.
+    """
+    key = str(path)
+    with _lock:
+        lock = _path_locks.get(key)
+        if lock is None:
+            lock = _path_locks[key] = threading.Lock()
+    return lock
+
+
+# ---------------------------------------------------------------------------
 # File CRUD
 # ---------------------------------------------------------------------------
 
-def list_files() -> list[dict]:
-    """Return metadata for every file in the workspace (recursive)."""
-    root = _ensure_root()
-    result = []
-    for p in sorted(root.rglob('*')):
-        if p.is_file():
-            rel = str(p.relative_to(root))
-            stat = p.stat()
-            result.append({
-                'path': rel,
-                'size': stat.st_size,
-                'modified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
-            })
-    return result
+def _walk_files(root: str, depth: Optional[int] = None):
+    """Yield ``os.DirEntry`` objects for every regular file under *root*.
+
+    Uses ``os.scandir`` so the file type and stat come from the directory
+    read instead of one syscall per ``Path``; directory symlinks are not
+    followed, matching ``Path.rglob``.  *depth* limits how many directory
+    levels are read (1 = files directly in *root*); None walks the tree.
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if depth is None or depth > 1:
+                    yield from _walk_files(entry.path, None if depth is None else depth - 1)
+            elif entry.is_file():
+                yield entry
+
+
+def iter_files(depth: Optional[int] = None) -> Iterator[dict]:
+    """Yield metadata for every file in the workspace as the walk finds it.
+
+    Unordered; lets callers stream or stop early without holding the whole
+    listing in memory.  *depth* is as for :func:`list_files`.
+    """
+    root = str(_ensure_root())
+    for entry in _walk_files(root, depth):
+        stat = entry.stat()
+        yield {
+            'path': os.path.relpath(entry.path, root),
+            'size': stat.st_size,
+            'modified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+        }
+
+
+def list_files(depth: Optional[int] = None) -> list[dict]:
+    """Return metadata for every file in the workspace (recursive).
+
+    *depth* stops the walk after that many directory levels (1 = top-level
+    files only), so a shallow view never reads the rest of the tree.
+    """
+    # Sort by path components so the order matches sorted(Path) objects.
+    return sorted(iter_files(depth), key=lambda f: f['path'].split(os.sep))
 
 
 def read_file(rel: str) -> str:
-    """Read and return the text content of a workspace file."""
+    """Read and return the text content of a workspace file.
+
+    The file is read unbuffered in one ``readall`` and decoded once, skipping
+    the text-mode layer; line endings are normalised to LF as text mode would.
+    """
     p = _safe_path(rel)
-    if not p.exists():
-        raise FileNotFoundError(f'workspace file not found: {rel!r}')
-    return p.read_text(encoding='utf-8')
+    try:
+        with open(p, 'rb', buffering=0) as fh:
+            data = fh.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f'workspace file not found: {rel!r}') from None
+    text = data.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
 
 
 def write_file(rel: str, content: str) -> dict:
     """Write (create or overwrite) a workspace file.  Parent dirs are created."""
     p = _safe_path(rel)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(content, encoding='utf-8')
+    data = content.encode('utf-8')   # encoded once: written and measured
+    with _path_lock(p):
+        p.parent.mkdir(parents=True, exist_ok=True)
+        # Binary mode: no text-layer copy.  A write larger than the buffer goes
+        # straight to the OS, and BufferedWriter retries short writes for us.
+        with open(p, 'wb') as fh:
+            fh.write(data)
+        _note_skill_write(p)
     return {
         'path': rel,
-        'size': len(content.encode()),
+        'size': len(data),
         'modified': datetime.now(timezone.utc).isoformat(),
     }
 
@@ -352,9 +469,17 @@ def write_file(rel: str, content: str) -> dict:
 def delete_file(rel: str) -> None:
     """Delete a workspace file."""
     p = _safe_path(rel)
-    if not p.exists():
-        raise FileNotFoundError(f'workspace file not found: {rel!r}')
-    p.unlink()
+    with _path_lock(p):
+        if not p.exists():
+            raise FileNotFoundError(f'workspace file not found: {rel!r}')
+        p.unlink()
+        _note_skill_write(p)
+
+
+def _note_skill_write(p: Path) -> None:
+    """Bump :data:`skills_version` if *p* (a resolved path) lies under skills/."""
+    if str(p).startswith(_realpath_dir(str(_ensure_root() / 'skills'))):
+        _skills_changed()
 
 
 # ---------------------------------------------------------------------------
@@ -363,63 +488,140 @@ def delete_file(rel: str) -> None:
 
 _SLUG_RE = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
 
+# Use [^\r\n]+ instead of (.+)$ to avoid polynomial backtracking on
+# uncontrolled input (CodeQL py/polynomial-redos).
+_FM_LINE_RE = re.compile(r'^(\w[\w ]{0,80}):\s*([^\r\n]{1,500})')
+# Same pair, matched line-by-line across a whole block ([ \t]* so a bare
+# "key:" never borrows the next line as its value).
+_FM_PAIR_RE = re.compile(r'^(\w[\w ]{0,80}):[ \t]*([^\r\n]{1,500})', re.MULTILINE)
+# A leading ---fenced--- block.
+_FM_BLOCK_RE = re.compile(r'\A---[^\r\n]*\r?\n(.*?)\r?\n---[^\r\n]*(?:\r?\n|\Z)', re.DOTALL)
+
 
 def _parse_skill_frontmatter(text: str) -> dict:
-    """Extract YAML-like key:value pairs from the first fenced block or leading lines."""
+    """Extract YAML-like key:value pairs from the first fenced block or leading lines.
+
+    A file that opens with a ``---`` block takes its pairs from that block
+    alone; otherwise the first 20 lines are scanned for pairs.  Either way a
+    ``# heading`` within the first 20 lines supplies the name if none is set.
+    """
+    block = _FM_BLOCK_RE.match(text)
+    if block:
+        meta = {m.group(1).strip().lower(): m.group(2).strip()
+                for m in _FM_PAIR_RE.finditer(block.group(1))}
+        if 'name' not in meta:
+            left = 20 - block.group(0).count('\n')
+            for line in text[block.end():].split('\n', left)[:left] if left > 0 else ():
+                stripped = line.strip()
+                if stripped.startswith('#'):
+                    meta['name'] = stripped.lstrip('#').strip()
+                    break
+        return meta
     meta: dict = {}
-    lines = text.splitlines()
     in_fm = False
-    for line in lines[:20]:
+    # Split off only the 20 lines scanned, not the whole file.  CRLF lines
+    # keep a trailing \r, which strip() and the pair regex both ignore.
+    for line in text.split('\n', 20)[:20]:
         stripped = line.strip()
         if stripped.startswith('---'):
             in_fm = not in_fm
             continue
-        if in_fm or not in_fm:
-            # Use [^\r\n]+ instead of (.+)$ to avoid polynomial backtracking
-            # on uncontrolled input (CodeQL py/polynomial-redos).
-            m = re.match(r'^(\w[\w ]{0,80}):\s*([^\r\n]{1,500})', line)
-            if m:
-                meta[m.group(1).strip().lower()] = m.group(2).strip()
-            elif in_fm and stripped:
-                continue
-            elif not in_fm and stripped.startswith('#'):
-                meta.setdefault('name', stripped.lstrip('#').strip())
+        # No colon, no pair: skip the regex (headings still fall through).
+        m = _FM_LINE_RE.match(line) if ':' in line else None
+        if m:
+            meta[m.group(1).strip().lower()] = m.group(2).strip()
+        elif not in_fm and stripped.startswith('#'):
+            meta.setdefault('name', stripped.lstrip('#').strip())
+    return meta
+
+
+# Frontmatter sits at the top of SKILL.md; list_skills reads only this much.
+_SKILL_HEAD_BYTES = 4096
+
+
+def _read_skill_head(skill_md: Path) -> str:
+    """Return the leading ``_SKILL_HEAD_BYTES`` of *skill_md* as text.
+
+    A line cut off by the limit is dropped, so the frontmatter parser only
+    ever sees whole lines; fields beyond the head are simply missing.
+    """
+    with open(skill_md, 'rb') as f:
+        head = f.read(_SKILL_HEAD_BYTES)
+    if len(head) == _SKILL_HEAD_BYTES:
+        head = head[:head.rfind(b'\n') + 1]
+    return head.decode('utf-8', errors='replace')
+
+
+# SKILL.md path -> ((st_mtime_ns, st_size), parsed frontmatter); lets
+# list_skills skip re-reading files that have not changed since the last call.
+_skill_meta_cache: dict[Path, tuple[tuple[int, int], dict]] = {}
+
+
+def _skill_meta(skill_md: Path) -> dict:
+    """Return the parsed frontmatter of *skill_md*, cached by mtime."""
+    try:
+        st = skill_md.stat()
+    except FileNotFoundError:
+        _skill_meta_cache.pop(skill_md, None)
+        return {}
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _skill_meta_cache.get(skill_md)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    if not st.st_size:
+        meta: dict = {}    # empty SKILL.md — nothing to open or parse
+    else:
+        try:
+            meta = _parse_skill_frontmatter(_read_skill_head(skill_md))
+        except FileNotFoundError:
+            return {}
+    _skill_meta_cache[skill_md] = (stamp, meta)
     return meta
 
 
 def list_skills() -> list[dict]:
-    """Return a summary list of all installed skills."""
+    """Return a summary list of all installed skills.
+
+    One ``os.scandir`` pass supplies the directory type and mtime of every
+    skill; only SKILL.md itself is stat'ed (and re-read when it changed).
+    """
     root = _ensure_root()
     skills_dir = root / 'skills'
+    with os.scandir(skills_dir) as it:
+        entries = sorted((e for e in it if e.is_dir()), key=lambda e: e.name)
     result = []
-    for skill_dir in sorted(skills_dir.iterdir()):
-        if not skill_dir.is_dir():
-            continue
-        skill_md = skill_dir / 'SKILL.md'
-        text = skill_md.read_text(encoding='utf-8') if skill_md.exists() else ''
-        meta = _parse_skill_frontmatter(text)
+    for entry in entries:
+        meta = _skill_meta(skills_dir / entry.name / 'SKILL.md')
         result.append({
-            'slug':        skill_dir.name,
-            'name':        meta.get('name', skill_dir.name),
+            'slug':        entry.name,
+            'name':        meta.get('name', entry.name),
             'description': meta.get('description', ''),
             'version':     meta.get('version', ''),
             'modified':    datetime.fromtimestamp(
-                skill_dir.stat().st_mtime, tz=timezone.utc
+                entry.stat().st_mtime, tz=timezone.utc
             ).isoformat(),
         })
     return result
 
 
+_SKILL_HEADER = '---\nname: %s\ndescription: %s\ncreated: %s\n---\n\n'
+
+
 def create_skill(slug: str, name: str, description: str, content: str) -> dict:
     """Create a new skill directory with a SKILL.md."""
     root = _ensure_root()  # called first so skills/ exists before _safe_skill_dir
     skill_dir = _safe_skill_dir(slug)
-    if skill_dir.exists():
-        raise ValueError(f"Skill '{slug}' already exists")
-    skill_dir.mkdir(parents=True)
     skill_md = skill_dir / 'SKILL.md'
-    header = f'---\nname: {name}\ndescription: {description}\ncreated: {datetime.now(timezone.utc).isoformat()}\n---\n\n'
-    skill_md.write_text(header + content, encoding='utf-8')
+    with _path_lock(skill_dir):
+        if skill_dir.exists():
+            raise ValueError(f"Skill '{slug}' already exists")
+        # Header built only once the skill is known to be new; header and body
+        # are encoded in one go and written without the text layer.
+        header = _SKILL_HEADER % (name, description, datetime.now(timezone.utc).isoformat())
+        skill_dir.mkdir(parents=True)
+        with open(skill_md, 'wb') as fh:
+            fh.write((header + content).encode('utf-8'))
+        _skills_changed()
     return {
         'slug': slug,
         'name': name,
@@ -432,10 +634,12 @@ def delete_skill(slug: str) -> None:
     """Remove a skill directory entirely."""
     root = _ensure_root()  # noqa: F841 — ensures workspace exists before guard
     skill_dir = _safe_skill_dir(slug)
-    if not skill_dir.exists():
-        raise FileNotFoundError(f"Skill '{slug}' not found")
     import shutil
-    shutil.rmtree(skill_dir)
+    with _path_lock(skill_dir):
+        if not skill_dir.exists():
+            raise FileNotFoundError(f"Skill '{slug}' not found")
+        shutil.rmtree(skill_dir)
+        _skills_changed()
 
 
 def get_skill(slug: str) -> dict:
@@ -463,10 +667,12 @@ def update_skill(slug: str, content: str) -> dict:
     """Overwrite the SKILL.md of an existing skill."""
     root = _ensure_root()
     skill_dir = _safe_skill_dir(slug)
-    if not skill_dir.exists():
-        raise FileNotFoundError(f"Skill '{slug}' not found")
     skill_md = skill_dir / 'SKILL.md'
-    skill_md.write_text(content, encoding='utf-8')
+    with _path_lock(skill_dir):
+        if not skill_dir.exists():
+            raise FileNotFoundError(f"Skill '{slug}' not found")
+        skill_md.write_text(content, encoding='utf-8')
+        _skills_changed()
     meta = _parse_skill_frontmatter(content)
     return {
         'slug':        slug,
@@ -514,31 +720,61 @@ def validate_skill(content: str) -> dict:
 # System prompt builder
 # ---------------------------------------------------------------------------
 
-def build_system_prompt(include_tools: bool = False) -> str:
-    """Assemble the agent system prompt from AGENTS.md + SOUL.md + optionally TOOLS.md."""
-    _ensure_root()
+def _file_stamp(p: Path) -> Optional[tuple[int, int]]:
+    """``(st_mtime_ns, st_size)`` of *p*, or None if it does not exist."""
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+@functools.lru_cache(maxsize=4)
+def _build_prompt_cached(root: Path, fnames: tuple[str, ...],
+                         stamps: tuple[Optional[tuple[int, int]], ...]) -> str:
+    """Read and join *fnames*; *stamps* only key the cache."""
     parts: list[str] = []
-    for fname in ('AGENTS.md', 'SOUL.md'):
-        p = _WORKSPACE_ROOT / fname
-        if p.exists():
-            parts.append(p.read_text(encoding='utf-8').strip())
-    if include_tools:
-        p = _WORKSPACE_ROOT / 'TOOLS.md'
-        if p.exists():
-            parts.append(p.read_text(encoding='utf-8').strip())
+    for fname, stamp in zip(fnames, stamps):
+        if stamp is not None:
+            parts.append((root / fname).read_text(encoding='utf-8').strip())
     return '\n\n---\n\n'.join(parts)
 
 
-def build_page_context_block(snapshot: dict, max_html: int = 8000) -> str:
-    """Format a tab snapshot dict into a context block for the system prompt."""
-    url   = snapshot.get('url', '')
-    title = snapshot.get('title', '')
-    html  = snapshot.get('html', '')
-    if len(html) > max_html:
-        html = html[:max_html] + f'\n\n[… HTML truncated at {max_html} chars …]'
+def build_system_prompt(include_tools: bool = False) -> str:
+    """Assemble the agent system prompt from AGENTS.md + SOUL.md + optionally TOOLS.md.
+
+    The joined prompt is cached on each file's mtime and size, so a chat turn
+    with unchanged files costs a few ``stat`` calls instead of re-reading them.
+    """
+    root = _ensure_root()
+    fnames = ('AGENTS.md', 'SOUL.md', 'TOOLS.md') if include_tools else ('AGENTS.md', 'SOUL.md')
+    stamps = tuple(_file_stamp(root / fname) for fname in fnames)
+    return _build_prompt_cached(root, fnames, stamps)
+
+
+@functools.lru_cache(maxsize=32)
+def _format_page_block(url: str, title: str, html: str, truncated_at: Optional[int]) -> str:
+    if truncated_at is not None:
+        html += f'\n\n[… HTML truncated at {truncated_at} chars …]'
     return (
         f'## Active browser tab\n'
         f'**URL**: {url}\n'
         f'**Title**: {title}\n\n'
         f'### Page HTML source\n```html\n{html}\n```'
     )
+
+
+def build_page_context_block(snapshot: dict, max_html: int = 8000) -> str:
+    """Format a tab snapshot dict into a context block for the system prompt.
+
+    Blocks are cached on the url, title and the (at most *max_html*-char) HTML
+    slice, so follow-up turns about the same page skip the formatting while
+    the cache never hashes or holds more than the slice of a large page.
+    """
+    html = snapshot.get('html', '')
+    truncated_at = max_html if len(html) > max_html else None
+    if truncated_at is not None:
+        html = html[:max_html]
+    return _format_page_block(
+        snapshot.get('url', ''), snapshot.get('title', ''), html, truncated_at,
+    )
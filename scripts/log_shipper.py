@@ -38,9 +38,18 @@ Behaviour
 ---------
 * Starts reading from the *end* of the existing file so historical
   entries are not re-shipped on first run.
-* Raw lines that are not valid JSON are wrapped as ``{"raw": "<line>"}``.
+* Keeps a raw file descriptor open between polls, reading new bytes with
+  positional reads, and reopens it when the file is rotated (inode change)
+  or truncated.  A line is only shipped
+  once its terminating newline has been written.
+* JSON-object lines are forwarded byte-for-byte; raw lines that are not
+  valid JSON are wrapped as ``{"raw": "<line>"}``.
 * Batches are shipped in NDJSON format (one JSON object per line,
-  ``Content-Type: application/x-ndjson``).
+  ``Content-Type: application/x-ndjson``); bodies over 1 KiB are sent
+  with ``Content-Encoding: gzip``.
+* Batches share one keep-alive HTTP(S) connection, re-established after
+  a network error or when the server closes it.  ``HTTP(S)_PROXY`` and
+  ``NO_PROXY`` are honoured as urllib does (HTTPS via a CONNECT tunnel).
 * Retries up to ``INTELLI_SIEM_RETRIES`` times per batch on HTTP ≥ 500
   or network errors, with ``INTELLI_SIEM_RETRY_DELAY`` seconds between
   attempts.
@@ -49,13 +58,17 @@ Behaviour
 
 from __future__ import annotations
 
+import base64
+import gzip
+import http.client
 import json
 import os
 import sys
 import time
-import urllib.error
+import urllib.parse
 import urllib.request
 from pathlib import Path
+from typing import Optional
 
 # ── Configuration ─────────────────────────────────────────────────────────────
 
@@ -71,52 +84,168 @@ _DEFAULT_LOG = (
 )
 AUDIT_LOG: Path = Path(os.environ.get("INTELLI_AUDIT_LOG", str(_DEFAULT_LOG)))
 
+_READ_CHUNK = 1024 * 1024   # bytes per positional read of the audit log
+# O_BINARY (Windows only) keeps the CRT from translating line endings.
+_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+
+# Batches larger than this are gzip-compressed (level 1: cheap, and JSON
+# with repeated field names still shrinks several-fold).
+_GZIP_MIN_BYTES = 1024
+
+# Keep-alive connection to the SIEM, reused across batches (see _get_conn).
+_conn: Optional[http.client.HTTPConnection] = None
+
 
 # ── Delivery ──────────────────────────────────────────────────────────────────
 
-def _build_headers(body: bytes) -> dict[str, str]:
+def _build_headers(body: bytes, *, gzipped: bool = False) -> dict[str, str]:
+    """Headers for a POST of *body* (already compressed when *gzipped*)."""
     headers: dict[str, str] = {
         "Content-Type": "application/x-ndjson",
         "Content-Length": str(len(body)),
+        "Connection": "keep-alive",
         "User-Agent": "intelli-log-shipper/1.0",
     }
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
     if SIEM_TOKEN:
         headers["Authorization"] = f"Bearer {SIEM_TOKEN}"
     return headers
 
 
-def _ship(batch: list[dict]) -> bool:  # noqa: C901
-    """POST *batch* to SIEM_URL.  Retries on 5xx / network errors.
+def _proxy_for(url: urllib.parse.SplitResult) -> Optional[urllib.parse.SplitResult]:
+    """The proxy urllib would use for *url* (``HTTP(S)_PROXY`` / ``NO_PROXY``)."""
+    proxy = urllib.request.getproxies().get(url.scheme)
+    if not proxy or urllib.request.proxy_bypass(url.hostname or ""):
+        return None
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    return urllib.parse.urlsplit(proxy)
+
+
+def _proxy_auth(proxy: urllib.parse.SplitResult) -> dict[str, str]:
+    if proxy.username is None:
+        return {}
+    creds = f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(creds.encode()).decode("ascii")}
+
+
+def _get_conn() -> http.client.HTTPConnection:
+    """Return the shared SIEM connection, opening it on first use.
+
+    The TCP (and TLS) session is set up once and reused for every batch;
+    :func:`_drop_conn` discards it after a failure so the next attempt
+    reconnects.  A configured proxy is honoured like urllib would: HTTPS is
+    tunnelled through it with CONNECT, plain HTTP is sent to it directly.
+    """
+    global _conn
+    if _conn is None:
+        url = urllib.parse.urlsplit(SIEM_URL)
+        https = url.scheme == "https"
+        cls = http.client.HTTPSConnection if https else http.client.HTTPConnection
+        proxy = _proxy_for(url)
+        if proxy is None:
+            _conn = cls(url.hostname or "", url.port, timeout=15)
+        elif https:
+            _conn = cls(proxy.hostname or "", proxy.port, timeout=15)
+            _conn.set_tunnel(url.hostname or "", url.port, headers=_proxy_auth(proxy))
+        else:
+            _conn = cls(proxy.hostname or "", proxy.port, timeout=15)
+    return _conn
+
+
+def _drop_conn() -> None:
+    global _conn
+    if _conn is not None:
+        _conn.close()
+        _conn = None
+
+
+# How a kept-alive connection the server has since closed fails on reuse.
+_STALE_CONN_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+def _post_once(target: str, body: bytes, headers: dict[str, str]) -> http.client.HTTPResponse:
+    conn = _get_conn()
+    conn.request("POST", target, body=body, headers=headers)
+    resp = conn.getresponse()
+    resp.read()   # drain so the connection can carry the next request
+    if resp.will_close:
+        _drop_conn()
+    return resp
+
+
+def _post(target: str, body: bytes, headers: dict[str, str]) -> http.client.HTTPResponse:
+    """POST *body* on the shared connection.
+
+    A reused connection the SIEM closed while idle fails with one of
+    ``_STALE_CONN_ERRORS``; the request is then sent once more on a fresh
+    connection.  Errors on a new connection are raised as-is.
+    """
+    reused = _conn is not None
+    try:
+        return _post_once(target, body, headers)
+    except _STALE_CONN_ERRORS:
+        _drop_conn()
+        if not reused:
+            raise
+    return _post_once(target, body, headers)
+
+
+def _request_target() -> tuple[str, dict[str, str]]:
+    """Request target for SIEM_URL and any per-request proxy headers.
+
+    Plain HTTP through a proxy uses the absolute URL (and carries the proxy
+    credentials on each request); otherwise it is the path and query.
+    """
+    url = urllib.parse.urlsplit(SIEM_URL)
+    if url.scheme != "https":
+        proxy = _proxy_for(url)
+        if proxy is not None:
+            return url._replace(fragment="").geturl(), _proxy_auth(proxy)
+    target = url.path or "/"
+    return (f"{target}?{url.query}" if url.query else target), {}
+
+
+def _ship(batch: list[bytes]) -> bool:  # noqa: C901
+    """POST *batch* (NDJSON records from :func:`_parse_line`) to SIEM_URL.
 
-    Returns True when the batch was accepted (HTTP 2xx).
+    Retries on 5xx / network errors.  Returns True when the batch was
+    accepted (HTTP 2xx).
     """
-    body = ("\n".join(json.dumps(e) for e in batch) + "\n").encode("utf-8")
-    headers = _build_headers(body)
+    # One allocation for the whole body: the records are already encoded,
+    # and joining with a trailing empty item supplies the final newline
+    # without a second concatenation copy.
+    body = b"\n".join([*batch, b""])
+    gzipped = len(body) > _GZIP_MIN_BYTES
+    if gzipped:
+        body = gzip.compress(body, compresslevel=1)
+    headers = _build_headers(body, gzipped=gzipped)
+    target, proxy_headers = _request_target()
+    headers.update(proxy_headers)
 
     for attempt in range(1, MAX_RETRIES + 1):
-        req = urllib.request.Request(
-            SIEM_URL, data=body, headers=headers, method="POST"
-        )
         try:
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                if 200 <= resp.status < 300:
-                    return True
-                _warn(
-                    f"SIEM returned HTTP {resp.status} "
-                    f"(attempt {attempt}/{MAX_RETRIES})"
-                )
-                if resp.status < 500:
-                    # Client error — no point retrying
-                    return False
-        except urllib.error.HTTPError as e:
+            resp = _post(target, body, headers)
+            if 200 <= resp.status < 300:
+                return True
             _warn(
-                f"HTTP error {e.code}: {e.reason} "
+                f"SIEM returned HTTP {resp.status} {resp.reason} "
                 f"(attempt {attempt}/{MAX_RETRIES})"
             )
-            if e.code < 500:
+            if resp.status < 500:
+                # Client error — no point retrying
                 return False
-        except urllib.error.URLError as e:
-            _warn(f"Network error: {e.reason} (attempt {attempt}/{MAX_RETRIES})")
+        except (http.client.HTTPException, OSError) as e:
+            # _post already resent once over a stale keep-alive socket;
+            # anything reaching here is a real failure — reconnect next time.
+            _drop_conn()
+            _warn(f"Network error: {e!r} (attempt {attempt}/{MAX_RETRIES})")
 
         if attempt < MAX_RETRIES:
             time.sleep(RETRY_DELAY)
@@ -134,18 +263,60 @@ def _warn(msg: str) -> None:
     print(f"[log_shipper] WARNING: {msg}", file=sys.stderr, flush=True)
 
 
-def _parse_line(line: str) -> dict:
-    """Parse a JSONL line; wrap raw text on failure."""
+def _parse_line(line: bytes) -> bytes:
+    """Return the NDJSON record for a log line (empty for blank lines).
+
+    Lines that already hold a JSON object are forwarded verbatim — parsed
+    only to validate them, never re-serialised.  Anything else is wrapped
+    as ``{"raw": "<line>"}``.
+    """
     stripped = line.strip()
     if not stripped:
-        return {}
+        return b""
     try:
-        parsed = json.loads(stripped)
-        if isinstance(parsed, dict):
-            return parsed
-    except json.JSONDecodeError:
+        if isinstance(json.loads(stripped), dict):
+            return bytes(stripped)
+    except ValueError:   # JSONDecodeError, or bytes that aren't valid UTF-8
         pass
-    return {"raw": stripped}
+    return json.dumps({"raw": stripped.decode("utf-8", errors="replace")}).encode("utf-8")
+
+
+def _pread_into(fd: int, buf: bytearray, pos: int) -> int:
+    """Read up to ``len(buf)`` bytes at offset *pos* into *buf*."""
+    if hasattr(os, "preadv"):
+        return os.preadv(fd, [buf], pos)
+    if hasattr(os, "pread"):             # POSIX without preadv
+        data = os.pread(fd, len(buf), pos)
+        buf[: len(data)] = data
+        return len(data)
+    # Windows has neither: seek, then readinto through an unowned file object.
+    os.lseek(fd, pos, os.SEEK_SET)
+    with open(fd, "rb", buffering=0, closefd=False) as fh:
+        return fh.readinto(buf) or 0
+
+
+def _read_lines(
+    fd: int, pos: int, buf: bytearray, pending: bytearray
+) -> tuple[list[bytes], int]:
+    """Read everything after offset *pos* in *fd*; return its complete lines.
+
+    Positional reads fill the reusable *buf* (no seek, no file object); a
+    trailing partial line stays in *pending* until the writer finishes it.
+    Returns the lines and the new offset.
+    """
+    view = memoryview(buf)
+    while True:
+        n = _pread_into(fd, buf, pos)
+        if not n:
+            break
+        pending += view[:n]
+        pos += n
+    end = pending.rfind(b"\n")
+    if end < 0:
+        return [], pos
+    lines = pending[:end].split(b"\n")
+    del pending[: end + 1]
+    return lines, pos
 
 
 # ── Main loop ─────────────────────────────────────────────────────────────────
@@ -164,36 +335,53 @@ def tail_and_ship() -> None:
         f"  batch={BATCH_SIZE}  interval={INTERVAL}s  retries={MAX_RETRIES}"
     )
 
+    # Keep one raw fd open across polls; reopen only on rotation.
+    fd: Optional[int] = None
+    inode: Optional[int] = None
+    pos = 0
+    buf = bytearray(_READ_CHUNK)
+    pending = bytearray()   # partial last line, completed by a later poll
+
     # Start from the *end* of the existing file to avoid re-shipping history
-    pos: int = AUDIT_LOG.stat().st_size if AUDIT_LOG.exists() else 0
+    if AUDIT_LOG.exists():
+        fd = os.open(AUDIT_LOG, _OPEN_FLAGS)
+        st = os.fstat(fd)
+        inode, pos = st.st_ino, st.st_size
 
     shipped_total = 0
     try:
         while True:
             time.sleep(INTERVAL)
 
-            if not AUDIT_LOG.exists():
-                continue
-
-            # Handle log rotation: if file shrank, reset to beginning
             try:
-                current_size = AUDIT_LOG.stat().st_size
+                st = os.stat(AUDIT_LOG)
             except OSError:
                 continue
-            if current_size < pos:
-                _info("Log file appears to have been rotated — resetting position.")
-                pos = 0
 
-            # Read new lines
-            new_entries: list[dict] = []
+            # Handle log rotation: a new file (inode changed) or a truncated
+            # one (shrank below our offset) is read again from the beginning.
             try:
-                with AUDIT_LOG.open("r", encoding="utf-8", errors="replace") as fh:
-                    fh.seek(pos)
-                    for raw_line in fh:
-                        entry = _parse_line(raw_line)
-                        if entry:
-                            new_entries.append(entry)
-                    pos = fh.tell()
+                if fd is None or st.st_ino != inode:
+                    if fd is not None:
+                        _info("Log file appears to have been rotated — resetting position.")
+                        os.close(fd)
+                        fd = None
+                    fd = os.open(AUDIT_LOG, _OPEN_FLAGS)
+                    inode, pos = os.fstat(fd).st_ino, 0
+                    pending.clear()
+                elif st.st_size < pos:
+                    # copytruncate-style rotation: same inode, shorter file
+                    _info("Log file appears to have been rotated — resetting position.")
+                    pos = 0
+                    pending.clear()
+
+                # Read new lines
+                new_entries: list[bytes] = []
+                lines, pos = _read_lines(fd, pos, buf, pending)
+                for raw_line in lines:
+                    entry = _parse_line(raw_line)
+                    if entry:
+                        new_entries.append(entry)
             except OSError as e:
                 _warn(f"Read error: {e}")
                 continue
@@ -215,6 +403,10 @@ def tail_and_ship() -> None:
 
     except KeyboardInterrupt:
         _info(f"Stopped. Total entries shipped: {shipped_total}")
+    finally:
+        if fd is not None:
+            os.close(fd)
+        _drop_conn()
 
 
 if __name__ == "__main__":
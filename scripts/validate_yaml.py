@@ -1,10 +1,15 @@
 import yaml
 import sys
 
+try:  # libyaml-backed loader when available, pure-Python otherwise
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
 path = 'agent-gateway/openapi.yaml'
 try:
-    with open(path, 'r', encoding='utf-8') as f:
-        yaml.safe_load(f)
+    with open(path, 'rb') as f:
+        yaml.load(f.read(), Loader=_Loader)
     print('OK')
 except Exception as e:
     print('ERROR')